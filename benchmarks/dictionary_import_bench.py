@@ -0,0 +1,85 @@
+"""
+בנצ'מרק לייבוא/ייצוא מרוכז של המילון: יוצר קובץ עם N רשומות (ברירת מחדל 100 אלף),
+מייבא אותו למסד SQLite זמני בטרנזקציה אחת, מייבא שוב קובץ עם חלק מהמילים בניקוד אחר
+(לבדיקת דוח הקונפליקטים), ומייצא חזרה.
+
+הרצה מתיקיית הפרויקט:
+    python benchmarks/dictionary_import_bench.py [--entries 100000] [--format csv]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.utils.dictionary_io import import_file, write_entries, FORMATS
+from src.utils.dictionary_store import DictionaryStore
+
+LETTERS = "אבגדהוזחטיכלמנסעפצקרשת"
+NIKUD = ["ְ", "ִ", "ֵ", "ֶ", "ַ", "ָ", "ֹ", "ֻ", "ּ"]
+MATCH_TYPES = ["partial", "exact", "prefix"]
+
+
+def build_entries(count, seed=1234):
+    rnd = random.Random(seed)
+    entries = {}
+    while len(entries) < count:
+        word = "".join(rnd.choice(LETTERS) for _ in range(rnd.randint(2, 9)))
+        entries[word] = "".join(ch + rnd.choice(NIKUD) for ch in word)
+    return entries
+
+
+def write_source(path, entries, fmt, seed=1234):
+    rnd = random.Random(seed)
+    metadata = {k: {"match_type": rnd.choice(MATCH_TYPES), "date": "01/01/2025"} for k in entries}
+    return write_entries(path, entries, metadata, fmt)
+
+
+def timed(label, func, *args, **kwargs):
+    t0 = time.perf_counter()
+    result = func(*args, **kwargs)
+    print(f"{label:<28} {(time.perf_counter() - t0) * 1000:10.1f}ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dictionary bulk import benchmark")
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, f"dictionary.{args.format}")
+        entries = build_entries(args.entries)
+        timed("write source file", write_source, source, entries, args.format)
+
+        store = DictionaryStore(os.path.join(tmp, "dictionary.db"))
+        settings = {}
+        store.attach(settings)
+        report = timed("import (empty store)", import_file, settings, source, store=store)
+        print(f"  {report.summary()}")
+        assert report.added == args.entries and len(store.dictionary) == args.entries
+
+        # ייבוא חוזר: 10% מהמילים בניקוד אחר -> קונפליקטים
+        changed = dict(entries)
+        for key in list(changed)[::10]:
+            changed[key] = changed[key][::-1]
+        second = os.path.join(tmp, f"changed.{args.format}")
+        write_source(second, changed, args.format)
+        report = timed("re-import with conflicts", import_file, settings, second, store=store)
+        print(f"  {report.summary()}")
+        assert len(report.conflicts) == len(range(0, args.entries, 10))
+
+        timed("export", write_entries, os.path.join(tmp, f"export.{args.format}"), store.dictionary, store.metadata)
+        store.close()
+
+        # המסד שורד פתיחה מחדש
+        reopened = DictionaryStore(os.path.join(tmp, "dictionary.db"))
+        assert len(reopened.dictionary) == args.entries
+        reopened.close()
+
+
+if __name__ == "__main__":
+    main()
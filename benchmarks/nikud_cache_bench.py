@@ -0,0 +1,109 @@
+"""
+בנצ'מרק למטמון הניקוד: מנקד מסמך סינתטי של N עמודים מול שרת מדומה (השהיה קבועה לכל בקשה),
+עורך פסקה אחת ומנקד שוב. מדווח זמן ומספר בקשות לשרת בכל ריצה.
+
+הרצה מתיקיית הפרויקט:
+    python benchmarks/nikud_cache_bench.py [--pages 300] [--latency 0.15]
+"""
+import os
+import sys
+import time
+import asyncio
+import random
+import argparse
+import functools
+import re
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.services.nikud_service import NikudService
+from src.utils.nikud_cache import NikudCache
+from src.services.nakdan_client import NakdanClient
+
+LETTERS = "אבגדהוזחטיכלמנסעפצקרשת"
+PATACH = "ַ"
+TOKEN_RE = re.compile(r'[\u0590-\u05FF]+|[^\u0590-\u05FF]+')
+HEBREW_RE = re.compile(r'[\u0590-\u05FF]')
+
+
+def fake_tokens(text):
+    """כמו התשובה של דיקטה: טוקן לכל מילה (עם אפשרויות ניקוד) ולכל מפריד"""
+    return [{"word": t, "sep": True} if not HEBREW_RE.match(t)
+            else {"word": t, "options": ["".join(ch + PATACH for ch in t)]}
+            for t in TOKEN_RE.findall(text)]
+
+
+class FakeNakdanClient(NakdanClient):
+    """במקום דיקטה: פתח מתחת לכל אות, אחרי השהיה של בקשת רשת (הסמפור - של הלקוח האמיתי)"""
+
+    def __init__(self, service, latency, **kwargs):
+        # הבנצ'מרק מודד את המטמון ואת הבאצ'ים, לא את מגביל הקצב
+        kwargs.setdefault("rate", 1000.0)
+        super().__init__(**kwargs)
+        self.service = service
+        self.latency = latency
+
+    async def send(self, payload, timeout):
+        self.service.requests += 1
+        await asyncio.sleep(self.latency)
+        return 200, fake_tokens(payload["data"]), None
+
+
+class FakeNakdanService(NikudService):
+
+    def __init__(self, latency, **kwargs):
+        super().__init__(**kwargs)
+        self.requests = 0
+        self.client_factory = functools.partial(FakeNakdanClient, self, latency)
+
+
+def build_document(pages, seed=1234):
+    rnd = random.Random(seed)
+    paragraphs = []
+    for page in range(1, pages + 1):
+        paragraphs.append(f"[PAGE:{page}]")
+        for _ in range(4):
+            sentences = []
+            for _ in range(rnd.randint(3, 6)):
+                words = ["".join(rnd.choice(LETTERS) for _ in range(rnd.randint(2, 7))) for _ in range(rnd.randint(6, 16))]
+                sentences.append(" ".join(words) + rnd.choice(".!?"))
+            paragraphs.append(" ".join(sentences))
+    return "\n".join(paragraphs)
+
+
+def run(label, text, cache, latency):
+    service = FakeNakdanService(latency, cache=cache)
+    t0 = time.perf_counter()
+    result = service.full_text_vocalization_process(text)
+    print(f"{label:<24} {time.perf_counter() - t0:8.2f}s  {service.requests:6d} requests")
+    return result, service.requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vocalization cache benchmark")
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.15, help="השהיה מדומה לכל בקשה (שניות)")
+    args = parser.parse_args()
+
+    text = build_document(args.pages)
+    print(f"document: {args.pages} pages, {len(text)} chars, {len(text.split())} words")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = NikudCache(os.path.join(tmp, "nikud.db"))
+        first, cold_requests = run("cold run", text, cache, args.latency)
+
+        # עריכה של פסקה אחת באמצע המסמך
+        lines = text.split("\n")
+        middle = len(lines) // 2 + 1
+        lines[middle] = "שינוי קטן בפסקה. " + lines[middle]
+        edited = "\n".join(lines)
+        second, warm_requests = run("after editing 1 paragraph", edited, cache, args.latency)
+
+        assert second.count("[PAGE:") == args.pages
+        saved = 100 - warm_requests * 100 // max(1, cold_requests)
+        print(f"requests saved: {saved}%  ({cache.hits} sentence hits, {cache.misses} misses)")
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
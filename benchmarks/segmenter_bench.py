@@ -0,0 +1,122 @@
+"""
+בנצ'מרק לחלוקה למשפטים על קורפוס עברי סינתטי בגודל של כמה מגה.
+הקורפוס נוצר באופן דטרמיניסטי (seed קבוע) וכולל ניקוד, מספרים עשרוניים,
+קיצורים, מרכאות, אנגלית ותגיות עמוד/תמונה.
+
+הרצה מתיקיית הפרויקט:
+    python benchmarks/segmenter_bench.py [--mb 4] [--repeat 5]
+"""
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.utils.segmenter import segment_text
+
+WORDS = [
+    "שלום", "עולם", "ספר", "הקראה", "בְּרֵאשִׁית", "בָּרָא", "אֱלֹהִים", "הַשָּׁמַיִם", "וְאֵת", "הָאָרֶץ",
+    "מחקר", "תוצאות", "אחוז", "ישראל", "ירושלים", "ד\"ר", "פרופ.", "מס.", "Apple", "iPhone", "Mr.",
+    "תל-אביב", "וכו'", "הממשלה", "החליטה", "כי", "על", "את", "של", "לא", "גם", "היה",
+]
+ENDINGS = [".", ".", ".", "?", "!", "...", "׃", ".\"", "?!"]
+
+
+def build_corpus(target_bytes, seed=1234):
+    rnd = random.Random(seed)
+    parts = []
+    size = 0
+    page = 1
+    while size < target_bytes:
+        words = []
+        for _ in range(rnd.randint(4, 18)):
+            r = rnd.random()
+            if r < 0.05:
+                words.append(f"{rnd.randint(0, 99)}.{rnd.randint(0, 9)}")
+            elif r < 0.08:
+                words.append(f"\"{rnd.choice(WORDS)}\"")
+            else:
+                words.append(rnd.choice(WORDS))
+        sentence = " ".join(words) + rnd.choice(ENDINGS)
+        r = rnd.random()
+        if r < 0.15:
+            sentence += "\n"
+        elif r < 0.17:
+            sentence += "\n\n"
+        elif r < 0.175:
+            page += 1
+            sentence += f"\n[PAGE:{page}]\n"
+        elif r < 0.177:
+            sentence += f"\n[IMG:images/img_{page}.png]\n"
+        else:
+            sentence += " "
+        parts.append(sentence)
+        size += len(sentence.encode("utf-8"))
+    return "".join(parts)
+
+
+def legacy_split(text):
+    """החלוקה הקודמת (regex + __DECIMAL_POINT__ + צבירה בבאפר) - לצורך השוואה"""
+    text = re.sub(r'(\d)\.(\d)', r'\1__DECIMAL_POINT__\2', text)
+    raw_parts = re.split(r'(\[PAGE:\d+\]|\[IMG:.*?\]|[.?!]+|\n)', text)
+    final_sentences = []
+    current_buffer = ""
+    for part in raw_parts:
+        if not part: continue
+        part = part.replace("__DECIMAL_POINT__", ".")
+        if "[PAGE:" in part or "[IMG:" in part:
+            if current_buffer.strip():
+                final_sentences.append(current_buffer)
+                current_buffer = ""
+            final_sentences.append(part)
+            continue
+        current_buffer += part
+        is_newline = "\n" in part
+        is_punctuation = re.match(r'^[.?!]+$', part.strip())
+        if is_newline or is_punctuation:
+            if current_buffer.strip():
+                final_sentences.append(current_buffer)
+                current_buffer = ""
+            elif is_newline and current_buffer == "\n":
+                if final_sentences and not final_sentences[-1].startswith("["):
+                    final_sentences[-1] += "\n"
+                current_buffer = ""
+    if current_buffer:
+        final_sentences.append(current_buffer)
+    return final_sentences
+
+
+def best_of(func, arg, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func(arg)
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sentence segmenter benchmark")
+    parser.add_argument("--mb", type=float, default=4.0, help="גודל הקורפוס הגדול ביותר (MB)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'size':>8} {'segments':>10} {'segmenter':>12} {'legacy':>12} {'MB/s':>8}")
+    for fraction in (0.25, 0.5, 1.0):
+        corpus = build_corpus(int(args.mb * fraction * 1024 * 1024))
+        mb = len(corpus.encode("utf-8")) / (1024 * 1024)
+        seg_time, segments = best_of(segment_text, corpus, args.repeat)
+        legacy_time, _ = best_of(legacy_split, corpus, args.repeat)
+
+        # בדיקת תקינות: האופסטים מצביעים בדיוק על הטקסט של כל קטע
+        assert all(corpus[s.start:s.end] == s.text for s in segments)
+
+        print(f"{mb:7.2f}M {len(segments):>10} {seg_time * 1000:10.1f}ms {legacy_time * 1000:10.1f}ms {mb / seg_time:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+ייצוא מלא משורת הפקודה, בלי חלון ובלי לולאת Qt:
+חילוץ (PDF/טקסט) -> ניקוד -> מילון אישי -> הקראה -> MP3 + JSON קריוקי.
+
+    python -m src.cli book.pdf -o out/ --pages 1-20 --voice he-IL-AvriNeural --rate +10%
+    python -m src.cli ch1.txt ch2.txt -o out/ --dictionary dictionary.db --jobs 2
+
+קודי יציאה: 0 הצלחה, 1 כישלון, 2 שגיאת שימוש, 3 הושלם חלקית (משפטים שנכשלו, שנשארו בלי ניקוד או שסונתזו במנוע הגיבוי), 130 בוטל.
+כל ריצה עצמאית (הגדרות ומילון נקראים בלבד, המטמונים בטוחים לכתיבה במקביל), כך שאפשר להריץ הרבה במקביל.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import contextlib
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_PARTIAL = 3
+EXIT_INTERRUPTED = 130
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CONFIG = os.path.join(BASE_DIR, "config.json")
+DEFAULT_DICTIONARY = os.path.join(BASE_DIR, "dictionary.db")
+TEXT_EXTENSIONS = (".txt", ".text", ".md")
+
+
+def parse_pages(value):
+    """"5" / "3-10" / "3-" -> (התחלה, סוף או None)"""
+    try:
+        if "-" in value:
+            start, end = value.split("-", 1)
+            start = int(start) if start.strip() else 1
+            end = int(end) if end.strip() else None
+        else:
+            start = end = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid page range: {value}")
+    if start < 1 or (end is not None and end < start):
+        raise argparse.ArgumentTypeError(f"invalid page range: {value}")
+    return start, end
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m src.cli", description="Headless Hebrew TTS export (PDF/text -> MP3 + karaoke JSON)")
+    parser.add_argument("inputs", nargs="+", help="קובצי PDF או טקסט; כל קובץ הוא עבודה נפרדת")
+    parser.add_argument("-o", "--output-dir", required=True, help="תיקיית הפלט")
+    parser.add_argument("--pages", type=parse_pages, help="טווח עמודים ל-PDF, למשל 3-10")
+    parser.add_argument("--voice", default="he-IL-AvriNeural", help="קול עברי (קוד edge-tts)")
+    parser.add_argument("--en-voice", help="קול אנגלי למצב דו-לשוני")
+    parser.add_argument("--dual", action="store_true", help="מצב דו-לשוני (עברית + אנגלית)")
+    parser.add_argument("--rate", default="+0%", help="מהירות, למשל +10%%")
+    parser.add_argument("--volume", default="+0%")
+    parser.add_argument("--dictionary", help="מילון אישי: dictionary.db או CSV/TSV/JSONL (ברירת מחדל: dictionary.db של התוכנה)")
+    parser.add_argument("--config", help="config.json להגדרות הפסקות/מטמון/מנוע (ברירת מחדל: של התוכנה, אם קיים)")
+    parser.add_argument("--backend", help="מנוע הקראה (edge-tts / local-tone)")
+    parser.add_argument("--no-nikud", action="store_true", help="דילוג על ניקוד אוטומטי (הטקסט כבר מנוקד)")
+    parser.add_argument("--jobs", type=int, default=1, help="כמה קבצים לעבד במקביל בתהליך הזה")
+    parser.add_argument("-q", "--quiet", action="store_true", help="בלי הודעות התקדמות")
+    return parser
+
+
+# --- הגדרות ומילון ---
+def load_settings(args):
+    settings = {}
+    config_path = args.config or (DEFAULT_CONFIG if os.path.exists(DEFAULT_CONFIG) else None)
+    if config_path:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            settings.update(json.load(f))
+    if args.backend:
+        settings["tts_backend"] = args.backend
+
+    dictionary_path = args.dictionary or (DEFAULT_DICTIONARY if os.path.exists(DEFAULT_DICTIONARY) else None)
+    if dictionary_path:
+        load_dictionary(settings, dictionary_path)
+    return settings
+
+
+def load_dictionary(settings, path):
+    """טוען את המילון לזיכרון בלבד - הריצה לא כותבת למסד (בטוח להרצות מקבילות)"""
+    from src.utils.dictionary_store import VersionedDict
+    if path.endswith(".db"):
+        from src.utils.dictionary_store import DictionaryStore
+        store = DictionaryStore(path)
+        try:
+            settings["nikud_dictionary"] = VersionedDict(store.dictionary)
+            settings["nikud_metadata"] = VersionedDict(store.metadata)
+        finally:
+            store.close()
+    else:
+        from src.utils.dictionary_io import import_file
+        settings["nikud_dictionary"], settings["nikud_metadata"] = VersionedDict(), VersionedDict()
+        report = import_file(settings, path)
+        if report.invalid:
+            print(f"[WARN] {path}: {len(report.invalid)} invalid dictionary rows skipped", file=sys.stderr)
+
+
+# --- העבודה עצמה ---
+def read_input(path, pages):
+    if path.lower().endswith(".pdf"):
+        from src.utils.pdf_text import extract_pdf_text
+        start, end = pages or (1, None)
+        return extract_pdf_text([path], start=start, end=end)
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        return f.read()
+
+
+def vocalize(text, settings):
+    """מחזיר (טקסט מנוקד, משפטים שנשארו בלי ניקוד)"""
+    from src.services.nikud_service import NikudService
+    from src.utils.nikud_cache import shared_cache
+    cache = shared_cache(settings.get("nikud_cache_path")) if settings.get("nikud_cache_enabled", True) else None
+    service = NikudService(settings.get("nikud_dictionary", {}), settings.get("nikud_metadata", {}), cache=cache)
+    return service.vocalize(text), service.unvocalized
+
+
+def output_name(path):
+    """שם קובץ הפלט (בלי סיומת) - לפי שם קובץ הקלט בלבד"""
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+async def run_job(path, args, settings, log):
+    """עבודה אחת. מחזיר קוד יציאה"""
+    from src.services.tts_service import TTSExportService, ExportError
+
+    loop = asyncio.get_running_loop()
+    name = output_name(path)
+    output_path = os.path.join(args.output_dir, name + ".mp3")
+    t0 = time.monotonic()
+
+    text = await loop.run_in_executor(None, read_input, path, args.pages)
+    if not text.strip():
+        log(f"{name}: no text extracted")
+        return EXIT_FAILED
+    log(f"{name}: {len(text)} chars extracted")
+
+    unvocalized = []
+    if not args.no_nikud:
+        text, unvocalized = await loop.run_in_executor(None, vocalize, text, settings)
+        log(f"{name}: vocalized" + (f" ({len(unvocalized)} sentences left unvocalized)" if unvocalized else ""))
+
+    last_progress = [-10]
+
+    def on_progress(value):
+        if value >= last_progress[0] + 10:
+            last_progress[0] = value
+            log(f"{name}: {value}%")
+
+    service = TTSExportService(text, output_path, args.voice, args.rate, args.volume, settings=settings,
+                               dual_mode=args.dual, en_voice=args.en_voice, on_progress=on_progress)
+    try:
+        _, skipped = await service.run()
+    except ExportError as e:
+        log(f"{name}: FAILED - {e}")
+        return EXIT_FAILED
+
+    fallback = service.fallback_indices
+    log(f"{name}: done in {time.monotonic() - t0:.1f}s -> {output_path}"
+        + (f" ({len(skipped)} sentences failed)" if skipped else "")
+        + (f" ({len(fallback)} sentences from the fallback engine)" if fallback else ""))
+    return EXIT_PARTIAL if skipped or unvocalized or fallback else EXIT_OK
+
+
+async def run_all(args, settings, log):
+    semaphore = asyncio.Semaphore(max(1, args.jobs))
+
+    async def guarded(path):
+        async with semaphore:
+            try:
+                return await run_job(path, args, settings, log)
+            except Exception as e:
+                log(f"{os.path.basename(path)}: FAILED - {type(e).__name__}: {e}")
+                return EXIT_FAILED
+
+    codes = await asyncio.gather(*(guarded(p) for p in args.inputs))
+    if any(c == EXIT_FAILED for c in codes): return EXIT_FAILED
+    if any(c == EXIT_PARTIAL for c in codes): return EXIT_PARTIAL
+    return EXIT_OK
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    missing = [p for p in args.inputs if not os.path.isfile(p)]
+    if missing:
+        parser.error(f"input not found: {', '.join(missing)}")
+    unsupported = [p for p in args.inputs if not p.lower().endswith((".pdf",) + TEXT_EXTENSIONS)]
+    if unsupported:
+        parser.error(f"unsupported input type (PDF or text only): {', '.join(unsupported)}")
+    # שני קלטים עם אותו שם (x/ch.txt, y/ch.txt) היו כותבים לאותו out/ch.mp3
+    by_name = {}
+    for p in args.inputs:
+        by_name.setdefault(os.path.normcase(output_name(p)), []).append(p)
+    clashes = [paths for paths in by_name.values() if len(paths) > 1]
+    if clashes:
+        parser.error("inputs would write the same output file: " + "; ".join(", ".join(paths) for paths in clashes))
+
+    def log(message):
+        if not args.quiet:
+            print(f"[CLI] {message}", file=sys.stderr, flush=True)
+
+    # השירותים מדפיסים הודעות דיבאג ל-stdout; ב--quiet הן נבלעות (שגיאות ואזהרות הולכות ל-stderr)
+    with contextlib.ExitStack() as stack:
+        if args.quiet:
+            stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, 'w'))))
+        try:
+            settings = load_settings(args)
+            os.makedirs(args.output_dir, exist_ok=True)
+        except Exception as e:
+            print(f"error: {e}", file=sys.stderr)
+            return EXIT_USAGE
+
+        try:
+            return asyncio.run(run_all(args, settings, log))
+        except KeyboardInterrupt:
+            return EXIT_INTERRUPTED
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+import time
+import random
+import asyncio
+import aiohttp
+from src.utils.concurrency import AIMDController, TokenBucket, CircuitBreaker
+
+NAKDAN_URL = "https://nakdan-2-0.loadbalancer.dicta.org.il/api"
+HEADERS = {'Content-Type': 'application/json;charset=UTF-8'}
+
+BATCH_OPTIONS = {
+    "genre": "modern", "keepqq": False, "nodageshdefekt": False, "kamatzdefekt": False,
+    "allways": False, "optimizer": True,
+}
+SINGLE_WORD_OPTIONS = {"genre": "modern", "optimizer": True}
+
+# תשובות שמעידות על עומס/תקלה זמנית - מנסים שוב אחרי המתנה
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """השירות לא זמין כבר יותר מדי זמן - מוותרים על הבקשה"""
+    pass
+
+
+class NakdanClient:
+    """
+    לקוח אסינכרוני לנקדן של דיקטה: session אחד (keep-alive) עם מאגר חיבורים חסום.
+    כל הבקשות - באצ'ים וגם מילים בודדות - עוברות דרך אותן הגנות:
+    - מקביליות אדפטיבית (AIMDController): עד max_concurrency, וחצי בכל עומס (429/5xx/timeout).
+    - מגביל קצב (TokenBucket): עד rate בקשות לשנייה; Retry-After עוצר את כולן.
+    - מפסק זרם (CircuitBreaker): אחרי כמה תקלות ברצף (5xx/timeout/ניתוק, לא 429) לא שולחים עד שבקשת בדיקה מצליחה,
+      ואם השירות לא חוזר תוך give_up_after שניות - הבקשות נכשלות מיד.
+    - ניסיונות חוזרים, עם Backoff מעריכי ו-Jitter: עד retries פעמים ל-5xx/timeout/ניתוק,
+      ול-429 (השרת חי, רק מבקש להאט) - כמה שצריך, עד give_up_after שניות מהניסיון הראשון.
+    לכל בקשה timeout משלה, וביטול המשימה (cancel) מבטל גם את הבקשה שבדרך.
+    שימוש: async with NakdanClient() as client: tokens = await client.vocalize(text)
+    """
+
+    def __init__(self, max_concurrency=5, pool_size=10, timeout=30, single_word_timeout=10, retries=3,
+                 rate=10.0, retry_base_delay=1.0, retry_max_delay=30.0, give_up_after=120.0):
+        self.max_concurrency = max_concurrency
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.single_word_timeout = single_word_timeout
+        self.retries = retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.give_up_after = give_up_after
+        self.requests = 0
+        self.retried = 0
+        self.controller = AIMDController(max_concurrency)
+        self.bucket = TokenBucket(rate)
+        self.breaker = CircuitBreaker()
+        self._session = None
+        self._slots = None
+        self._inflight = 0
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def open(self):
+        # ה-session ותנאי ההמתנה שייכים ללולאה שרצה עכשיו
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(connector=connector, headers=HEADERS)
+            self._slots = asyncio.Condition()
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def summary(self):
+        return (f"{self.requests} בקשות, {self.retried} ניסיונות חוזרים, "
+                f"המפסק נפתח {self.breaker.trips} פעמים | {self.controller.summary()}")
+
+    async def _acquire_slot(self):
+        # המגבלה משתנה תוך כדי ריצה (AIMD), לכן תנאי ולא סמפור קבוע
+        async with self._slots:
+            await self._slots.wait_for(lambda: self._inflight < self.controller.limit)
+            self._inflight += 1
+
+    async def _release_slot(self):
+        async with self._slots:
+            self._inflight -= 1
+            self._slots.notify_all()
+
+    async def _wait_for_breaker(self):
+        wait = self.breaker.wait_time()
+        while wait > 0:
+            if self.breaker.open_for() > self.give_up_after:
+                raise CircuitOpenError(f"Nakdan unavailable for {self.breaker.open_for():.0f}s")
+            await asyncio.sleep(wait)
+            wait = self.breaker.wait_time()
+
+    def retry_delay(self, attempt, retry_after=None):
+        """Backoff מעריכי עם Jitter (חצי קבוע, חצי אקראי); Retry-After של השרת הוא רצפה"""
+        ceiling = min(self.retry_max_delay, self.retry_base_delay * (2 ** (attempt - 1)))
+        delay = ceiling / 2 + random.uniform(0, ceiling / 2)
+        return max(delay, retry_after or 0)
+
+    async def post(self, text, options, timeout, retries=None):
+        """
+        בקשה אחת, כולל המתנה למפסק, לקצב ולמקום פנוי, וניסיונות חוזרים.
+        retries מגביל רק תקלות (5xx/timeout/ניתוק); על 429 ממשיכים עד give_up_after שניות.
+        מחזיר (סטטוס, json או None); זורק את השגיאה האחרונה אם כל הניסיונות נכשלו בחריגה.
+        """
+        payload = {"task": "nakdan", "data": text, **options}
+        retries = self.retries if retries is None else retries
+        deadline = time.monotonic() + self.give_up_after
+        attempt = 0
+        failures = 0
+        while True:
+            attempt += 1
+            await self._wait_for_breaker()
+            await self._acquire_slot()
+            status, data, retry_after, error = None, None, None, None
+            congestion = True
+            try:
+                delay = self.bucket.reserve()
+                if delay > 0: await asyncio.sleep(delay)
+                token = self.controller.start_request()
+                self.requests += 1
+                try:
+                    status, data, retry_after = await self.send(payload, timeout)
+                except asyncio.TimeoutError as e:
+                    error = e
+                except aiohttp.ClientConnectionError as e:
+                    error, congestion = e, False
+            finally:
+                await self._release_slot()
+
+            if error is None and status not in RETRYABLE_STATUSES:
+                # גם 4xx אחר אומר שהשרת חי ועונה
+                self.controller.on_success(token)
+                self.breaker.on_success()
+                return status, data
+
+            if self.controller.on_failure(token, congestion=congestion):
+                print(f"[NAKDAN] Overload ({status or type(error).__name__}) - concurrency down to {self.controller.limit}")
+            wait = self.retry_delay(attempt, retry_after)
+            if status == 429:
+                # האטה מצד השרת (הוא חי): מורידים קצב ומקביליות, אבל לא פותחים את המפסק ולא סופרים ניסיון
+                if retry_after: self.bucket.hold(retry_after)
+                if time.monotonic() + wait > deadline:
+                    print(f"[NAKDAN] Still throttled after {self.give_up_after:.0f}s - giving up")
+                    return status, None
+            else:
+                if self.breaker.on_failure():
+                    print(f"[NAKDAN] Circuit open for {self.breaker.cooldown:.1f}s after {self.breaker.failures} failures")
+                failures += 1
+                if failures > retries:
+                    if error is not None: raise error
+                    return status, None
+            self.retried += 1
+            await asyncio.sleep(wait)
+
+    async def send(self, payload, timeout):
+        """שליחה בפועל. מחזיר (סטטוס, json או None, Retry-After בשניות או None)"""
+        async with self._session.post(NAKDAN_URL, json=payload, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            if response.status != 200:
+                retry_after = None
+                try: retry_after = float(response.headers.get("Retry-After", ""))
+                except ValueError: pass
+                return response.status, None, retry_after
+            return 200, await response.json(content_type=None), None
+
+    async def vocalize(self, text):
+        """באצ' טקסט. מחזיר את רשימת הטוקנים, או None בכישלון"""
+        try:
+            status, data = await self.post(text, BATCH_OPTIONS, self.timeout)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[DEBUG] Batch Exception: {type(e).__name__}: {e}")
+            return None
+        if status != 200:
+            print(f"[DEBUG] Server Error: {status}")
+            return None
+        if not isinstance(data, list):
+            print(f"[DEBUG] Unexpected response type: {type(data).__name__}")
+            return None
+        return data
+
+    async def vocalize_word(self, word):
+        """מילה בודדת. מחזיר את רשימת הטוקנים, או None בכישלון"""
+        try:
+            status, data = await self.post(word, SINGLE_WORD_OPTIONS, self.single_word_timeout, retries=1)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            return None
+        return data if status == 200 and isinstance(data, list) else None
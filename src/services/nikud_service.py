@@ -0,0 +1,341 @@
+import re
+import time
+import asyncio
+from src.utils.dictionary_matcher import apply_dictionary
+from src.utils.segmenter import segment_text, TEXT
+from src.utils.nakdan_align import align_tokens, apply_spans
+from src.services.nakdan_client import NakdanClient
+
+# גודל באצ' בתווים (משפטים שלמים). בערך כמו 100 המילים של פעם, אבל בלי לחתוך משפט
+BATCH_CHARS = 1500
+
+HEBREW_RE = re.compile(r'[\u05D0-\u05EA]')
+HEBREW_WORD_RE = re.compile(r'[\u0590-\u05FF]+')
+NIKUD_RE = re.compile(r'[\u05B0-\u05BC\u05C1\u05C2\u05C7]')
+
+
+class NikudService:
+    """
+    ניקוד טקסט מול דיקטה (חלוקה לבאצ'ים, שליחה במקביל, הרכבה) והחלת המילון האישי, בלי תלות ב-Qt.
+    ההתקדמות מדווחת דרך callbacks: on_progress(הודעה), on_percent(אחוז).
+    NikudWorker הוא מתאם דק שמריץ את השירות בתהליכון ומעביר את ה-callbacks לסיגנלים.
+    """
+
+    def __init__(self, dictionary=None, metadata=None, on_progress=None, on_percent=None, cache=None):
+        self.dictionary = dictionary if dictionary else {}
+        self.metadata = metadata if metadata else {}
+        self.cache = cache # NikudCache אופציונלי (משפטים שכבר נוקדו לא נשלחים שוב)
+        self.batch_chars = BATCH_CHARS
+        self.on_progress = on_progress
+        self.on_percent = on_percent
+        self.max_concurrency = 5
+        self.client_factory = NakdanClient
+        self.client = None # פתוח רק בזמן ריצה (שייך ללולאת asyncio של הריצה)
+        self._loop = None
+        self._task = None
+        self.failed_batches = []   # (מספר באצ', מספר משפטים, תחילת הטקסט) של באצ'ים שנכשלו סופית
+        self.unvocalized = []      # משפטים שנשארו בלי ניקוד בריצה האחרונה
+        self.incomplete = []       # משפטים שנוקדו רק בחלקם (מילה שלא קיבלה ניקוד) - לא נשמרים במטמון
+
+    def report(self, message):
+        if self.on_progress: self.on_progress(message)
+
+    def report_percent(self, value):
+        if self.on_percent: self.on_percent(value)
+
+    def vocalize(self, text):
+        """ניקוד (דיקטה) + מילון אישי, עם הגנה על תגיות תמונה"""
+        # === שלב 1: הגנה על תגיות תמונה ===
+        # מחליפים את כל התגיות [IMG:...] בטוקן זמני כדי שהניקוד והמילון לא ייגעו בהן
+        protected_imgs = {}
+        
+        def replace_callback(match):
+            # יוצר טוקן ייחודי, למשל: __IMG_PROTECTED_0__
+            token = f"__IMG_PROTECTED_{len(protected_imgs)}__"
+            protected_imgs[token] = match.group(0) # שומר את התגית המקורית בצד
+            return token
+            
+        # יצירת טקסט זמני שבו התמונות מוחלפות בטוקנים
+        temp_text = re.sub(r'\[IMG:.*?\]', replace_callback, text)
+        # ===================================
+
+        self.report("שולח את הטקסט המלא לניקוד (דיקטה)...")
+        
+        t0 = time.time()
+        # שולחים את הטקסט המוגן (עם הטוקנים, בלי הנתיבים) לניקוד
+        vocalized_text = self.full_text_vocalization_process(temp_text)
+        dt = time.time() - t0
+        print(f"[DEBUG] Dicta process finished in {dt:.2f} seconds.")
+        
+        self.report("מחיל הגדרות מילון אישי...")
+        print(f"[DEBUG] Applying dictionary replacements ({len(self.dictionary)} items)...")
+        
+        # החלפת מילים מהמילון (עדיין על הטקסט עם הטוקנים)
+        final_text = self.apply_dictionary_on_vocalized(vocalized_text)
+        
+        # === שלב 2: שחזור תגיות תמונה ===
+        # מחזירים את התגיות המקוריות למקומן במקום הטוקנים
+        for token, original_tag in protected_imgs.items():
+            final_text = final_text.replace(token, original_tag)
+        # ================================
+        
+        return final_text
+
+    def clean_non_bgdkpt(self, text):
+        if not text: return ""
+        allowed_dagesh = ['\u05d1', '\u05db', '\u05e4', '\u05d5'] 
+        dagesh_char = '\u05bc'
+        chars = list(text)
+        out = []
+        for i, char in enumerate(chars):
+            if char == dagesh_char:
+                if i > 0 and chars[i-1] in allowed_dagesh:
+                    out.append(char)
+            else:
+                out.append(char)
+        return "".join(out)
+
+    async def request_nakdan(self, text):
+        """בקשה אחת לדיקטה. מחזיר את רשימת הטוקנים, או None בכישלון"""
+        return await self.client.vocalize(text)
+
+    def align_response(self, text, tokens):
+        """ממפה את הטוקנים שחזרו לאופסטים בטקסט שנשלח (לפי שלד האותיות, ראה align_tokens)"""
+        return align_tokens(text, tokens, clean=self.clean_non_bgdkpt)
+
+    async def vocalize_batch(self, text):
+        """
+        מנקד באצ' (משפטים שלמים, כולל פיסוק). מחזיר (spans, gaps) לפי אופסטים בטקסט שנשלח:
+        spans - [(התחלה, סוף, מילה מנוקדת), ...], gaps - [(התחלה, סוף), ...] של מילים שנשארו בלי ניקוד.
+        מחזיר None אם הבקשה נכשלה. רק מילים שלא קיבלו ניקוד בתשובה נשלחות בנפרד.
+        """
+        if not text.strip(): return [], []
+        print(f"[DEBUG] Sending batch of {len(text)} chars (Starts with: {text.split(None, 1)[0]})...")
+
+        tokens = await self.request_nakdan(text)
+        if tokens is None:
+            return None
+        spans = self.align_response(text, tokens)
+
+        # חלקי מילים עבריות שאף טוקן לא כיסה (נדיר) - ניקוד מילה-מילה רק להם
+        missing = []
+        k = 0
+        for m in HEBREW_WORD_RE.finditer(text):
+            while k < len(spans) and spans[k][1] <= m.start():
+                k += 1
+            pos = m.start()
+            j = k
+            while j < len(spans) and spans[j][0] < m.end():
+                if spans[j][0] > pos:
+                    missing.append((pos, spans[j][0], text[pos:spans[j][0]]))
+                pos = max(pos, spans[j][1])
+                j += 1
+            if pos < m.end():
+                missing.append((pos, m.end(), text[pos:m.end()]))
+        missing = [item for item in missing if HEBREW_RE.search(item[2])]
+
+        if missing:
+            print(f"[DEBUG] {len(missing)} words not aligned in batch, vocalizing them one by one.")
+            # אותו סמפור גלובלי של הלקוח - בלי מאגר מקונן
+            fixed = await asyncio.gather(*(self.vocalize_single_word(w) for _, _, w in missing))
+            spans.extend((start, end, word) for (start, end, _), word in zip(missing, fixed) if word)
+            spans.sort()
+            gaps = [(start, end) for (start, end, _), word in zip(missing, fixed) if not word]
+            if gaps:
+                print(f"[DEBUG] {len(gaps)} words left unvocalized in batch.")
+            return spans, gaps
+        print(f"[DEBUG] Batch success.")
+        return spans, []
+
+    async def vocalize_single_word(self, word):
+        """ניקוד מילה בודדת. מחזיר None אם הבקשה נכשלה או שלא חזר ניקוד"""
+        data = await self.client.vocalize_word(word)
+        try:
+            if data and 'options' in data[0]:
+                vocalized = self.clean_non_bgdkpt(data[0]['options'][0].replace('|', '').strip())
+                if NIKUD_RE.search(vocalized): return vocalized
+        except Exception: pass
+        return None
+
+    def full_text_vocalization_process(self, input_text):
+        """
+        מנקד את כל המשפטים העבריים בטקסט. משפטים שכבר נוקדו בעבר נלקחים מהמטמון,
+        ורק השאר נשלחים לדיקטה. כל מה שבין המשפטים (רווחים, תגיות) נשאר כמו שהוא.
+        """
+        segments = [seg for seg in segment_text(input_text) if seg.kind == TEXT and HEBREW_RE.search(seg.text)]
+        sentences = [seg.text for seg in segments]
+
+        cached = self.cache.get_many(sentences) if self.cache else {}
+        pending = [s for s in dict.fromkeys(sentences) if s not in cached]
+        print(f"[DEBUG] Sentences: {len(sentences)} total, {len(cached)} from cache, {len(pending)} to vocalize")
+
+        self.failed_batches = []
+        self.incomplete = []
+        vocalized = self.run_vocalization(pending) if pending else {}
+        self.unvocalized = [s for s in pending if s not in vocalized]
+        if self.cache:
+            # נשמרים רק משפטים שנוקדו במלואם: משפטים מבאצ'ים שנכשלו לא מוחזרים בכלל,
+            # משפט שחלק ממילותיו נשארו בלי ניקוד ינוקד שוב בריצה הבאה, ומשפט שלא השתנה לא נשמר
+            incomplete = set(self.incomplete)
+            self.cache.put_many((s, v) for s, v in vocalized.items()
+                                if s not in incomplete and v != s and NIKUD_RE.search(v))
+            if self.cache.stats_message():
+                self.report(self.cache.stats_message())
+        vocalized.update(cached)
+
+        print("[DEBUG] Reassembling full text...")
+        out = []
+        pos = 0
+        for seg in segments:
+            out.append(input_text[pos:seg.start])
+            out.append(vocalized.get(seg.text, seg.text))
+            pos = seg.end
+        out.append(input_text[pos:])
+        return "".join(out)
+
+    @staticmethod
+    def pack_batches(sentences, budget=BATCH_CHARS):
+        """
+        אורז משפטים שלמים לבאצ'ים של עד budget תווים (בלי לחתוך משפט באמצע).
+        משפט ארוך מהתקציב נחתך ברווח האחרון שלפני הגבול.
+        מחזיר רשימת באצ'ים, כל אחד [(מספר משפט, אופסט בתוך המשפט, טקסט), ...]
+        """
+        batches = []
+        batch = []
+        size = 0
+        for idx, sentence in enumerate(sentences):
+            pieces = []
+            start = 0
+            while len(sentence) - start > budget:
+                cut = sentence.rfind(" ", start + 1, start + budget)
+                if cut <= start: cut = start + budget
+                pieces.append((start, sentence[start:cut]))
+                start = cut
+            pieces.append((start, sentence[start:]))
+
+            for offset, piece in pieces:
+                if batch and size + len(piece) + 1 > budget:
+                    batches.append(batch)
+                    batch = []
+                    size = 0
+                batch.append((idx, offset, piece))
+                size += len(piece) + 1
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def run_vocalization(self, sentences):
+        """מריץ את vocalize_sentences בלולאת asyncio משלו (נקרא מתהליכון רקע, לא מתוך לולאה)"""
+        try:
+            return asyncio.run(self._run_with_client(sentences))
+        except asyncio.CancelledError:
+            raise RuntimeError("הניקוד בוטל")
+
+    async def _run_with_client(self, sentences):
+        self._loop = asyncio.get_running_loop()
+        self._task = asyncio.current_task()
+        try:
+            async with self.client_factory(max_concurrency=self.max_concurrency) as client:
+                self.client = client
+                results = await self.vocalize_sentences(sentences)
+                print(f"[DEBUG] Nakdan client: {client.summary()}")
+                return results
+        finally:
+            self.client = None
+            self._loop = None
+            self._task = None
+
+    def cancel(self):
+        """מבטל ניקוד שרץ כרגע (בטוח לקריאה מכל תהליכון); בקשות שבדרך מבוטלות מיד"""
+        loop, task = self._loop, self._task
+        if loop and task:
+            loop.call_soon_threadsafe(task.cancel)
+
+    async def vocalize_sentences(self, sentences):
+        """
+        שולח את המשפטים לדיקטה בבאצ'ים של משפטים שלמים (עם הפיסוק, בשביל ההקשר),
+        ומחזיר את התוצאות לפי אופסטים. מחזיר {משפט: משפט מנוקד} רק למשפטים שכל הבאצ'ים שלהם הצליחו.
+        משפטים שחלק ממילותיהם נשארו בלי ניקוד נרשמים ב-self.incomplete.
+        כל הבאצ'ים נשלחים כמשימות; הלקוח מגביל כמה מהן באוויר בו-זמנית.
+        """
+        batches = self.pack_batches(sentences, self.batch_chars)
+        replacements = [[] for _ in sentences]  # לכל משפט: [(התחלה, סוף, מילה מנוקדת), ...]
+        failed = set()
+        partial = set()
+        self.failed_batches = []
+        self.incomplete = []
+
+        completed_batches = 0
+        total_batches = len(batches)
+        print(f"[DEBUG] Created {total_batches} sentence-aligned batches (<= {self.batch_chars} chars). Sending...")
+
+        async def send(batch):
+            # המשפטים מופרדים בירידת שורה; זוכרים איפה כל אחד מתחיל בטקסט שנשלח
+            starts = []
+            pos = 0
+            for _, _, piece in batch:
+                starts.append(pos)
+                pos += len(piece) + 1
+            try:
+                result = await self.vocalize_batch("\n".join(piece for _, _, piece in batch))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[DEBUG] Batch Error: {e}")
+                result = None
+            return batch, starts, result
+
+        batch_numbers = {id(b): n for n, b in enumerate(batches, 1)}
+        tasks = [asyncio.ensure_future(send(b)) for b in batches]
+        try:
+            for future in asyncio.as_completed(tasks):
+                batch, starts, result = await future
+                if result is None:
+                    failed.update(idx for idx, _, _ in batch)
+                    self.failed_batches.append((batch_numbers[id(batch)], len(batch), batch[0][2].strip()[:40]))
+                else:
+                    spans, gaps = result
+                    for gap_start, _ in gaps:
+                        # המשפט שהמילה שנשארה בלי ניקוד שייכת אליו
+                        for (idx, _, piece), start in zip(batch, starts):
+                            if start <= gap_start < start + len(piece):
+                                partial.add(idx)
+                                break
+                    # החזרת כל מילה למשפט שלה, לפי האופסט
+                    spans = iter(spans)
+                    span = next(spans, None)
+                    for (idx, offset, piece), start in zip(batch, starts):
+                        end = start + len(piece)
+                        while span and span[0] < end:
+                            if span[0] >= start and span[1] <= end:
+                                replacements[idx].append((span[0] - start + offset, span[1] - start + offset, span[2]))
+                            span = next(spans, None)
+
+                completed_batches += 1
+                percent = int((completed_batches / total_batches) * 90)
+                self.report_percent(percent)
+                if completed_batches % 5 == 0:
+                    print(f"[DEBUG] Progress: {completed_batches}/{total_batches} batches done.")
+        finally:
+            # ביטול (או חריגה): לא משאירים בקשות תלויות
+            for task in tasks:
+                task.cancel()
+
+        if failed:
+            for number, count, sample in sorted(self.failed_batches):
+                print(f"[DEBUG] Batch {number}/{total_batches} left unvocalized ({count} sentences, starts with: {sample})")
+            self.report(f"⚠️ {len(self.failed_batches)} מתוך {total_batches} באצ'ים נשארו בלי ניקוד ({len(failed)} משפטים)")
+        results = {}
+        for idx, sentence in enumerate(sentences):
+            if idx in failed: continue
+            if idx in partial: self.incomplete.append(sentence)
+            results[sentence] = apply_spans(sentence, sorted(replacements[idx]))
+        if self.incomplete:
+            print(f"[DEBUG] {len(self.incomplete)} sentences vocalized only partially (not cached).")
+        return results
+
+    def apply_dictionary_on_vocalized(self, text):
+        # מעבר יחיד: הניקוד שדיקטה הוסיף לא מפריע להתאמה, והמילה כולה (עם הניקוד הישן) מוחלפת
+        processed_text, count = apply_dictionary(text, self.dictionary, self.metadata)
+        print(f"[DEBUG] Dictionary replacements on vocalized text: {count}")
+        return processed_text
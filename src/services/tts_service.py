@@ -0,0 +1,679 @@
+import re
+import json
+import time
+import heapq
+import random
+import asyncio
+import threading
+import numpy as np
+from collections import deque
+import edge_tts
+from src.utils.audio_cache import AudioCache
+from src.utils.concurrency import AIMDController
+from src.utils.tts_backends import get_backend
+from src.utils.audio_stream import StreamingMp3Writer, PcmFileReader, decode_to_pcm_file, ms_to_bytes, bytes_to_ms, FRAME_RATE, SAMPLE_WIDTH, CHANNELS
+from src.utils.silence_trim import trim_silence
+from src.utils.audio_decode import DECODER_POOL, decode_mp3, decoder_name, silence, pcm_from_bytes
+from src.utils.export_manifest import load_manifest, save_manifest, plan_reuse
+from src.utils.segmenter import segment_text
+from src.utils.dictionary_matcher import apply_dictionary
+from src.utils.language_runs import split_language_runs, join_runs, find_run_cuts
+
+# --- הגדרת סוגי שגיאות מותאמים אישית ---
+class ServerOverloadError(Exception):
+    """שגיאה שמעידה שהשרת עמוס או דוחה את הבקשה"""
+    pass
+
+class NetworkConnectionError(Exception):
+    """שגיאה שמעידה על בעיה באינטרנט המקומי"""
+    pass
+
+class ExportError(Exception):
+    """הייצוא נכשל (ההודעה מיועדת להצגה למשתמש)"""
+    pass
+
+class TTSExportService:
+    """
+    ייצוא טקסט ל-MP3 + JSON קריוקי, בלי תלות ב-Qt: חלוקה למשפטים, תזמון הסינתזה
+    (מקביליות אדפטיבית, ניסיונות חוזרים), מטמון, ייצוא מצטבר והרכבת הקובץ בזרימה.
+    ההתקדמות מדווחת דרך callbacks: on_progress(אחוז), on_log(הודעה).
+    run() מחזיר (נתיב, משפטים שנכשלו) או זורק ExportError.
+    TTSWorker הוא מתאם דק שמריץ את השירות בתהליכון ומעביר את ה-callbacks לסיגנלים.
+    """
+
+    def __init__(self, text, output_file, voice, rate, volume, settings=None, dual_mode=False,
+                 repair_only=False, en_voice=None, on_progress=None, on_log=None):
+        self.text = text
+        self.repair_only = repair_only # סינתזה מחדש רק של משפטים שנכשלו בייצוא הקודם
+        self.output_path = output_file
+        self.voice = voice
+        self.rate = rate
+        self.speed = rate # תיקון: משתנה נדרש
+        self.volume = volume
+        self.dual_mode = dual_mode
+        
+        # גיבוי לקולות
+        self.he_voice = voice
+        self.en_voice = voice 
+        
+        self.on_progress = on_progress
+        self.on_log = on_log
+
+        # הגדרות ברירת מחדל למניעת קריסה
+        self.user_max_limit = 15
+        self.min_limit = 1
+        self.current_limit = 15
+        
+        self.settings = settings if settings is not None else {}
+        if settings is not None:
+            self.user_max_limit = int(self.settings.get("max_concurrent", 5))
+            self.current_limit = self.user_max_limit
+
+        # קול אנגלי שנבחר במפורש (מצב דו-לשוני)
+        if en_voice:
+            self.en_voice = en_voice
+
+        # משתנים פנימיים
+        self.is_running = True
+        self.loop = None
+        self.results = {}
+        self.skipped_sentences = []
+        self.completed_count = 0
+        self.total_sentences = 0
+        self.processing_idxs = set() # תיקון: למניעת קריסה בלוגים
+        self.reused_spans = {}
+        self.failed_indices = set()
+        self.fallback_indices = set() # משפטים שסונתזו במנוע הגיבוי - לא לשימוש חוזר בייצוא הבא
+        self.attempts = {}
+        self.trimmed_samples = 0
+        self._trim_lock = threading.Lock()
+        self.previous_pcm = None
+        self.writer = None
+        self.consecutive_successes = 0
+        self.consecutive_errors = 0
+
+        # בקר עומס: user_max_limit הוא התקרה, המגבלה בפועל משתנה לפי תגובות השרת
+        self.controller = AIMDController(self.user_max_limit, self.min_limit)
+        self.current_limit = self.controller.limit
+
+        # מנוע ההקראה (ניתן להחלפה) ומנוע גיבוי אופציונלי כשהשירות בענן לא זמין
+        self.backend = get_backend(self.settings.get("tts_backend"))
+        fallback_name = self.settings.get("tts_fallback_backend")
+        self.fallback_backend = get_backend(fallback_name) if fallback_name else None
+
+        # מטמון אודיו קבוע (דילוג על בקשות ופענוח עבור משפטים שכבר סונתזו)
+        self.audio_cache = None
+        if self.settings.get("audio_cache_enabled", True):
+            try:
+                max_mb = int(self.settings.get("audio_cache_max_mb", 2048))
+                self.audio_cache = AudioCache(self.settings.get("audio_cache_dir"), max_bytes=max_mb * 1024 * 1024)
+            except Exception as e:
+                print(f"[CACHE ERROR] Could not open audio cache: {e}")
+
+    def progress(self, value):
+        if self.on_progress: self.on_progress(value)
+
+    def log(self, message):
+        if self.on_log: self.on_log(message)
+
+    async def run(self):
+        """מריץ את הייצוא על הלולאה הנוכחית. מחזיר (נתיב הקובץ, משפטים שנכשלו)"""
+        print(f"\n=== STARTING TTS (Target: {self.user_max_limit}, Backend: {self.backend.name}, Decoder: {decoder_name()}) ===")
+        self.loop = asyncio.get_running_loop()
+        try:
+            return await self.process_adaptive()
+        finally:
+            print("=== PROCESS FINISHED ===\n")
+
+    def enforce_dictionary(self, text):
+        """מבצע את החלפות המילון (מנוע משותף, מעבר יחיד על הטקסט)"""
+        if not self.settings: return text
+        nikud_dict = self.settings.get("nikud_dictionary", {})
+        metadata = self.settings.get("nikud_metadata", {})
+        processed_text, count = apply_dictionary(text, nikud_dict, metadata)
+        if count:
+            print(f"[DEBUG] Dictionary: {count} replacements")
+        return processed_text
+
+    def report_status(self):
+        active_list = sorted(list(self.processing_idxs))
+        msg = f"🚀 עובדים: {self.current_limit}/{self.user_max_limit} | פעיל: {active_list[:5]}..."
+        self.log(msg)
+
+    async def process_adaptive(self):
+        print("[DEBUG] TTSExportService: process_adaptive started (Preserving Layout)")
+
+        if self.repair_only:
+            # מעבר תיקון: אותה רשימת משפטים בדיוק כמו בייצוא הקודם
+            final_sentences = self.load_failed_render_sentences()
+            if final_sentences is None:
+                raise ExportError("לא נמצא ייצוא קודם תואם לקובץ הזה - יש לבצע ייצוא מלא.")
+        else:
+            final_sentences = self.build_sentence_list()
+
+        self.total_sentences = len(final_sentences)
+        print(f"[DEBUG] Total items to process: {self.total_sentences}")
+
+        # === ייצוא מצטבר: שימוש חוזר באודיו של משפטים שלא השתנו ===
+        self.reused_spans = await self.load_previous_render(final_sentences)
+
+        # === שלב העיבוד (Processing) ===
+        queue = deque()
+        
+        # מיון: עמודים ותמונות לא נשלחים ל-TTS
+        for i, s in enumerate(final_sentences):
+            # אם זה לא טקסט להקראה (עמוד, תמונה, או רק ירידת שורה)
+            if "[PAGE:" in s or "[IMG:" in s or not s.strip():
+                # מסמנים כהצלחה ריקה (שקט)
+                self.results[i] = silence(0)
+            elif i in self.reused_spans:
+                self.completed_count += 1
+            else:
+                queue.append((i, s))
+
+        # === פתיחת הקובץ הסופי לכתיבה בזרימה ===
+        # כל רצף משפטים שהושלם לפי הסדר נכתב מיד ל-MP3 ומשוחרר מהזיכרון
+        try:
+            self.writer = StreamingMp3Writer(self.output_path)
+        except Exception as e:
+            self.close_previous_render()
+            raise ExportError(f"שגיאה בפתיחת קובץ הפלט: {e}")
+        self.next_write_idx = 0
+        self.position_bytes = 0 # המיקום בקובץ נספר בבתים של PCM (בלי עיגול מצטבר); מילישניות רק בפלט
+        self.karaoke_data = []
+        self.spans = [None] * self.total_sentences
+        self.flush_ready(final_sentences)
+
+        # חלון מקסימלי של משפטים שמחכים לכתיבה (מגביל את צריכת הזיכרון)
+        window = max(50, self.user_max_limit * 4)
+
+        # הרצת ה-Workers
+        active_tasks = {}
+        retry_heap = [] # (זמן מוכנות, אינדקס, משפט) - משפטים שממתינים לניסיון חוזר
+        
+        try:
+            while queue or active_tasks or retry_heap:
+                # משפטים שזמן ההמתנה שלהם עבר חוזרים לראש התור (הם הכי ותיקים)
+                now = time.monotonic()
+                while retry_heap and retry_heap[0][0] <= now:
+                    _, idx, sent = heapq.heappop(retry_heap)
+                    queue.appendleft((idx, sent))
+
+                while (len(active_tasks) < self.current_limit and queue
+                       and queue[0][0] < self.next_write_idx + window):
+                    idx, sent = queue.popleft()
+                    # שולחים את הטקסט נקי מרווחים מיותרים ל-TTS, אבל שומרים את המקור ל-JSON
+                    clean_sent_for_tts = sent.strip()
+                    task = asyncio.create_task(self.worker_wrapper(idx, clean_sent_for_tts))
+                    active_tasks[task] = (idx, sent)
+
+                wait_for_retry = max(0.0, retry_heap[0][0] - time.monotonic()) if retry_heap else None
+                if not active_tasks:
+                    if wait_for_retry is not None: await asyncio.sleep(wait_for_retry)
+                    continue
+
+                done, pending = await asyncio.wait(active_tasks, timeout=wait_for_retry, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    idx, sent = active_tasks.pop(task)
+                    try:
+                        result = await task
+                    except Exception as e:
+                        result = {'status': 'error', 'index': idx, 'error': e}
+
+                    if result['status'] != 'success':
+                        delay = self.schedule_retry(idx, sent, result['error'])
+                        if delay is not None:
+                            heapq.heappush(retry_heap, (time.monotonic() + delay, idx, sent))
+                            continue
+                        # נגמרו הניסיונות - רשימת המתים (Dead Letter). שקט במקום המשפט כדי לשמור על הסדר
+                        result['audio'] = silence(500)
+
+                    self.results[idx] = result['audio']
+                    self.completed_count += 1
+                    progress = int((self.completed_count / self.total_sentences) * 100)
+                    self.progress(progress)
+                self.flush_ready(final_sentences)
+
+            if self.fallback_indices:
+                self.log(f"⚠️ {len(self.fallback_indices)} משפטים סונתזו במנוע הגיבוי ({self.fallback_backend.name}) - "
+                         f"הם יסונתזו מחדש בייצוא הבא")
+            if self.skipped_sentences:
+                self.skipped_sentences.sort()
+                self.log(f"⚠️ {len(self.skipped_sentences)} משפטים נכשלו אחרי כל הניסיונות")
+            print(f"[DEBUG] Concurrency controller: {self.controller.summary()}")
+            if self.trimmed_samples:
+                trimmed_sec = self.trimmed_samples / (FRAME_RATE * CHANNELS)
+                print(f"[DEBUG] Silence trimming removed {trimmed_sec:.1f}s")
+                self.log(f"✂️ נחתכו {trimmed_sec:.1f} שניות של שקט מיותר")
+            if self.audio_cache:
+                print(f"[DEBUG] Audio cache: {self.audio_cache.hits} hits, {self.audio_cache.misses} misses")
+                self.log(self.audio_cache.stats_message())
+
+            # === שלב השמירה (Saving) ===
+            self.log("מסיים כתיבת קובץ סופי...")
+            await self.loop.run_in_executor(None, self.writer.close)
+        except Exception as e:
+            self.writer.abort()
+            raise ExportError(f"שגיאה בשמירה: {e}") from e
+        finally:
+            self.close_previous_render()
+
+        # ייצוא קובץ הקריוקי
+        try:
+            json_path = self.output_path.replace(".mp3", ".json")
+            with open(json_path, 'w', encoding='utf-8') as f:
+                json.dump(self.karaoke_data, f, ensure_ascii=False, indent=4)
+
+            if self.settings.get("incremental_export", True):
+                try:
+                    save_manifest(self.output_path, final_sentences, self.spans, self.render_fingerprint(),
+                                  failed=self.failed_indices | self.fallback_indices)
+                except Exception as e:
+                    print(f"[MANIFEST] Could not save manifest: {e}")
+                
+        except Exception as e:
+            raise ExportError(f"שגיאה בשמירה: {e}") from e
+
+        return self.output_path, self.skipped_sentences
+
+    def flush_ready(self, final_sentences):
+        """כותב לקובץ את כל המשפטים הרצופים שכבר מוכנים, לפי הסדר"""
+        pause_duration = self.settings.get("pause_sentence", 600)
+        pause_bytes = ms_to_bytes(pause_duration)
+
+        while self.next_write_idx < self.total_sentences:
+            i = self.next_write_idx
+            raw_text = final_sentences[i]
+            
+            # 1. טיפול בטריגר עמוד
+            if "[PAGE:" in raw_text:
+                try:
+                    match = re.search(r'\[PAGE:(\d+)\]', raw_text)
+                    if match:
+                        page_num = int(match.group(1))
+                        now_ms = bytes_to_ms(self.position_bytes)
+                        self.karaoke_data.append({
+                            "index": i, "text": "", "start": now_ms, "end": now_ms,
+                            "is_image": False, "page_trigger": page_num
+                        })
+                except: pass
+                self.results.pop(i, None)
+                self.next_write_idx += 1
+                continue 
+
+            # 2. טיפול באודיו
+            if i in self.reused_spans:
+                start, end = self.reused_spans.pop(i)
+                pcm = self.previous_pcm.read_ms(start, end)
+            elif i in self.results:
+                pcm = self.results.pop(i).tobytes()
+            else:
+                break  # המשפט הבא עדיין לא מוכן
+
+            start_ms = bytes_to_ms(self.position_bytes)
+            end_ms = bytes_to_ms(self.position_bytes + len(pcm))
+            
+            # כאן הקסם: raw_text מכיל את ה-\n המקורי מהאדיטור
+            self.karaoke_data.append({
+                "index": i,
+                "text": raw_text, # <--- הטקסט המקורי עם ירידות השורה נשמר
+                "start": start_ms,
+                "end": end_ms,
+                "is_image": "[IMG:" in raw_text
+            })
+            self.spans[i] = [start_ms, end_ms]
+            
+            self.writer.write(pcm)
+            self.position_bytes += len(pcm)
+            
+            if "[IMG:" not in raw_text and raw_text.strip():
+                self.writer.write_silence(pause_duration)
+                self.position_bytes += pause_bytes
+            self.next_write_idx += 1
+
+    def build_sentence_list(self):
+        """מחלק את הטקסט (אחרי החלת המילון) לרשימת משפטים ותגיות"""
+        text_processed = self.enforce_dictionary(self.text)
+        # מסירים רק מקפים בעייתיים, אבל משאירים את \n
+        return [
+            seg.text.replace("-", " ").replace("–", " ").replace("•", "")
+            for seg in segment_text(text_processed)
+        ]
+
+    def load_failed_render_sentences(self):
+        """טוען את רשימת המשפטים מהמניפסט של הייצוא הקודם (למעבר תיקון)"""
+        manifest = load_manifest(self.output_path, self.render_fingerprint())
+        if not manifest:
+            return None
+        print(f"[DEBUG] Repair pass: {len(manifest.get('failed', []))} failed sentences to re-synthesize")
+        return manifest["sentences"]
+
+    def render_fingerprint(self):
+        """ההגדרות שמשפיעות על האודיו של כל משפט - שינוי בהן מחייב רינדור מלא"""
+        return {
+            "he_voice": self.he_voice, "en_voice": self.en_voice,
+            "rate": self.speed, "volume": self.volume, "dual_mode": self.dual_mode,
+            "pause_lang": self.settings.get("pause_lang", 80) if self.dual_mode else None,
+            "backend": self.backend.name,
+            "trim": [self.settings.get("trim_silence", True), self.settings.get("trim_silence_db", -50),
+                     self.settings.get("trim_padding_ms", 40)],
+        }
+
+    async def load_previous_render(self, final_sentences):
+        """
+        משווה את המשפטים הנוכחיים למניפסט של הייצוא הקודם לאותו קובץ.
+        מחזיר {אינדקס: (התחלה, סוף)} עבור משפטים שלא השתנו.
+        ה-MP3 הקודם מפוענח לקובץ PCM זמני שממנו קוראים את הקטעים בזמן הכתיבה.
+        """
+        self.previous_pcm = None
+        if not self.settings.get("incremental_export", True):
+            return {}
+        manifest = load_manifest(self.output_path, self.render_fingerprint())
+        if not manifest:
+            return {}
+
+        reuse_map = plan_reuse(manifest["sentences"], final_sentences)
+        old_spans = manifest.get("spans", [])
+        old_failed = set(manifest.get("failed", []))
+        wanted = {}
+        for new_idx, old_idx in reuse_map.items():
+            text = final_sentences[new_idx]
+            if "[PAGE:" in text or "[IMG:" in text or not text.strip(): continue
+            if old_idx in old_failed: continue # משפט שנכשל בפעם הקודמת - מסנתזים מחדש
+            if old_idx < len(old_spans) and old_spans[old_idx]:
+                wanted[new_idx] = tuple(old_spans[old_idx])
+        if not wanted:
+            return {}
+
+        # משפטים שהאודיו המקורי שלהם עדיין במטמון נלקחים משם (PCM בלי אובדן), ולא מה-MP3 הקודם -
+        # אחרת כל סבב עריכה מפענח ומקודד אותם מחדש והאיכות יורדת. ה-MP3 הקודם רק לשאר
+        from_cache = [i for i in wanted if self.in_audio_cache(final_sentences[i])]
+        for i in from_cache:
+            del wanted[i]
+        if from_cache:
+            print(f"[DEBUG] Incremental export: {len(from_cache)} unchanged sentences taken from the audio cache")
+            self.log(f"♻️ ייצוא מצטבר: {len(from_cache)} משפטים ללא שינוי נלקחים ממטמון האודיו")
+        if not wanted:
+            return {}
+
+        self.log(f"♻️ ייצוא מצטבר: {len(wanted)} משפטים ללא שינוי, מסנתז רק את השאר...")
+        pcm_path = self.output_path + ".prev.pcm"
+        try:
+            await self.loop.run_in_executor(None, decode_to_pcm_file, self.output_path, pcm_path)
+            self.previous_pcm = PcmFileReader(pcm_path)
+        except Exception as e:
+            print(f"[MANIFEST] Could not decode previous MP3: {e}")
+            return {}
+
+        print(f"[DEBUG] Incremental export: reusing {len(wanted)}/{len(final_sentences)} items")
+        return wanted
+
+    def in_audio_cache(self, sentence):
+        """האם כל האודיו של המשפט נמצא במטמון (אותם מפתחות כמו ב-synthesize_text / synthesize_runs)"""
+        if not self.audio_cache: return False
+        text = sentence.strip()
+        if not self.dual_mode:
+            keys = [AudioCache.make_key(text, self.he_voice, self.speed, self.volume, self.backend.name)]
+        else:
+            runs = split_language_runs(text)
+            voices = {"he": self.he_voice, "en": self.en_voice}
+            if len({lang for lang, _ in runs}) < 2:
+                lang = runs[0][0] if runs else "he"
+                keys = [AudioCache.make_key(text, voices[lang], self.speed, self.volume, self.backend.name)]
+            else:
+                keys = [AudioCache.make_key(run, voices[lang], self.speed, self.volume, self.backend.name + ":run")
+                        for lang, run in runs]
+        return all(self.audio_cache.contains(key) for key in keys)
+
+    def close_previous_render(self):
+        if self.previous_pcm:
+            self.previous_pcm.close()
+            self.previous_pcm = None
+
+    def schedule_retry(self, idx, sentence, error):
+        """
+        מחליט על ניסיון חוזר למשפט שנכשל.
+        מחזיר זמן המתנה בשניות (Backoff מעריכי עם Jitter), או None אם נגמר התקציב.
+        """
+        attempt = self.attempts.get(idx, 0) + 1
+        self.attempts[idx] = attempt
+        max_attempts = int(self.settings.get("tts_max_attempts", 4))
+        if attempt < max_attempts:
+            base = float(self.settings.get("tts_retry_base_delay", 1.0))
+            cap = float(self.settings.get("tts_retry_max_delay", 30.0))
+            ceiling = min(cap, base * (2 ** (attempt - 1)))
+            delay = ceiling / 2 + random.uniform(0, ceiling / 2)
+            print(f"[RETRY] Sentence {idx} attempt {attempt}/{max_attempts} failed ({error}). Retrying in {delay:.1f}s")
+            return delay
+
+        print(f"[DEAD LETTER] Sentence {idx} failed {attempt} times: {error}")
+        self.failed_indices.add(idx)
+        self.skipped_sentences.append((idx, sentence.strip()))
+        return None
+
+    async def worker_wrapper(self, idx, sentence):
+        self.processing_idxs.add(idx)
+        self.report_status()
+        try:
+            audio = await self.process_single_sentence(sentence, idx)
+            if len(audio) > 0:
+                return {'status': 'success', 'index': idx, 'audio': audio}
+            else:
+                raise ServerOverloadError("Empty audio")
+        except Exception as e:
+            # הלולאה הראשית מחליטה אם לנסות שוב או להעביר לרשימת הכישלונות
+            print(f"[ERROR] Worker failed on {idx}: {e}")
+            return {'status': 'error', 'index': idx, 'error': e}
+        finally:
+            if idx in self.processing_idxs: self.processing_idxs.remove(idx)
+
+    async def process_single_sentence(self, sentence, idx):
+        if "[IMG:" in sentence:
+            return silence(4000)
+            
+        try:
+             # שימוש בלוגיקה הקיימת (Dual Mode או רגיל)
+             if self.dual_mode:
+                 return await self.generate_natural_audio(sentence, idx)
+             else:
+                 return await self.synthesize_text(sentence, self.he_voice, idx)
+        except Exception as e: 
+            print(f"[RETRY NEEDED] {e}")
+            raise
+
+    async def synthesize_text(self, text, voice, idx):
+        """סינתזה של קטע טקסט אחד בקול נתון (דרך המטמון), מחזיר מערך חתוך"""
+        if self.audio_cache:
+            cache_key = AudioCache.make_key(text, voice, self.speed, self.volume, self.backend.name)
+            cached = await self.loop.run_in_executor(None, self.audio_cache.get, cache_key)
+            if cached and cached[1:] == (FRAME_RATE, SAMPLE_WIDTH, CHANNELS):
+                return self.smart_trim(pcm_from_bytes(cached[0]), idx)
+
+        fetched = await self.fetch_audio_internal(text, voice, idx)
+        if fetched:
+            audio_bytes, backend = fetched
+            cache_key = None
+            if self.audio_cache:
+                cache_key = AudioCache.make_key(text, voice, self.speed, self.volume, backend.name)
+            return await self.loop.run_in_executor(DECODER_POOL, self.bytes_to_audio, audio_bytes, idx, cache_key, backend.audio_format)
+        return silence(0)
+
+    async def fetch_audio_internal(self, text, voice, log_id, with_boundaries=False):
+        """
+        מסנתז טקסט דרך המנוע הפעיל. מחזיר (בתים, מנוע) - המנוע קובע את פורמט הבתים.
+        עם with_boundaries מחזיר (בתים, מנוע, גבולות מילים); רק למנועים עם supports_boundaries.
+        """
+        if not text or not text.strip(): return None
+        token = self.controller.start_request()
+        timeout = float(self.settings.get("tts_request_timeout", 60))
+        boundaries = None
+        try:
+            if with_boundaries:
+                data, boundaries = await asyncio.wait_for(
+                    self.backend.synthesize_with_boundaries(text, voice, self.speed, self.volume), timeout)
+            else:
+                data = await asyncio.wait_for(self.backend.synthesize(text, voice, self.speed, self.volume), timeout)
+            if not data:
+                raise ServerOverloadError("Empty audio stream")
+        except Exception as e:
+            error = self.classify_tts_error(e)
+            print(f"[{self.backend.name.upper()} ERROR] {log_id}: {type(error).__name__}: {error}")
+            self.on_request_failed(token, error)
+            # השירות לא נגיש - מעבר למנוע הגיבוי (אם הוגדר)
+            if isinstance(error, NetworkConnectionError) and self.fallback_backend:
+                print(f"[DEBUG] Falling back to {self.fallback_backend.name} for sentence {log_id}")
+                # במניפסט המשפט נרשם כנכשל: ייצוא מצטבר ומעבר תיקון יסנתזו אותו שוב במנוע הראשי
+                self.fallback_indices.add(log_id)
+                if with_boundaries and self.fallback_backend.supports_boundaries:
+                    data, boundaries = await self.fallback_backend.synthesize_with_boundaries(text, voice, self.speed, self.volume)
+                    if data: return data, self.fallback_backend, boundaries
+                elif not with_boundaries:
+                    data = await self.fallback_backend.synthesize(text, voice, self.speed, self.volume)
+                    if data: return data, self.fallback_backend
+            raise error from e
+        self.on_request_succeeded(token)
+        if with_boundaries:
+            return data, self.backend, boundaries
+        return data, self.backend
+
+    def classify_tts_error(self, e):
+        """ממפה חריגה לסוג השגיאה: עומס בשרת (מוריד מקביליות) או תקלת רשת מקומית"""
+        if isinstance(e, (ServerOverloadError, NetworkConnectionError)):
+            return e
+        if isinstance(e, asyncio.TimeoutError):
+            return ServerOverloadError("Request timed out")
+        if isinstance(e, edge_tts.exceptions.NoAudioReceived):
+            return ServerOverloadError("No audio received")
+        status = getattr(e, 'status', None)
+        if status in (429, 500, 502, 503, 504):
+            return ServerOverloadError(f"Server returned {status}")
+        if isinstance(e, OSError):
+            return NetworkConnectionError(str(e))
+        return e
+
+    def on_request_succeeded(self, token):
+        if self.controller.on_success(token):
+            print(f"[DEBUG] Concurrency raised to {self.controller.limit}")
+        self.sync_controller_state()
+
+    def on_request_failed(self, token, error):
+        congestion = isinstance(error, ServerOverloadError)
+        if self.controller.on_failure(token, congestion=congestion):
+            self.log(f"📉 עומס בשרת ({error}) - מוריד מקביליות ל-{self.controller.limit}")
+        self.sync_controller_state()
+
+    def sync_controller_state(self):
+        self.current_limit = self.controller.limit
+        self.consecutive_successes = self.controller.consecutive_successes
+        self.consecutive_errors = self.controller.consecutive_errors
+
+    def bytes_to_audio(self, audio_bytes, idx, cache_key=None, audio_format="mp3"):
+        """
+        ממיר את תשובת המנוע למערך int16 (מונו, 24kHz).
+        מנועי PCM לא צריכים פענוח בכלל; MP3 מפוענח בתוך התהליך (רץ במאגר המפענחים).
+        """
+        try:
+            samples = self.decode_samples(audio_bytes, audio_format)
+            # שומרים במטמון את האודיו המפוענח לפני החיתוך
+            if cache_key and self.audio_cache:
+                self.audio_cache.put(cache_key, samples.tobytes(), FRAME_RATE, SAMPLE_WIDTH, CHANNELS)
+            return self.smart_trim(samples, idx)
+        except Exception as e:
+            print(f"[DECODE ERROR] {idx}: {e}")
+            return silence(0)
+
+    @staticmethod
+    def decode_samples(audio_bytes, audio_format="mp3"):
+        if audio_format == "pcm":
+            return pcm_from_bytes(audio_bytes)
+        return decode_mp3(audio_bytes)
+
+    def smart_trim(self, samples, idx, limit=None):
+        """חיתוך השקט שה-TTS מוסיף בתחילת ובסוף כל משפט (ההפסקה בין משפטים נשלטת ע"י pause_sentence)"""
+        if not self.settings.get("trim_silence", True):
+            return samples
+        if limit is None:
+            limit = float(self.settings.get("trim_silence_db", -50))
+        padding = int(self.settings.get("trim_padding_ms", 40))
+        trimmed, removed = trim_silence(samples, threshold_db=limit, padding_ms=padding)
+        if removed:
+            with self._trim_lock:
+                self.trimmed_samples += removed
+        return trimmed
+
+    async def generate_natural_audio(self, sentence, idx):
+        """
+        מצב דו-לשוני: המשפט מפוצל לרצפי עברית ואנגלית.
+        כל הרצפים של אותה שפה נשלחים יחד בבקשה אחת (he_voice / en_voice),
+        שתי השפות במקביל, והאודיו נחתך חזרה לרצפים לפי גבולות המילים.
+        כך מספר הבקשות לא גדל עם מספר המעברים בין השפות (לכל היותר שתיים למשפט).
+        """
+        runs = split_language_runs(sentence)
+        voices = {"he": self.he_voice, "en": self.en_voice}
+        langs = {lang for lang, _ in runs}
+        if len(langs) < 2:
+            lang = runs[0][0] if runs else "he"
+            return await self.synthesize_text(sentence, voices[lang], idx)
+
+        by_lang = {}
+        for i, (lang, _) in enumerate(runs):
+            by_lang.setdefault(lang, []).append(i)
+        results = await asyncio.gather(*(
+            self.synthesize_runs([runs[i][1] for i in run_idxs], voices[lang], idx)
+            for lang, run_idxs in by_lang.items()
+        ))
+        pieces = [None] * len(runs)
+        for run_idxs, arrays in zip(by_lang.values(), results):
+            for i, arr in zip(run_idxs, arrays):
+                pieces[i] = arr
+
+        gap = silence(int(self.settings.get("pause_lang", 80)))
+        out = []
+        for i, piece in enumerate(pieces):
+            if len(piece) == 0: continue
+            if out: out.append(gap)
+            out.append(piece)
+        return np.concatenate(out) if out else silence(0)
+
+    async def synthesize_runs(self, texts, voice, idx):
+        """מסנתז כמה קטעים באותו קול בבקשה אחת. מחזיר מערך חתוך לכל קטע, לפי הסדר"""
+        pieces = [None] * len(texts)
+        keys = [None] * len(texts)
+        if self.audio_cache:
+            for i, text in enumerate(texts):
+                keys[i] = AudioCache.make_key(text, voice, self.speed, self.volume, self.backend.name + ":run")
+                cached = await self.loop.run_in_executor(None, self.audio_cache.get, keys[i])
+                if cached and cached[1:] == (FRAME_RATE, SAMPLE_WIDTH, CHANNELS):
+                    pieces[i] = self.smart_trim(pcm_from_bytes(cached[0]), idx)
+
+        missing = [i for i, p in enumerate(pieces) if p is None]
+        if not missing:
+            return pieces
+        if len(missing) == 1 or not self.backend.supports_boundaries:
+            return await self.synthesize_runs_separately(texts, pieces, missing, voice, idx)
+
+        joined, spans = join_runs([texts[i] for i in missing])
+        fetched = await self.fetch_audio_internal(joined, voice, idx, with_boundaries=True)
+        if not fetched:
+            return await self.synthesize_runs_separately(texts, pieces, missing, voice, idx)
+        data, backend, boundaries = fetched
+        samples = await self.loop.run_in_executor(DECODER_POOL, self.decode_samples, data, backend.audio_format)
+        cuts = find_run_cuts(joined, spans, boundaries or [])
+        if cuts is None:
+            print(f"[DUAL] Sentence {idx}: word boundaries missing, falling back to per-run requests")
+            return await self.synthesize_runs_separately(texts, pieces, missing, voice, idx)
+
+        edges = [0] + [int(ms * FRAME_RATE / 1000) * CHANNELS for ms in cuts] + [len(samples)]
+        for n, i in enumerate(missing):
+            part = samples[edges[n]:edges[n + 1]]
+            if keys[i] and backend is self.backend:
+                await self.loop.run_in_executor(None, self.audio_cache.put, keys[i], part.tobytes(), FRAME_RATE, SAMPLE_WIDTH, CHANNELS)
+            pieces[i] = self.smart_trim(part, idx)
+        return pieces
+
+    async def synthesize_runs_separately(self, texts, pieces, missing, voice, idx):
+        """גיבוי: בקשה נפרדת לכל קטע חסר"""
+        arrays = await asyncio.gather(*(self.synthesize_text(texts[i], voice, idx) for i in missing))
+        for i, arr in zip(missing, arrays):
+            pieces[i] = arr
+        return pieces
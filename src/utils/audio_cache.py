@@ -0,0 +1,126 @@
+import os
+import re
+import wave
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+
+# תיקיית ברירת מחדל למטמון - ליד קובץ ההגדרות של התוכנה
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_CACHE_DIR = os.path.join(PROJECT_DIR, "cache", "audio")
+
+
+def normalize_sentence(text):
+    """מנרמל משפט לצורך מפתח מטמון: NFC, איחוד רווחים והסרת רווחים בקצוות"""
+    if not text: return ""
+    text = unicodedata.normalize('NFC', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+class AudioCache:
+    """
+    מטמון אודיו קבוע על הדיסק, לפי תוכן (Content-Addressed).
+    המפתח הוא hash של (משפט מנורמל, קול, מהירות, עוצמה, מנוע).
+    נשמר אודיו מפוענח (PCM בתוך WAV) כדי לחסוך גם את הבקשה לשרת וגם את פענוח ה-MP3.
+    כשהגודל הכולל עובר את המגבלה - נמחקים הקבצים שלא נגעו בהם הכי הרבה זמן (LRU).
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=2 * 1024 ** 3):
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._index = OrderedDict()  # key -> size, לפי סדר שימוש (הישן ראשון)
+        self._total_bytes = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        """טוען את האינדקס מהדיסק, ממוין לפי זמן גישה אחרון"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".wav"): continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+                entries.append((st.st_mtime, name[:-4], st.st_size))
+            except OSError: pass
+        entries.sort()
+        for _, key, size in entries:
+            self._index[key] = size
+            self._total_bytes += size
+
+    @staticmethod
+    def make_key(text, voice, rate, volume, backend="edge-tts"):
+        raw = "\x1f".join([normalize_sentence(text), voice or "", rate or "", volume or "", backend or ""])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.wav")
+
+    def get(self, key):
+        """מחזיר (pcm_bytes, frame_rate, sample_width, channels) או None"""
+        with self._lock:
+            if key not in self._index:
+                self.misses += 1
+                return None
+            self._index.move_to_end(key)
+        path = self._path(key)
+        try:
+            with wave.open(path, 'rb') as wf:
+                params = (wf.getframerate(), wf.getsampwidth(), wf.getnchannels())
+                data = wf.readframes(wf.getnframes())
+            os.utime(path, None)  # עדכון זמן גישה עבור LRU בין הרצות
+        except (OSError, EOFError, wave.Error):
+            with self._lock:
+                self._total_bytes -= self._index.pop(key, 0)
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return (data, *params)
+
+    def contains(self, key):
+        """האם המפתח במטמון (בלי לקרוא את הקובץ ובלי לספור פגיעה/החמצה)"""
+        with self._lock:
+            return key in self._index
+
+    def put(self, key, pcm_bytes, frame_rate=24000, sample_width=2, channels=1):
+        """שומר PCM במטמון (כתיבה אטומית) ומפנה מקום אם צריך"""
+        if not pcm_bytes: return
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with wave.open(tmp_path, 'wb') as wf:
+                wf.setnchannels(channels)
+                wf.setsampwidth(sample_width)
+                wf.setframerate(frame_rate)
+                wf.writeframes(pcm_bytes)
+            os.replace(tmp_path, path)
+            size = os.path.getsize(path)
+        except OSError as e:
+            print(f"[CACHE ERROR] {e}")
+            try: os.remove(tmp_path)
+            except OSError: pass
+            return
+
+        with self._lock:
+            self._total_bytes -= self._index.pop(key, 0)
+            self._index[key] = size
+            self._total_bytes += size
+            victims = []
+            while self._total_bytes > self.max_bytes and len(self._index) > 1:
+                old_key, old_size = self._index.popitem(last=False)
+                self._total_bytes -= old_size
+                victims.append(old_key)
+
+        for old_key in victims:
+            try: os.remove(self._path(old_key))
+            except OSError: pass
+
+    def stats_message(self):
+        total = self.hits + self.misses
+        ratio = int(self.hits / total * 100) if total else 0
+        return f"💾 מטמון אודיו: {self.hits} פגיעות / {self.misses} החמצות ({ratio}%)"
@@ -0,0 +1,81 @@
+import os
+import io
+import subprocess
+import concurrent.futures
+import numpy as np
+from pydub import AudioSegment
+from src.utils.audio_stream import FRAME_RATE, CHANNELS
+
+# מפענחים בתוך התהליך (אופציונליים) - חוסכים הפעלת ffmpeg נפרד לכל משפט
+try:
+    import miniaudio
+except ImportError:
+    miniaudio = None
+
+try:
+    import av
+except ImportError:
+    av = None
+
+# מאגר משותף לפענוח: הספריות משחררות את ה-GIL בזמן הפענוח
+DECODER_POOL = concurrent.futures.ThreadPoolExecutor(
+    max_workers=max(2, os.cpu_count() or 2), thread_name_prefix="mp3-decoder"
+)
+
+
+def decoder_name():
+    if miniaudio: return "miniaudio"
+    if av: return "pyav"
+    return "ffmpeg-pipe"
+
+
+def silence(ms):
+    """מערך שקט באורך נתון (מילישניות) בפורמט הפנימי"""
+    return np.zeros(int(FRAME_RATE * ms / 1000) * CHANNELS, dtype=np.int16)
+
+
+def pcm_from_bytes(data):
+    """בתים של PCM (16 ביט) -> מערך int16, בלי העתקה"""
+    return np.frombuffer(data, dtype=np.int16)
+
+
+def duration_ms(samples):
+    return len(samples) * 1000 // (FRAME_RATE * CHANNELS)
+
+
+def _decode_miniaudio(data):
+    decoded = miniaudio.decode(
+        data, output_format=miniaudio.SampleFormat.SIGNED16, nchannels=CHANNELS, sample_rate=FRAME_RATE
+    )
+    return np.frombuffer(decoded.samples, dtype=np.int16).copy()
+
+
+def _decode_pyav(data):
+    resampler = av.AudioResampler(format='s16', layout='mono', rate=FRAME_RATE)
+    chunks = []
+    with av.open(io.BytesIO(data), format="mp3") as container:
+        for frame in container.decode(audio=0):
+            for out in resampler.resample(frame):
+                chunks.append(out.to_ndarray().reshape(-1))
+        for out in resampler.resample(None):
+            chunks.append(out.to_ndarray().reshape(-1))
+    if not chunks:
+        return np.zeros(0, dtype=np.int16)
+    return np.concatenate(chunks).astype(np.int16, copy=False)
+
+
+def _decode_ffmpeg_pipe(data):
+    # גיבוי: תהליך ffmpeg אחד דרך pipe (בלי קבצים זמניים ובלי ffprobe כמו ב-pydub)
+    cmd = [
+        AudioSegment.converter, "-loglevel", "error", "-f", "mp3", "-i", "pipe:0",
+        "-f", "s16le", "-ar", str(FRAME_RATE), "-ac", str(CHANNELS), "pipe:1",
+    ]
+    proc = subprocess.run(cmd, input=data, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+    return np.frombuffer(proc.stdout, dtype=np.int16)
+
+
+def decode_mp3(data):
+    """מפענח MP3 (בזיכרון) למערך int16 מונו ב-24kHz"""
+    if miniaudio: return _decode_miniaudio(data)
+    if av: return _decode_pyav(data)
+    return _decode_ffmpeg_pipe(data)
@@ -0,0 +1,110 @@
+import os
+import subprocess
+import concurrent.futures
+from collections import deque
+from pydub import AudioSegment
+
+# פורמט ה-PCM הפנימי של כל הצינור: 24kHz, מונו, 16 ביט
+FRAME_RATE = 24000
+SAMPLE_WIDTH = 2
+CHANNELS = 1
+
+
+def ms_to_bytes(ms):
+    """המרת משך (מילישניות) למספר בתים של PCM בפורמט הפנימי"""
+    return int(FRAME_RATE * ms / 1000) * SAMPLE_WIDTH * CHANNELS
+
+
+def bytes_to_ms(size):
+    """המרת מיקום/אורך ב-PCM (בתים) למילישניות, מעוגל למילישנייה הקרובה"""
+    return round(size * 1000 / (FRAME_RATE * SAMPLE_WIDTH * CHANNELS))
+
+
+class StreamingMp3Writer:
+    """
+    מקודד MP3 בזרימה: מקבל PCM לפי הסדר ומעביר אותו ל-ffmpeg דרך pipe.
+    הזיכרון לא תלוי באורך הספר - רק במה שממתין לכתיבה.
+    הכתיבה נעשית לקובץ זמני שמוחלף בקובץ הסופי רק בסיום מוצלח.
+    """
+
+    def __init__(self, output_path, bitrate="64k", max_pending_bytes=16 * 1024 * 1024):
+        self.output_path = output_path
+        self.tmp_path = output_path + ".part"
+        self.bytes_written = 0
+        # תור הכתיבה חסום: כש-ffmpeg מפגר ביותר מ-max_pending_bytes, write ממתין (Backpressure)
+        self.max_pending_bytes = max_pending_bytes
+        self._pending = deque()  # (future, גודל) לפי הסדר
+        self._pending_bytes = 0
+        # תהליכון יחיד שומר על סדר הכתיבה ולא חוסם את לולאת ה-asyncio
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        cmd = [
+            AudioSegment.converter, "-y", "-loglevel", "error",
+            "-f", "s16le", "-ar", str(FRAME_RATE), "-ac", str(CHANNELS), "-i", "pipe:0",
+            "-f", "mp3", "-b:a", bitrate, self.tmp_path,
+        ]
+        self._proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    def _write(self, data):
+        self._proc.stdin.write(data)
+
+    def write(self, pcm_bytes):
+        """מוסיף PCM לתור הכתיבה. חוסם רק כשהתור מלא, עד ש-ffmpeg מתפנה (שגיאת כתיבה נזרקת כאן)"""
+        if not pcm_bytes: return
+        self.bytes_written += len(pcm_bytes)
+        while self._pending and (self._pending[0][0].done() or self._pending_bytes >= self.max_pending_bytes):
+            future, size = self._pending.popleft()
+            self._pending_bytes -= size
+            future.result()
+        self._pending.append((self._executor.submit(self._write, pcm_bytes), len(pcm_bytes)))
+        self._pending_bytes += len(pcm_bytes)
+
+    def write_silence(self, ms):
+        self.write(b"\x00" * ms_to_bytes(ms))
+
+    def close(self):
+        """ממתין לסיום הקידוד ומעביר את הקובץ למקומו הסופי"""
+        self._executor.shutdown(wait=True)
+        while self._pending:
+            self._pending.popleft()[0].result()
+        self._pending_bytes = 0
+        self._proc.stdin.close()
+        err = self._proc.stderr.read()
+        if self._proc.wait() != 0:
+            raise RuntimeError(f"ffmpeg failed: {err.decode('utf-8', 'ignore').strip()}")
+        os.replace(self.tmp_path, self.output_path)
+
+    def abort(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        try: self._proc.kill()
+        except OSError: pass
+        try: os.remove(self.tmp_path)
+        except OSError: pass
+
+
+def decode_to_pcm_file(audio_path, pcm_path):
+    """מפענח קובץ אודיו שלם לקובץ PCM גולמי על הדיסק (בלי לטעון אותו לזיכרון)"""
+    cmd = [
+        AudioSegment.converter, "-y", "-loglevel", "error", "-i", audio_path,
+        "-f", "s16le", "-ar", str(FRAME_RATE), "-ac", str(CHANNELS), pcm_path,
+    ]
+    subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    return pcm_path
+
+
+class PcmFileReader:
+    """קריאת קטעים (לפי מילישניות) מתוך קובץ PCM גולמי"""
+
+    def __init__(self, pcm_path):
+        self.pcm_path = pcm_path
+        self._file = open(pcm_path, 'rb')
+
+    def read_ms(self, start_ms, end_ms):
+        start = ms_to_bytes(start_ms)
+        self._file.seek(start)
+        return self._file.read(max(0, ms_to_bytes(end_ms) - start))
+
+    def close(self, delete=True):
+        self._file.close()
+        if delete:
+            try: os.remove(self.pcm_path)
+            except OSError: pass
@@ -0,0 +1,169 @@
+import time
+from collections import deque
+
+
+class AIMDController:
+    """
+    בקר עומס AIMD (Additive Increase / Multiplicative Decrease) למספר הבקשות המקבילות.
+    - הצלחה: אחרי 'limit' הצלחות ברצף (סבב אחד) המגבלה עולה ב-1.
+    - עומס (חסימה, timeout, זרם ריק): המגבלה מוכפלת ב-decrease_factor.
+    כדי שגל של כישלונות מבקשות שכבר היו באוויר לא יחתוך שוב ושוב,
+    כל בקשה נושאת את ה-epoch שבו התחילה ורק כישלון מה-epoch הנוכחי מוריד את המגבלה.
+    """
+
+    def __init__(self, max_limit, min_limit=1, initial_limit=None, decrease_factor=0.5, latency_window=500):
+        self.max_limit = max(1, int(max_limit))
+        self.min_limit = max(1, min(int(min_limit), self.max_limit))
+        start = initial_limit if initial_limit is not None else self.max_limit
+        self.limit = max(self.min_limit, min(int(start), self.max_limit))
+        self.decrease_factor = decrease_factor
+        self.epoch = 0
+        self.consecutive_successes = 0
+        self.consecutive_errors = 0
+        self.total_successes = 0
+        self.total_failures = 0
+        self._successes_in_round = 0
+        self._latencies = deque(maxlen=latency_window)
+
+    def start_request(self):
+        """נקרא לפני בקשה. מחזיר אסימון שמועבר ל-on_success / on_failure"""
+        return (self.epoch, time.monotonic())
+
+    def on_success(self, token):
+        _, t0 = token
+        self._latencies.append(time.monotonic() - t0)
+        self.total_successes += 1
+        self.consecutive_successes += 1
+        self.consecutive_errors = 0
+        self._successes_in_round += 1
+        if self._successes_in_round >= self.limit and self.limit < self.max_limit:
+            self.limit += 1
+            self._successes_in_round = 0
+            return True
+        return False
+
+    def on_failure(self, token, congestion=True):
+        """
+        מדווח על כישלון. congestion=False עבור שגיאות שאינן עומס (למשל ניתוק רשת מקומי).
+        מחזיר True אם המגבלה ירדה.
+        """
+        epoch, _ = token
+        self.total_failures += 1
+        self.consecutive_errors += 1
+        self.consecutive_successes = 0
+        if not congestion or epoch != self.epoch:
+            return False
+        new_limit = max(self.min_limit, int(self.limit * self.decrease_factor))
+        self.epoch += 1
+        self._successes_in_round = 0
+        if new_limit == self.limit:
+            return False
+        self.limit = new_limit
+        return True
+
+    def latency_percentiles(self, percentiles=(50, 90, 99)):
+        """אחוזוני זמן תגובה (בשניות) מתוך החלון האחרון"""
+        if not self._latencies: return {}
+        data = sorted(self._latencies)
+        last = len(data) - 1
+        return {p: data[min(last, int(round(p / 100 * last)))] for p in percentiles}
+
+    def summary(self):
+        pct = self.latency_percentiles()
+        lat = " | ".join(f"p{p}={v:.2f}s" for p, v in pct.items()) if pct else "אין נתונים"
+        return f"מקביליות: {self.limit}/{self.max_limit} | {lat}"
+
+
+class TokenBucket:
+    """
+    מגביל קצב (Token Bucket): עד rate בקשות לשנייה, עם פרץ של עד capacity בקשות.
+    reserve() שומר אסימון ומחזיר כמה שניות לחכות לפני השליחה (האסימונים יכולים "להילקח מראש",
+    כך שמחכים בסדר ההגעה בלי לולאות המתנה). hold() עוצר הכל לזמן נתון (למשל לפי Retry-After).
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._hold_until = 0.0
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self):
+        now = time.monotonic()
+        self._refill(now)
+        self.tokens -= 1
+        wait = 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+        return max(wait, self._hold_until - now)
+
+    def hold(self, seconds):
+        self._hold_until = max(self._hold_until, time.monotonic() + seconds)
+
+
+class CircuitBreaker:
+    """
+    מפסק זרם לשירות חיצוני:
+    - סגור: הבקשות עוברות. אחרי failure_threshold כישלונות ברצף - נפתח.
+    - פתוח: אף בקשה לא נשלחת עד שעובר זמן הצינון.
+    - חצי-פתוח: בקשת בדיקה אחת עוברת; הצלחה סוגרת, כישלון פותח שוב עם צינון כפול (עד max_cooldown).
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold=5, cooldown=5.0, max_cooldown=60.0):
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.failures = 0
+        self.trips = 0
+        self._opened_at = 0.0
+        self._open_since = None  # מתי נפתח לראשונה מאז שהיה סגור
+        self._probe_started = 0.0
+
+    def wait_time(self):
+        """0 אם אפשר לשלוח עכשיו, אחרת כמה שניות לחכות לפני שבודקים שוב"""
+        if self.state == self.CLOSED:
+            return 0.0
+        now = time.monotonic()
+        if self.state == self.OPEN:
+            remaining = self._opened_at + self.cooldown - now
+            if remaining > 0:
+                return remaining
+            self.state = self.HALF_OPEN
+            self._probe_started = now
+            return 0.0
+        # חצי-פתוח: בקשת בדיקה אחת כבר בדרך (אם היא נתקעה - אחרי זמן צינון מותרת בדיקה נוספת)
+        if now - self._probe_started > self.cooldown:
+            self._probe_started = now
+            return 0.0
+        return min(1.0, self.cooldown)
+
+    def open_for(self):
+        """כמה שניות השירות לא זמין ברצף (0 אם המפסק סגור)"""
+        return time.monotonic() - self._open_since if self._open_since is not None else 0.0
+
+    def on_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self.cooldown = self.base_cooldown
+        self._open_since = None
+
+    def on_failure(self):
+        """מחזיר True אם המפסק נפתח עכשיו"""
+        self.failures += 1
+        if self.state == self.HALF_OPEN:
+            self.cooldown = min(self.max_cooldown, self.cooldown * 2)
+        elif self.state == self.OPEN or self.failures < self.failure_threshold:
+            return False
+        self.state = self.OPEN
+        self.trips += 1
+        self._opened_at = time.monotonic()
+        if self._open_since is None:
+            self._open_since = self._opened_at
+        return True
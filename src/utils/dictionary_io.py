@@ -0,0 +1,229 @@
+import os
+import csv
+import json
+import unicodedata
+from datetime import datetime
+from src.utils.dictionary_matcher import MATCH_TYPES, PARTIAL
+
+FIELDS = ("key", "vocalized", "match_type", "date")
+FORMATS = ("csv", "tsv", "jsonl")
+
+# אותם כללים כמו בניקוי בעלייה (run_startup_sanitization)
+BLACKLIST_KEYS = {",", ".", "-", "'", '"', ";", ":"}
+ERROR_MARKERS = ("(שגיאה)", "(שגאולִיטֶריא)")
+
+
+def sanitization_reason(key, value):
+    """מחזיר את הסיבה שהרשומה לא תקינה, או None אם היא תקינה"""
+    key_str = str(key).strip()
+    val_str = str(value).strip()
+    if key_str in BLACKLIST_KEYS:
+        return "blacklisted key"
+    if any(m in key_str for m in ERROR_MARKERS):
+        return "error marker in key"
+    if any(m in val_str for m in ERROR_MARKERS):
+        return "error marker in value"
+    if not any(c.isalnum() for c in key_str):
+        return "key has no letters"
+    return None
+
+
+def clean_key(text):
+    """מפתח נקי: בלי ניקוד ובלי פיסוק (כמו clean_nikud_from_string בחלון הראשי)"""
+    if not text: return ""
+    normalized = unicodedata.normalize('NFD', text)
+    clean_chars = [c for c in normalized if not unicodedata.combining(c) and (c.isalnum() or c.isspace())]
+    return unicodedata.normalize('NFC', "".join(clean_chars)).strip()
+
+
+def detect_format(path):
+    ext = os.path.splitext(path)[1].lower().lstrip(".")
+    if ext in ("tsv", "tab"): return "tsv"
+    if ext in ("jsonl", "ndjson"): return "jsonl"
+    return "csv"
+
+
+# --- קריאה (סטרימינג) ---
+def read_entries(path, fmt=None):
+    """
+    קורא קובץ מילון שורה אחר שורה ומחזיר (מספר שורה, מפתח, ניקוד, סוג התאמה, תאריך).
+    CSV/TSV: עמודות key, vocalized, match_type, date (שורת כותרת אופציונלית, רק שתי הראשונות חובה).
+    JSONL: אובייקט לכל שורה עם אותם שדות.
+    """
+    fmt = fmt or detect_format(path)
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        if fmt == "jsonl":
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line: continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    yield line_no, None, None, None, None
+                    continue
+                if not isinstance(row, dict):
+                    yield line_no, None, None, None, None
+                    continue
+                yield line_no, row.get("key"), row.get("vocalized"), row.get("match_type"), row.get("date")
+        else:
+            reader = csv.reader(f, delimiter="\t" if fmt == "tsv" else ",")
+            for row in reader:
+                line_no = reader.line_num
+                if not row or not any(cell.strip() for cell in row): continue
+                if line_no == 1 and row[0].strip().lower() == FIELDS[0]: continue  # כותרת
+                row = row + [None] * (len(FIELDS) - len(row))
+                yield line_no, row[0], row[1], row[2], row[3]
+
+
+# --- כתיבה (סטרימינג) ---
+def write_entries(path, dictionary, metadata=None, fmt=None):
+    """כותב את המילון (ממוין לפי מפתח) לקובץ. מחזיר את מספר הרשומות"""
+    fmt = fmt or detect_format(path)
+    metadata = metadata or {}
+    count = 0
+    # utf-8-sig כדי שאקסל יזהה עברית בקובצי CSV
+    encoding = 'utf-8' if fmt == "jsonl" else 'utf-8-sig'
+    with open(path, 'w', encoding=encoding, newline='') as f:
+        if fmt == "jsonl":
+            for key in sorted(dictionary):
+                data = metadata.get(key) or {}
+                f.write(json.dumps({"key": key, "vocalized": dictionary[key],
+                                    "match_type": data.get("match_type", PARTIAL),
+                                    "date": data.get("date", "")}, ensure_ascii=False))
+                f.write("\n")
+                count += 1
+        else:
+            writer = csv.writer(f, delimiter="\t" if fmt == "tsv" else ",")
+            writer.writerow(FIELDS)
+            for key in sorted(dictionary):
+                data = metadata.get(key) or {}
+                writer.writerow((key, dictionary[key], data.get("match_type", PARTIAL), data.get("date", "")))
+                count += 1
+    return count
+
+
+class ImportReport:
+    """תוצאות ייבוא: מונים, רשומות שנפסלו וקונפליקטים (אותו מפתח, ניקוד שונה)"""
+
+    def __init__(self):
+        self.added = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.invalid = []     # (שורה, מפתח, סיבה)
+        self.conflicts = []   # (שורה, מפתח, ניקוד קיים, ניקוד מהקובץ, מה נשמר)
+
+    def summary(self):
+        return (f"נוספו {self.added}, עודכנו {self.updated}, ללא שינוי {self.unchanged}, "
+                f"נפסלו {len(self.invalid)}, קונפליקטים {len(self.conflicts)}")
+
+    def write_conflicts(self, path):
+        with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(("line", "key", "existing", "incoming", "kept"))
+            writer.writerows(self.conflicts)
+        return path
+
+
+def import_entries(settings, entries, store=None, on_conflict="keep"):
+    """
+    מחיל רשומות (מ-read_entries) על nikud_dictionary + nikud_metadata שב-settings.
+    on_conflict: "keep" - הניקוד הקיים נשאר, "replace" - הניקוד מהקובץ גובר. בשני המקרים הקונפליקט מדווח.
+    הכל נכתב בטרנזקציה אחת (DictionaryStore.bulk_update), ונכשל כיחידה אחת.
+    """
+    dictionary = settings.setdefault("nikud_dictionary", {})
+    metadata = settings.setdefault("nikud_metadata", {})
+    report = ImportReport()
+    today = datetime.now().strftime("%d/%m/%Y")
+    new_values = {}
+    new_meta = {}
+
+    for line_no, key, vocalized, match_type, date in entries:
+        vocalized = str(vocalized).strip() if vocalized is not None else ""
+        raw_key = str(key).strip() if key is not None else ""
+        if not vocalized:
+            report.invalid.append((line_no, raw_key, "missing vocalization"))
+            continue
+        # הבדיקה על המפתח כפי שנכתב בקובץ (לפני הסרת הפיסוק, כדי לתפוס "(שגיאה)")
+        reason = sanitization_reason(raw_key or vocalized, vocalized)
+        if reason:
+            report.invalid.append((line_no, raw_key, reason))
+            continue
+        key = clean_key(raw_key) or clean_key(vocalized)
+        if not key:
+            report.invalid.append((line_no, raw_key, "empty key"))
+            continue
+        match_type = str(match_type).strip().lower() if match_type else PARTIAL
+        if match_type not in MATCH_TYPES:
+            report.invalid.append((line_no, key, f"unknown match type '{match_type}'"))
+            continue
+
+        current = new_values.get(key, dictionary.get(key))
+        if current is not None and current != vocalized:
+            kept = vocalized if on_conflict == "replace" else current
+            report.conflicts.append((line_no, key, current, vocalized, kept))
+            if on_conflict != "replace":
+                continue
+
+        old_meta = metadata.get(key) or {}
+        meta = {"date": str(date).strip() if date else old_meta.get("date", today), "match_type": match_type}
+        if key not in dictionary:
+            if key not in new_values: report.added += 1
+        elif dictionary[key] == vocalized and old_meta.get("match_type", PARTIAL) == match_type:
+            report.unchanged += 1
+            continue
+        elif key not in new_values:
+            report.updated += 1
+        new_values[key] = vocalized
+        new_meta[key] = meta
+
+    if new_values:
+        if store is not None:
+            store.bulk_update(new_values, new_meta)
+        else:
+            dictionary.update(new_values)
+            metadata.update(new_meta)
+    print(f"[DEBUG] Dictionary import: {report.summary()}")
+    return report
+
+
+def import_file(settings, path, store=None, on_conflict="keep", fmt=None):
+    return import_entries(settings, read_entries(path, fmt), store=store, on_conflict=on_conflict)
+
+
+def main(argv=None):
+    import argparse
+    from src.utils.dictionary_store import DictionaryStore
+
+    parser = argparse.ArgumentParser(description="Bulk import/export of the personal nikud dictionary")
+    parser.add_argument("action", choices=("import", "export"))
+    parser.add_argument("path", help="קובץ CSV / TSV / JSONL")
+    parser.add_argument("--db", default="dictionary.db", help="מסד המילון (dictionary.db)")
+    parser.add_argument("--format", choices=FORMATS, help="ברירת מחדל: לפי סיומת הקובץ")
+    parser.add_argument("--replace", action="store_true", help="בקונפליקט - הניקוד מהקובץ גובר")
+    parser.add_argument("--report", help="קובץ CSV לדוח הקונפליקטים")
+    args = parser.parse_args(argv)
+
+    store = DictionaryStore(args.db)
+    settings = {}
+    store.attach(settings)
+    try:
+        if args.action == "export":
+            count = write_entries(args.path, store.dictionary, store.metadata, args.format)
+            print(f"Exported {count} entries to {args.path}")
+            return 0
+        report = import_file(settings, args.path, store=store,
+                             on_conflict="replace" if args.replace else "keep", fmt=args.format)
+        print(report.summary())
+        for line_no, key, reason in report.invalid[:20]:
+            print(f"  line {line_no}: '{key}' - {reason}")
+        if report.conflicts:
+            report_path = args.report or os.path.splitext(args.path)[0] + ".conflicts.csv"
+            report.write_conflicts(report_path)
+            print(f"Conflict report: {report_path}")
+        return 0
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,210 @@
+import threading
+from collections import deque, namedtuple, OrderedDict
+from src.utils.skeleton import SkeletonIndex, strip_nikud, HEBREW_PUNCTUATION
+
+PARTIAL = "partial"
+EXACT = "exact"
+PREFIX = "prefix"
+MATCH_TYPES = (PARTIAL, EXACT, PREFIX)
+
+# אותיות השימוש (משה וכלב) שיכולות להצטבר לפני מילה, למשל "וכשב"
+PREFIX_LETTERS = frozenset("משהוכלב")
+MAX_PREFIX_LETTERS = 5
+
+
+def is_word_char(ch):
+    """כמו [\\w\\u0590-\\u05FF] בביטויים הקודמים, חוץ ממקף/פסק/סוף פסוק שהם גבול מילה"""
+    return ch.isalnum() or ch == "_" or ('\u0590' <= ch <= '\u05FF' and ch not in HEBREW_PUNCTUATION)
+
+
+class DictionaryMatcher:
+    """
+    מנוע החלפות מילון מבוסס Aho-Corasick.
+    נבנה פעם אחת מהמילון (מפתח -> ערך) ומהמטא-דאטה (סוג התאמה לכל מפתח),
+    ומבצע מעבר יחיד משמאל לימין על הטקסט, בלי תלות במספר המפתחות.
+
+    - התאמה הכי שמאלית ובתוכה הכי ארוכה (מילה ארוכה גוברת על חלק ממנה).
+    - "exact": רק מילה שלמה (אין אות/ספרה צמודה לפני או אחרי).
+    - "partial": בכל מקום בטקסט.
+    - "prefix": מילה שלמה, עם או בלי תחיליות (ו/ה/ב/ל/כ/ש/מ, גם מצטברות).
+      רק המילה עצמה מוחלפת - התחילית נשארת עם הניקוד המקורי שלה.
+    - ניקוד בטקסט לא משפיע על ההתאמה: הסריקה רצה על שלד הטקסט (SkeletonIndex)
+      וההתאמות ממופות חזרה לטקסט המקורי, כולל הניקוד הישן של המילה שמוחלפת.
+    """
+
+    def __init__(self, dictionary, metadata=None):
+        metadata = metadata or {}
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [-1]      # מזהה המפתח שמסתיים במצב (או -1)
+        self.dict_link = [0]    # המצב הבא בשרשרת הכישלון שיש בו פלט
+        self.entries = []       # (אורך, ערך, סוג התאמה, מפתח מקורי)
+
+        for key, target in dictionary.items():
+            letters = strip_nikud(key)
+            if not letters: continue
+            match_type = (metadata.get(key) or {}).get("match_type", PARTIAL)
+            self._add(letters, (len(letters), target, match_type, key))
+        self._build_links()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _add(self, letters, entry):
+        state = 0
+        for ch in letters:
+            nxt = self.goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(-1)
+                self.dict_link.append(0)
+            state = nxt
+        if self.output[state] == -1:
+            self.output[state] = len(self.entries)
+            self.entries.append(entry)
+        else:
+            # אותו מפתח אחרי הסרת ניקוד - האחרון גובר (כמו במילון)
+            self.entries[self.output[state]] = entry
+
+    def _build_links(self):
+        queue = deque()
+        for nxt in self.goto[0].values():
+            queue.append(nxt)
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                target = self.goto[f].get(ch, 0)
+                self.fail[nxt] = target if target != nxt else 0
+                self.dict_link[nxt] = self.fail[nxt] if self.output[self.fail[nxt]] != -1 else self.dict_link[self.fail[nxt]]
+
+    def find(self, text, index=None):
+        """
+        מחזיר רשימת התאמות שלא חופפות: [(התחלה, סוף, מזהה), ...] לפי הסדר,
+        במיקומים של הטקסט המקורי. ניתן להעביר SkeletonIndex מוכן של הטקסט.
+        """
+        if not self.entries or not text:
+            return []
+        if index is None:
+            index = SkeletonIndex(text)
+        skeleton = index.skeleton
+        goto, fail, output, dict_link, entries = self.goto, self.fail, self.output, self.dict_link, self.entries
+        n = len(skeleton)
+        best = {}        # התחלה בשלד -> (סוף, מזהה, התחלת ההחלפה) - ההתאמה הארוכה ביותר
+        state = 0
+
+        for i, ch in enumerate(skeleton):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+
+            hit = state if output[state] != -1 else dict_link[state]
+            while hit:
+                entry_id = output[hit]
+                match_type = entries[entry_id][2]
+                end = i + 1
+                start = word_start = end - entries[entry_id][0]
+                if match_type == PARTIAL:
+                    valid = True
+                else:
+                    valid = end == n or not is_word_char(skeleton[end])
+                    if valid and match_type == PREFIX:
+                        # מדלגים אחורה על אותיות שימוש עד תחילת המילה
+                        floor = max(0, start - MAX_PREFIX_LETTERS)
+                        while word_start > floor and skeleton[word_start - 1] in PREFIX_LETTERS:
+                            word_start -= 1
+                    valid = valid and (word_start == 0 or not is_word_char(skeleton[word_start - 1]))
+                if valid:
+                    # ההתאמה "תופסת" מתחילת המילה (כולל תחיליות), אבל מחליפה רק מ-start
+                    prev = best.get(word_start)
+                    if prev is None or prev[0] < end:
+                        best[word_start] = (end, entry_id, start)
+                hit = dict_link[hit]
+
+        matches = []
+        taken_until = 0
+        for word_start in sorted(best):
+            if word_start < taken_until: continue
+            end, entry_id, start = best[word_start]
+            src_start, src_end = index.source_span(start, end)
+            matches.append((src_start, src_end, entry_id))
+            taken_until = end
+        return matches
+
+    def replace(self, text, index=None):
+        """מחיל את המילון על הטקסט. מחזיר (טקסט חדש, מספר החלפות)"""
+        matches = self.find(text, index)
+        if not matches:
+            return text, 0
+        out = []
+        last = 0
+        for start, end, entry_id in matches:
+            out.append(text[last:start])
+            out.append(self.entries[entry_id][1])
+            last = end
+        out.append(text[last:])
+        return "".join(out), len(matches)
+
+
+_cache = OrderedDict()  # (id מילון, id מטא-דאטה) -> _CacheEntry, הישן ראשון
+_cache_lock = threading.Lock()
+_CACHE_SIZE = 4
+
+_CacheEntry = namedtuple("_CacheEntry", ["dictionary", "metadata", "versions", "snapshot", "matcher"])
+
+
+def _versions(dictionary, metadata):
+    """מוני הגרסה (VersionedDict); None אם אחד מהם dict רגיל בלי מונה"""
+    versions = (getattr(dictionary, "version", None), 0 if metadata is None else getattr(metadata, "version", None))
+    return None if None in versions else versions
+
+
+def _snapshot(dictionary, metadata):
+    """עותק של מילון רגיל (בלי מונה גרסה), להשוואה מדויקת בפגיעה הבאה"""
+    return dict(dictionary), {k: dict(v) if isinstance(v, dict) else v for k, v in (metadata or {}).items()}
+
+
+def get_matcher(dictionary, metadata=None):
+    """
+    מחזיר מנוע משותף למילון הנתון. נבנה מחדש רק כשתוכן המילון (או סוגי ההתאמה) השתנה.
+    המטמון לפי זהות האובייקטים: למילון עם מונה גרסה (VersionedDict, PersistentDict של המסד) הבדיקה
+    היא השוואת הגרסה בלבד; מילון רגיל מושווה (ב-C) לעותק שנשמר כשהמנוע נבנה.
+    נשמרים כמה מנועים אחרונים (למשל המילון הגלובלי + מילון זמני של חלון הניתוח).
+    """
+    if not metadata:
+        metadata = None # מטא-דאטה ריק (לרוב {} חדש בכל קריאה) לא משנה את המנוע
+    key = (id(dictionary), id(metadata))
+    versions = _versions(dictionary, metadata)
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None and entry.dictionary is dictionary and entry.metadata is metadata:
+            if versions is not None:
+                fresh = entry.versions == versions
+            else:
+                fresh = entry.snapshot == (dictionary, metadata or {})
+            if fresh:
+                _cache.move_to_end(key)
+                return entry.matcher
+
+    snapshot = None if versions is not None else _snapshot(dictionary, metadata)
+    matcher = DictionaryMatcher(dictionary, metadata)
+    with _cache_lock:
+        _cache.pop(key, None)
+        while len(_cache) >= _CACHE_SIZE:
+            _cache.popitem(last=False)
+        _cache[key] = _CacheEntry(dictionary, metadata, versions, snapshot, matcher)
+    print(f"[DEBUG] Dictionary matcher built: {len(matcher)} entries, {len(matcher.goto)} states")
+    return matcher
+
+
+def apply_dictionary(text, dictionary, metadata=None):
+    """קיצור: החלת מילון על טקסט דרך המנוע המשותף. מחזיר (טקסט, מספר החלפות)"""
+    if not dictionary or not text:
+        return text, 0
+    return get_matcher(dictionary, metadata).replace(text)
@@ -0,0 +1,278 @@
+import json
+import sqlite3
+import threading
+
+# מפתחות ב-settings שנשמרים ב-SQLite ולא ב-config.json
+STORE_KEYS = ("nikud_dictionary", "nikud_metadata", "nikud_errors")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dictionary (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS metadata (key TEXT PRIMARY KEY, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS errors (id INTEGER PRIMARY KEY AUTOINCREMENT, word TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS errors_word ON errors(word);
+CREATE TABLE IF NOT EXISTS store_info (name TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+class DictionaryStore:
+    """
+    אחסון המילון האישי, המטא-דאטה ורשימת הטעויות ב-SQLite (מצב WAL).
+    כל עריכה היא עדכון של שורה אחת (upsert/delete) במקום כתיבה מחדש של כל config.json.
+    הנתונים נטענים פעם אחת לזיכרון כמילונים רגילים (קריאה מהירה), והכתיבה עוברת דרכם.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._closed = False
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+        self.dictionary = PersistentDict(self, "dictionary", "value", self._load("dictionary", "value"))
+        self.metadata = PersistentDict(self, "metadata", "data", self._load("metadata", "data", json.loads),
+                                       encode=lambda v: json.dumps(v, ensure_ascii=False))
+        rows = self._conn.execute("SELECT word FROM errors ORDER BY id").fetchall()
+        self.errors = PersistentList(self, [r[0] for r in rows])
+
+    def _load(self, table, column, decode=None):
+        rows = self._conn.execute(f"SELECT key, {column} FROM {table}").fetchall()
+        if decode:
+            return {k: decode(v) for k, v in rows}
+        return dict(rows)
+
+    def execute(self, sql, params=()):
+        with self._lock:
+            if self._closed:
+                print(f"[DICTIONARY STORE] Ignoring write after close: {sql.split(None, 1)[0]}")
+                return None
+            return self._conn.execute(sql, params)
+
+    def executemany(self, statements):
+        """כמה פקודות בטרנזקציה אחת: [(sql, params), ...]"""
+        with self._lock:
+            if self._closed:
+                print(f"[DICTIONARY STORE] Ignoring {len(statements)} writes after close")
+                return
+            self._conn.execute("BEGIN")
+            try:
+                for sql, params in statements:
+                    self._conn.execute(sql, params)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def bulk_update(self, dictionary, metadata=None):
+        """
+        עדכון של הרבה מילים (ייבוא) בטרנזקציה אחת, עם executemany של sqlite עצמו.
+        הזיכרון מתעדכן רק אחרי שהטרנזקציה הצליחה.
+        """
+        metadata = metadata or {}
+        with self._lock:
+            if self._closed:
+                print(f"[DICTIONARY STORE] Ignoring bulk update of {len(dictionary)} entries after close")
+                return
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(self.dictionary._upsert, ((k, str(v)) for k, v in dictionary.items()))
+                self._conn.executemany(self.metadata._upsert,
+                                       ((k, json.dumps(v, ensure_ascii=False)) for k, v in metadata.items()))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        dict.update(self.dictionary, dictionary)
+        dict.update(self.metadata, metadata)
+        self.dictionary.version += 1
+        self.metadata.version += 1
+
+    # --- הגירה חד-פעמית מ-config.json ---
+    def is_migrated(self):
+        row = self.execute("SELECT value FROM store_info WHERE name='migrated_from_json'").fetchone()
+        return row is not None
+
+    def migrate_from_settings(self, settings):
+        """
+        מעביר את המילון, המטא-דאטה והטעויות מ-settings (שנטען מה-JSON) למסד, פעם אחת בלבד.
+        מחזיר True אם בוצעה הגירה.
+        """
+        if self.is_migrated():
+            return False
+        dictionary = settings.get("nikud_dictionary") or {}
+        metadata = settings.get("nikud_metadata") or {}
+        errors = settings.get("nikud_errors") or []
+        statements = [("INSERT OR REPLACE INTO dictionary(key, value) VALUES (?, ?)", (str(k), str(v)))
+                      for k, v in dictionary.items()]
+        statements += [("INSERT OR REPLACE INTO metadata(key, data) VALUES (?, ?)",
+                        (str(k), json.dumps(v, ensure_ascii=False))) for k, v in metadata.items()]
+        statements += [("INSERT INTO errors(word) VALUES (?)", (str(w),)) for w in errors if w]
+        statements.append(("INSERT OR REPLACE INTO store_info(name, value) VALUES ('migrated_from_json', '1')", ()))
+        self.executemany(statements)
+
+        dict.update(self.dictionary, {str(k): str(v) for k, v in dictionary.items()})
+        dict.update(self.metadata, {str(k): v for k, v in metadata.items()})
+        self.dictionary.version += 1
+        self.metadata.version += 1
+        list.extend(self.errors, [str(w) for w in errors if w])
+        print(f"[DEBUG] Migrated {len(dictionary)} dictionary entries and {len(errors)} errors to {self.path}")
+        return True
+
+    def attach(self, settings):
+        """מחליף את המפתחות הרלוונטיים ב-settings באובייקטים שכותבים ישירות למסד"""
+        settings["nikud_dictionary"] = self.dictionary
+        settings["nikud_metadata"] = self.metadata
+        settings["nikud_errors"] = self.errors
+
+    def close(self):
+        """סוגר את המסד. כתיבה אחרי הסגירה (תהליכון רקע שעוד רץ ביציאה) לא עושה כלום"""
+        with self._lock:
+            self._closed = True
+            try: self._conn.close()
+            except sqlite3.Error: pass
+
+
+class VersionedDict(dict):
+    """
+    dict עם מונה גרסה שעולה בכל שינוי. מנוע המילון המשותף (get_matcher) בודק רק את הגרסה,
+    בלי לעבור על כל הרשומות בכל קריאה. שינוי בתוך ערך מקונן (metadata[k]["match_type"]) לא נספר -
+    מחליפים את הערך כולו.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.version = 0
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.version += 1
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.version += 1
+
+    def pop(self, key, *default):
+        value = super().pop(key, *default)
+        self.version += 1
+        return value
+
+    def popitem(self):
+        item = super().popitem()
+        self.version += 1
+        return item
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self.version += 1
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def clear(self):
+        super().clear()
+        self.version += 1
+
+    def __reduce__(self):
+        # העתקה/סריאליזציה מחזירה dict רגיל (בלי חיבור למסד ובלי מונה)
+        return (dict, (dict(self),))
+
+
+class PersistentDict(VersionedDict):
+    """dict שכל שינוי בו נכתב מיד כשורה בודדת בטבלה"""
+
+    def __init__(self, store, table, column, data=None, encode=None):
+        super().__init__(data or {})
+        self._store = store
+        self._encode = encode or str
+        self._upsert = f"INSERT INTO {table}(key, {column}) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET {column}=excluded.{column}"
+        self._delete = f"DELETE FROM {table} WHERE key=?"
+        self._clear = f"DELETE FROM {table}"
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._store.execute(self._upsert, (key, self._encode(value)))
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._store.execute(self._delete, (key,))
+
+    def pop(self, key, *default):
+        existed = key in self
+        value = super().pop(key, *default)
+        if existed:
+            self._store.execute(self._delete, (key,))
+        return value
+
+    def popitem(self):
+        key, value = super().popitem()
+        self._store.execute(self._delete, (key,))
+        return key, value
+
+    def update(self, *args, **kwargs):
+        items = dict(*args, **kwargs)
+        super().update(items)
+        self._store.executemany([(self._upsert, (k, self._encode(v))) for k, v in items.items()])
+
+    def clear(self):
+        super().clear()
+        self._store.execute(self._clear)
+
+
+class PersistentList(list):
+    """רשימת הטעויות: הוספה והסרה הן פקודה אחת; שינויים אחרים כותבים את הרשימה מחדש"""
+
+    def __init__(self, store, data=None):
+        super().__init__(data or [])
+        self._store = store
+
+    def append(self, word):
+        super().append(word)
+        self._store.execute("INSERT INTO errors(word) VALUES (?)", (word,))
+
+    def remove(self, word):
+        super().remove(word)
+        self._store.execute("DELETE FROM errors WHERE id = (SELECT MIN(id) FROM errors WHERE word=?)", (word,))
+
+    def _rewrite(self):
+        statements = [("DELETE FROM errors", ())]
+        statements += [("INSERT INTO errors(word) VALUES (?)", (w,)) for w in self]
+        self._store.executemany(statements)
+
+    def replace(self, words):
+        list.__setitem__(self, slice(None), list(words))
+        self._rewrite()
+
+    def extend(self, words):
+        super().extend(words)
+        self._rewrite()
+
+    def insert(self, index, word):
+        super().insert(index, word)
+        self._rewrite()
+
+    def pop(self, index=-1):
+        word = super().pop(index)
+        self._rewrite()
+        return word
+
+    def clear(self):
+        super().clear()
+        self._rewrite()
+
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        self._rewrite()
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self._rewrite()
+
+    def __reduce__(self):
+        return (list, (list(self),))
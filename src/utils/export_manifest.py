@@ -0,0 +1,71 @@
+import os
+import json
+import difflib
+
+MANIFEST_VERSION = 1
+
+
+def manifest_path(output_path):
+    """נתיב קובץ המניפסט של הפרויקט (ליד ה-MP3)"""
+    return os.path.splitext(output_path)[0] + ".manifest.json"
+
+
+def _audio_signature(output_path):
+    st = os.stat(output_path)
+    return {"size": st.st_size, "mtime": int(st.st_mtime)}
+
+
+def load_manifest(output_path, fingerprint):
+    """
+    טוען את המניפסט של הייצוא הקודם.
+    מחזיר None אם אין מניפסט, אם ההגדרות (קול/מהירות וכו') השתנו,
+    או אם קובץ ה-MP3 הוחלף מאז הייצוא האחרון.
+    """
+    path = manifest_path(output_path)
+    if not os.path.exists(path) or not os.path.exists(output_path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"[MANIFEST] Could not read {path}: {e}")
+        return None
+
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+    if manifest.get("fingerprint") != fingerprint:
+        print("[MANIFEST] Voice/rate settings changed - full render needed.")
+        return None
+    if manifest.get("audio_file") != _audio_signature(output_path):
+        print("[MANIFEST] MP3 file changed since last export - full render needed.")
+        return None
+    return manifest
+
+
+def save_manifest(output_path, sentences, spans, fingerprint, failed=None):
+    """שומר את רשימת המשפטים ואת מיקומי האודיו שלהם בקובץ שנוצר"""
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "fingerprint": fingerprint,
+        "audio_file": _audio_signature(output_path),
+        "sentences": sentences,
+        "spans": spans,
+        "failed": sorted(failed or []),
+    }
+    with open(manifest_path(output_path), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+
+
+def plan_reuse(old_sentences, new_sentences):
+    """
+    משווה בין רשימת המשפטים הישנה לחדשה.
+    מחזיר מילון {אינדקס חדש: אינדקס ישן} עבור משפטים שלא השתנו.
+    כל השאר (משפטים שנוספו או שונו) צריכים סינתזה מחדש.
+    """
+    matcher = difflib.SequenceMatcher(None, old_sentences, new_sentences, autojunk=False)
+    reuse = {}
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            for k in range(i2 - i1):
+                reuse[j1 + k] = i1 + k
+    return reuse
@@ -0,0 +1,74 @@
+import re
+import bisect
+
+LATIN_RE = re.compile(r'[A-Za-z]')
+HEBREW_RE = re.compile(r'[א-ת]')
+TOKEN_RE = re.compile(r'\S+|\s+')
+
+
+def split_language_runs(text):
+    """
+    מפצל משפט לרצפים לפי שפה: [("he", "..."), ("en", "..."), ...].
+    מילה עם אות לטינית -> אנגלית, מילה עם אות עברית -> עברית.
+    מספרים, סימנים ורווחים מצטרפים לרצף הנוכחי (או לרצף הבא אם אין עדיין רצף).
+    """
+    runs = []
+    pending = ""  # טוקנים ניטרליים לפני הרצף הראשון
+    for m in TOKEN_RE.finditer(text):
+        tok = m.group(0)
+        if LATIN_RE.search(tok):
+            lang = "en"
+        elif HEBREW_RE.search(tok):
+            lang = "he"
+        else:
+            if runs:
+                runs[-1][1] += tok
+            else:
+                pending += tok
+            continue
+
+        if runs and runs[-1][0] == lang:
+            runs[-1][1] += tok
+        else:
+            # רווחים בסוף הרצף הקודם לא שייכים להקראה שלו
+            runs.append([lang, pending + tok])
+        pending = ""
+
+    if pending:
+        runs.append(["he", pending])
+    return [(lang, chunk.strip()) for lang, chunk in runs if chunk.strip()]
+
+
+def join_runs(texts, separator="\n"):
+    """מחבר כמה קטעים לבקשה אחת. מחזיר (טקסט מחובר, [(התחלה, סוף) לכל קטע])"""
+    spans = []
+    pos = 0
+    for t in texts:
+        spans.append((pos, pos + len(t)))
+        pos += len(t) + len(separator)
+    return separator.join(texts), spans
+
+
+def find_run_cuts(joined, spans, boundaries):
+    """
+    מחשב נקודות חיתוך (ms) בין הקטעים לפי גבולות המילים שהמנוע החזיר.
+    כל מילה ממוקמת בטקסט המחובר (חיפוש מתקדם משמאל לימין) ומשויכת לקטע שלה;
+    החיתוך הוא באמצע הרווח בין המילה האחרונה של קטע לראשונה של הבא.
+    מחזיר None אם לאחד הקטעים לא שויכה אף מילה.
+    """
+    starts = [s for s, _ in spans]
+    first = [None] * len(spans)
+    last = [None] * len(spans)
+    cursor = 0
+    for start_ms, end_ms, word in boundaries:
+        pos = joined.find(word, cursor)
+        if pos < 0: continue
+        cursor = pos + len(word)
+        r = bisect.bisect_right(starts, pos) - 1
+        if r < 0 or pos >= spans[r][1]: continue
+        if first[r] is None: first[r] = start_ms
+        last[r] = end_ms
+
+    if any(v is None for v in first):
+        return None
+    return [(last[r] + first[r + 1]) / 2 for r in range(len(spans) - 1)]
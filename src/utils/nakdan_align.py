@@ -0,0 +1,104 @@
+import re
+from src.utils.skeleton import SkeletonIndex, strip_nikud, NIKUD_CLASS
+
+HEBREW_LETTER_RE = re.compile(r'[א-ת]')
+
+# סימן ניקוד בודד (אותה הגדרה כמו בשלד - בלי מקף, פסק וסוף פסוק)
+VOWEL_RE = re.compile(f'[{NIKUD_CLASS}]')
+
+# כמה תווים קדימה מחפשים מילה שלא נמצאה מיד במקום הצפוי (טוקן שהשרת השמיט או פיצל אחרת)
+SEARCH_WINDOW = 64
+
+
+def token_text(token):
+    """הניקוד המועדף של טוקן (האפשרות הראשונה), בלי סימני הגבול | של התחיליות"""
+    options = token.get('options') if isinstance(token, dict) else None
+    if not options: return ""
+    option = options[0]
+    if isinstance(option, (list, tuple)): option = option[0] if option else ""
+    return str(option).replace('|', '').strip()
+
+
+def project_nikud(source_word, vocalized):
+    """
+    מלביש את הניקוד של vocalized על האותיות של source_word (שתי מצביעים, מעבר יחיד).
+    אם רצף האותיות זהה - התוצאה שומרת בדיוק את תווי המקור (גרש, מרכאות, מקף) עם הניקוד החדש.
+    אם דיקטה שינתה כתיב (הוסיפה/השמיטה אם קריאה) - מחזירים את הניקוד של דיקטה כמו שהוא.
+    """
+    base = VOWEL_RE.sub("", source_word)
+    if HEBREW_LETTER_RE.sub("", base) == base: return vocalized
+    source_letters = [c for c in base if HEBREW_LETTER_RE.match(c)]
+    voc_letters = [c for c in vocalized if HEBREW_LETTER_RE.match(c)]
+    if source_letters != voc_letters:
+        return vocalized
+
+    # לכל אות: הניקוד שבא אחריה בתשובה
+    marks = []
+    i = 0
+    n = len(vocalized)
+    while i < n:
+        if HEBREW_LETTER_RE.match(vocalized[i]):
+            j = i + 1
+            while j < n and VOWEL_RE.match(vocalized[j]): j += 1
+            marks.append(vocalized[i + 1:j])
+            i = j
+        else:
+            i += 1
+
+    out = []
+    k = 0
+    for ch in base:
+        out.append(ch)
+        if HEBREW_LETTER_RE.match(ch):
+            out.append(marks[k])
+            k += 1
+    return "".join(out)
+
+
+def align_tokens(source, tokens, clean=None):
+    """
+    מיישר את תשובת הנקדן לטקסט שנשלח, לפי שלד האותיות ולא לפי ספירת מילים.
+    שני מצביעים עוברים במקביל על הטוקנים ועל שלד המקור (בלי ניקוד): כל טוקן מחפש את המילה
+    שלו מהמקום הנוכחי (אחרי רווחים ופיסוק), ובמקרה הצורך בחלון קצר קדימה.
+    מחזיר [(התחלה, סוף, מילה מנוקדת), ...] לפי אופסטים ב-source, ממוין ובלי חפיפות.
+    טוקן שלא נמצא, או שאין לו ניקוד, פשוט לא מכסה את המילה שלו.
+    clean - עיבוד אופציונלי לניקוד של כל טוקן (למשל ניקוי דגשים).
+    """
+    index = SkeletonIndex(source)
+    skeleton = index.skeleton
+    length = len(skeleton)
+    spans = []
+    pos = 0
+    for token in tokens:
+        if not isinstance(token, dict) or token.get('sep'): continue
+        vocalized = token_text(token)
+        key = strip_nikud(token.get('word') or vocalized).replace('|', '').strip()
+        if not key or not HEBREW_LETTER_RE.search(key): continue
+
+        # מדלגים על מה שבין המילים, ואז המילה אמורה להתחיל בדיוק כאן
+        start = pos
+        while start < length and not HEBREW_LETTER_RE.match(skeleton[start]) and skeleton[start] != key[0]:
+            start += 1
+        if not skeleton.startswith(key, start):
+            start = skeleton.find(key, pos, min(length, pos + len(key) + SEARCH_WINDOW))
+            if start < 0: continue
+        end = start + len(key)
+        pos = end
+        if not vocalized: continue
+
+        if clean: vocalized = clean(vocalized)
+        src_start, src_end = index.source_span(start, end)
+        spans.append((src_start, src_end, project_nikud(source[src_start:src_end], vocalized)))
+    return spans
+
+
+def apply_spans(text, spans):
+    """מחליף את הטווחים (ממוינים, בלי חפיפות) בטקסט"""
+    out = []
+    pos = 0
+    for start, end, word in spans:
+        out.append(text[pos:start])
+        out.append(word)
+        pos = end
+    out.append(text[pos:])
+    return "".join(out)
@@ -0,0 +1,120 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+
+# ליד מטמון האודיו (cache/audio), בתיקיית התוכנה
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_CACHE_PATH = os.path.join(PROJECT_DIR, "cache", "nikud.db")
+
+# שינוי בפרמטרים של הבקשה לדיקטה (או בעיבוד התשובה) מחייב העלאה של הגרסה
+CACHE_VERSION = "nakdan-modern-1"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS vocalized (key TEXT PRIMARY KEY, value TEXT NOT NULL, used INTEGER NOT NULL);
+CREATE INDEX IF NOT EXISTS vocalized_used ON vocalized(used);
+"""
+
+
+class NikudCache:
+    """
+    מטמון קבוע של תוצאות הניקוד מדיקטה, לפי משפט: hash של המשפט המקורי (כמו שהוא, כולל
+    הרווחים והפיסוק) -> המשפט המנוקד. הרצה חוזרת על מסמך שנערך קצת שולחת רק את המשפטים שהשתנו.
+    SQLite במצב WAL (כמו המילון), כך שכמה תהליכים יכולים לקרוא ולכתוב במקביל.
+    כשמספר הרשומות עובר את המגבלה - נמחקות אלה שלא נעשה בהן שימוש הכי הרבה זמן.
+    """
+
+    def __init__(self, path=None, max_entries=500000):
+        self.path = path or DEFAULT_CACHE_PATH
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    @staticmethod
+    def make_key(sentence):
+        return hashlib.sha256(f"{CACHE_VERSION}\x1f{sentence}".encode('utf-8')).hexdigest()
+
+    def get_many(self, sentences):
+        """מחזיר {משפט: משפט מנוקד} עבור המשפטים שנמצאו במטמון"""
+        keys = {self.make_key(s): s for s in set(sentences)}
+        found = {}
+        key_list = list(keys)
+        with self._lock:
+            # SQLite מגביל את מספר הפרמטרים בשאילתה אחת
+            for i in range(0, len(key_list), 500):
+                chunk = key_list[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                for key, value in self._conn.execute(f"SELECT key, value FROM vocalized WHERE key IN ({marks})", chunk):
+                    found[keys[key]] = value
+            if found:
+                now = int(time.time())
+                try:
+                    self._conn.executemany("UPDATE vocalized SET used=? WHERE key=?",
+                                           ((now, self.make_key(s)) for s in found))
+                except sqlite3.Error as e:
+                    print(f"[NIKUD CACHE] Could not update access time: {e}")
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items):
+        """שומר [(משפט, משפט מנוקד), ...] בטרנזקציה אחת"""
+        now = int(time.time())
+        rows = [(self.make_key(s), v, now) for s, v in items]
+        if not rows: return
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN")
+                self._conn.executemany("INSERT OR REPLACE INTO vocalized(key, value, used) VALUES (?, ?, ?)", rows)
+                self._conn.execute("COMMIT")
+            except sqlite3.Error as e:
+                print(f"[NIKUD CACHE] Write failed: {e}")
+                try: self._conn.execute("ROLLBACK")
+                except sqlite3.Error: pass
+                return
+        self._prune()
+
+    def _prune(self):
+        with self._lock:
+            try:
+                count = self._conn.execute("SELECT COUNT(*) FROM vocalized").fetchone()[0]
+                excess = count - self.max_entries
+                if excess > 0:
+                    self._conn.execute("DELETE FROM vocalized WHERE key IN (SELECT key FROM vocalized ORDER BY used LIMIT ?)", (excess,))
+                    print(f"[NIKUD CACHE] Evicted {excess} entries")
+            except sqlite3.Error as e:
+                print(f"[NIKUD CACHE] Prune failed: {e}")
+
+    def stats_message(self):
+        total = self.hits + self.misses
+        if not total: return ""
+        return f"מטמון ניקוד: {self.hits}/{total} משפטים ({self.hits * 100 // total}%) בלי פנייה לשרת"
+
+    def close(self):
+        with self._lock:
+            try: self._conn.close()
+            except sqlite3.Error: pass
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_cache(path=None):
+    """מטמון אחד לכל התהליך (החלון הראשי יוצר הרבה NikudWorker-ים)"""
+    global _shared
+    with _shared_lock:
+        if _shared is None or (path and os.path.abspath(path) != os.path.abspath(_shared.path)):
+            try:
+                _shared = NikudCache(path)
+            except Exception as e:
+                print(f"[NIKUD CACHE] Could not open cache: {e}")
+                return None
+        return _shared
@@ -0,0 +1,98 @@
+import re
+
+
+def _reader(path):
+    import PyPDF2  # נטען רק כשבאמת קוראים PDF (שורת הפקודה עם קובץ טקסט לא צריכה אותו)
+    return PyPDF2.PdfReader(path)
+
+
+def page_count(path):
+    return len(_reader(path).pages)
+
+
+def clean_page_text(page_text):
+    """ניקוי שורות זבל ואיחוד פסקאות חכם לעמוד אחד"""
+    # === שלב 1: ניקוי שורות זבל ===
+    cleaned_lines = []
+    for line in page_text.split('\n'):
+        stripped = line.strip()
+        # מסנן שורות שהן רק מספרים (כמו מספרי עמוד)
+        if re.match(r'^\s*\d+\s*$', stripped):
+            continue
+        if len(stripped) < 2 and stripped not in ['.', '!', '?']:
+            continue
+        cleaned_lines.append(stripped)
+
+    # === שלב 2: איחוד פסקאות חכם ===
+    # אם שורה לא נגמרת בנקודה/סימן שאלה/קריאה, נחבר אותה לשורה הבאה
+    parts = []
+    for line in cleaned_lines:
+        parts.append(line)
+        # רשימת סיומות המעידות על סוף פסקה באמת
+        parts.append("\n" if line.endswith(('.', '!', '?', ':', ';', '"')) else " ")
+    return "".join(parts)
+
+
+def advanced_cleanup(text):
+    """
+    פונקציית עזר לתיקון בעיות נפוצות בייבוא PDF בעברית
+    """
+    # 1. איחוד רווחים כפולים
+    text = re.sub(r'\s+', ' ', text)
+
+    # 2. תיקון רווח לפני נקודה/פסיק (לדוגמה: "מילה ." -> "מילה.")
+    text = re.sub(r'\s+([.,?!:;])', r'\1', text)
+
+    # 3. החזרת ירידות שורה אחרי נקודות (כדי שלא הכל יהיה גוש אחד)
+    # מחפש נקודה שאחריה רווח ואות, והופך לירידת שורה כפולה
+    text = re.sub(r'\. ([א-ת])', r'.\n\n\1', text)
+
+    # 4. תיקון סוגריים באנגלית שהתבלגנו
+    # דוגמה: הופך את "Absorption ,(" ל- "(Absorption),"
+    # מזהה מילה באנגלית, אחריה רווח אופציונלי, פסיק וסוגר פותח
+    text = re.sub(r'([a-zA-Z\-\s]+)\s*,?\(', r'(\1), ', text)
+
+    # תיקון נוסף: "Word (" -> "(Word)"
+    # במקרים שאין פסיק
+    text = re.sub(r'([a-zA-Z]+)\s+\(', r'(\1) ', text)
+
+    # 5. תיקון ספציפי לבעיות צירים
+    text = text.replace("בציר ה־ אנו", "בציר ה־X אנו")
+    text = text.replace("ובציר ה־ את", "ובציר ה־Y את")
+
+    # 6. החזרת תגיות PAGE להיות בשורה נפרדת (כי הניקוי אולי חיבר אותן)
+    text = re.sub(r'(\[PAGE:\d+\])', r'\n\n\1\n', text)
+
+    return text
+
+
+def extract_pdf_text(paths, start=1, end=None, progress=None):
+    """
+    מחלץ טקסט מקובצי PDF (ברצף) עם תגיות [PAGE:n] לסנכרון, ניקוי שורות ואיחוד פסקאות.
+    start/end - טווח העמודים (כולל), לכל קובץ. progress(אחוז) - אופציונלי.
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+    chunks = []
+    for idx, path in enumerate(paths):
+        try:
+            reader = _reader(path)
+            total_pages = len(reader.pages)
+        except Exception as e:
+            print(f"Error reading PDF {path}: {e}")
+            continue
+
+        start_p = max(1, int(start or 1))
+        end_p = min(total_pages, int(end or total_pages))
+        for i in range(start_p - 1, end_p):
+            # תגית עמוד לסנכרון
+            chunks.append(f"\n\n[PAGE:{i + 1}]\n")
+            page_text = reader.pages[i].extract_text()
+            if page_text:
+                chunks.append(clean_page_text(page_text))
+
+        if progress:
+            progress(int(((idx + 1) / len(paths)) * 100))
+
+    # === שלב 3: פוליש סופי (Regex) ===
+    return advanced_cleanup("".join(chunks)).strip()
@@ -0,0 +1,152 @@
+import re
+from collections import namedtuple
+from src.utils.skeleton import NIKUD_CLASS
+
+# סוגי קטעים
+TEXT = "text"
+PAGE = "page"
+IMG = "img"
+
+# קטע בטקסט המקור: start/end הם אופסטים לתוך הטקסט, text == source[start:end]
+Segment = namedtuple("Segment", ["kind", "start", "end", "text"])
+
+# מועמדים לגבול: תגיות, רצף סימני סיום (כולל סוף פסוק ׃ ושלוש נקודות) וירידת שורה.
+# כל השאר (טקסט, ניקוד, מקפים) נבלע בין ההתאמות - מעבר יחיד על הטקסט.
+TOKEN_RE = re.compile(r'\[PAGE:\d+\]|\[IMG:[^\]\n]*\]|[.?!\u05C3\u2026]+|\n')
+
+# סימנים שנסגרים אחרי סוף משפט ושייכים אליו (מרכאות, גרשיים, סוגריים)
+CLOSERS = set('"\'”’»)\u05F3\u05F4')
+
+# ניקוד וטעמים (לא כולל מקף וסוף פסוק) - מתעלמים מהם בזיהוי קיצורים
+NIKUD_RE = re.compile(f'[{NIKUD_CLASS}]')
+
+# קיצורים שהנקודה אחריהם אינה סוף משפט (אותיות קטנות, בלי הנקודה האחרונה)
+ABBREVIATIONS = frozenset({
+    "mr", "mrs", "ms", "dr", "prof", "st", "vs", "jr", "sr", "no", "vol", "fig", "cf",
+    "e.g", "i.e", "p", "pp",
+    "מס", "עמ", "פרופ", "רח", "טל", "ד\"ר",
+})
+
+# כמה תווים אחורה מחפשים את תחילת המילה שלפני נקודה
+_MAX_ABBR_LEN = 12
+
+# סינון מהיר: נקודה יכולה לבוא אחרי קיצור רק אם התו שלפניה הוא אות אחרונה של קיצור,
+# אות לטינית גדולה (ראשי תיבות) או סימן ניקוד
+_ABBR_LAST_CHARS = frozenset(
+    [a[-1] for a in ABBREVIATIONS]
+    + [chr(c) for c in range(ord("A"), ord("Z") + 1)]
+    + [chr(c) for c in range(0x0591, 0x05C8)]
+)
+
+
+def _is_abbreviation(text, pos):
+    """האם הנקודה במיקום pos באה אחרי קיצור מוכר או ראשי תיבות לטיניים (J. K.)"""
+    if pos == 0 or text[pos - 1] not in _ABBR_LAST_CHARS:
+        return False
+    start = pos
+    floor = max(0, pos - _MAX_ABBR_LEN)
+    while start > floor and not text[start - 1].isspace() and text[start - 1] not in '("[-\u05BE':
+        start -= 1
+    word = NIKUD_RE.sub("", text[start:pos])
+    if not word:
+        return False
+    if len(word) == 1 and "A" <= word <= "Z":
+        return True
+    return word.lower() in ABBREVIATIONS
+
+
+def _is_decimal_point(text, pos):
+    return 0 < pos < len(text) - 1 and text[pos - 1].isdigit() and text[pos + 1].isdigit()
+
+
+def segment_text(text):
+    """
+    מחלק טקסט לקטעים (משפטים, תגיות עמוד ותמונה) במעבר יחיד, בזמן ליניארי.
+    הכללים (כמו בחלוקה הקודמת של הייצוא):
+    - משפט נסגר בסימן סיום או בירידת שורה, והסימן/ירידת השורה נשארים בסוף שלו.
+    - רווחים אחרי סוף משפט שייכים למשפט הבא.
+    - ירידת שורה ריקה נצמדת למשפט הקודם (כדי שהנגן ירד שורה), אלא אם לפניה תגית.
+    - רווחים וירידות שורה שלפני תגית לא נזרקים: הם נצמדים למשפט שלפניהם (או לקטע משלהם
+      אם לפניהם תגית), וירידות השורה שאחרי התגית נשמרות במשפט הבא - כמו בחלוקה הקודמת.
+    - נקודה עשרונית ונקודה אחרי קיצור לא סוגרות משפט; מרכאות סוגרות נשארות במשפט.
+    מחזיר רשימת Segment עם אופסטים לטקסט המקור.
+    """
+    segments = []
+    buf_start = 0
+    carry = False  # לפני התגית האחרונה היה רווח - ירידות שורה אחריה לא נזרקות
+
+    append = segments.append
+    new_segment = tuple.__new__
+
+    def emit(kind, start, end):
+        append(new_segment(Segment, (kind, start, end, text[start:end])))
+
+    for m in TOKEN_RE.finditer(text):
+        start, end = m.span()
+        first = text[start]
+
+        if first == "[":
+            pending = text[buf_start:start]
+            if pending.strip():
+                emit(TEXT, buf_start, start)
+                carry = False
+            elif pending:
+                prev = segments[-1] if segments else None
+                if prev and prev.kind == TEXT and prev.end == buf_start:
+                    segments[-1] = Segment(TEXT, prev.start, start, text[prev.start:start])
+                else:
+                    emit(TEXT, buf_start, start)
+                carry = True
+            emit(PAGE if text.startswith("[PAGE:", start) else IMG, start, end)
+            buf_start = end
+            continue
+
+        if first == "\n":
+            if text[buf_start:start].strip():
+                emit(TEXT, buf_start, end)
+                buf_start = end
+                carry = False
+            elif start == buf_start and not carry:
+                prev = segments[-1] if segments else None
+                if prev and prev.kind == TEXT and prev.end == start:
+                    segments[-1] = Segment(TEXT, prev.start, end, text[prev.start:end])
+                buf_start = end
+            continue
+
+        # נקודה בודדת: מספר עשרוני או קיצור אינם סוף משפט
+        if end - start == 1 and first == "." and (_is_decimal_point(text, start) or _is_abbreviation(text, start)):
+            continue
+        while end < len(text) and text[end] in CLOSERS:
+            end += 1
+        emit(TEXT, buf_start, end)
+        buf_start = end
+        carry = False
+
+    if buf_start < len(text):
+        emit(TEXT, buf_start, len(text))
+    return segments
+
+
+def split_sentences(text):
+    """רק הטקסטים של הקטעים, לפי הסדר"""
+    return [seg.text for seg in segment_text(text)]
+
+
+def split_chapters(text, marker, require_number=False, segments=None):
+    """
+    מחלק טקסט לפרקים לפי מילת פתיחה (למשל "פרק").
+    פרק מתחיל רק בתחילת קטע (משפט או שורה) שמתחיל במילה, כך שחיתוך לעולם
+    לא נופל באמצע משפט. מחזיר רשימת (התחלה, סוף) כולל החלק שלפני הפרק הראשון.
+    """
+    if segments is None:
+        segments = segment_text(text)
+    head_re = re.compile(re.escape(marker) + (r'\s+\d+' if require_number else ''))
+    cuts = []
+    for seg in segments:
+        if seg.kind != TEXT: continue
+        offset = len(seg.text) - len(seg.text.lstrip())
+        if head_re.match(seg.text, offset):
+            cuts.append(seg.start + offset)
+
+    bounds = [0] + [c for c in cuts if c > 0] + [len(text)]
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if text[a:b].strip()]
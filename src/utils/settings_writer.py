@@ -0,0 +1,114 @@
+import os
+import json
+import time
+import atexit
+import threading
+
+
+def atomic_write_json(path, data):
+    """כתיבה אטומית: קובץ זמני באותה תיקייה, fsync, ואז החלפה. קריסה באמצע לא משאירה קובץ קטוע"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=4, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    # שמירת שינוי השם עצמו (רלוונטי רק במערכות POSIX)
+    if hasattr(os, "O_DIRECTORY"):
+        try:
+            fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+            try: os.fsync(fd)
+            finally: os.close(fd)
+        except OSError:
+            pass
+
+
+class SettingsWriter:
+    """
+    כותב הגדרות ברקע עם איחוד (debounce):
+    schedule() רק מסמן שיש מה לשמור - הכתיבה בפועל מתבצעת בתהליכון נפרד אחרי delay שניות
+    של שקט (ולכל היותר max_delay מהבקשה הראשונה), כך שרצף עריכות עולה כתיבה אחת
+    וממשק המשתמש אף פעם לא מחכה לדיסק. flush() כותב מיד וממתין (לסגירת התוכנה).
+    """
+
+    def __init__(self, path, delay=0.5, max_delay=5.0):
+        self.path = path
+        self.delay = delay
+        self.max_delay = max_delay
+        self.writes = 0
+        self.last_error = None
+        self._cond = threading.Condition()
+        self._pending = None          # הנתונים לכתיבה (עותק פרטי של הכותב)
+        self._has_pending = False
+        self._first_request = 0.0
+        self._deadline = 0.0
+        self._requested = 0           # מונה בקשות
+        self._written = 0             # עד איזו בקשה נכתב
+        self._flush_now = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="settings-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def schedule(self, snapshot):
+        """
+        מבקש שמירה. snapshot - עותק עמוק של הנתונים (dict) שנלקח בתהליכון הקורא:
+        הסריאליזציה מתבצעת ברקע, ואסור שמישהו ישנה את האובייקט הזה בזמן שהיא רצה.
+        נכתבת הגרסה העדכנית ביותר שנמסרה.
+        """
+        with self._cond:
+            if self._closed: return
+            now = time.monotonic()
+            if not self._has_pending:
+                self._first_request = now
+            self._pending = snapshot
+            self._has_pending = True
+            self._deadline = min(now + self.delay, self._first_request + self.max_delay)
+            self._requested += 1
+            self._cond.notify_all()
+
+    def flush(self, timeout=10.0):
+        """כותב מיד את מה שממתין וממתין לסיום הכתיבה"""
+        with self._cond:
+            target = self._requested
+            if self._written >= target: return True
+            self._flush_now = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: self._written >= target, timeout)
+
+    def close(self):
+        self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._has_pending:
+                    if self._closed: return
+                    self._cond.wait()
+                while not self._flush_now and not self._closed:
+                    remaining = self._deadline - time.monotonic()
+                    if remaining <= 0: break
+                    self._cond.wait(remaining)
+                snapshot = self._pending
+                target = self._requested
+                self._pending = None
+                self._has_pending = False
+                self._flush_now = False
+
+            self._write(snapshot)
+
+            with self._cond:
+                self._written = max(self._written, target)
+                self._cond.notify_all()
+
+    def _write(self, snapshot):
+        try:
+            atomic_write_json(self.path, snapshot)
+            self.writes += 1
+            self.last_error = None
+        except Exception as e:
+            self.last_error = e
+            print(f"[ERROR SAVE] Could not write {self.path}: {e}")
@@ -0,0 +1,27 @@
+import numpy as np
+from src.utils.audio_stream import FRAME_RATE
+
+
+def trim_silence(samples, threshold_db=-50.0, frame_ms=10, padding_ms=40, frame_rate=FRAME_RATE):
+    """
+    חיתוך שקט בתחילת ובסוף משפט (וקטורי, בלי לולאה על דגימות).
+    האות מחולק לחלונות של frame_ms, לכל חלון מחושב RMS ב-dBFS,
+    ונשמר הטווח מהחלון הראשון ועד האחרון שעוברים את הסף (+ריפוד קטן).
+    מחזיר (מערך חתוך, מספר הדגימות שהוסרו). אם הכל שקט - מחזיר את המקור.
+    """
+    frame = max(1, frame_rate * frame_ms // 1000)
+    n_frames = len(samples) // frame
+    if n_frames == 0:
+        return samples, 0
+
+    frames = samples[:n_frames * frame].astype(np.float32).reshape(n_frames, frame)
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    threshold = 32768.0 * (10.0 ** (threshold_db / 20.0))
+    loud = np.flatnonzero(rms > threshold)
+    if loud.size == 0:
+        return samples, 0
+
+    pad = frame_rate * padding_ms // 1000
+    start = max(0, int(loud[0]) * frame - pad)
+    end = min(len(samples), (int(loud[-1]) + 1) * frame + pad)
+    return samples[start:end], len(samples) - (end - start)
@@ -0,0 +1,60 @@
+import re
+import bisect
+
+# ניקוד וטעמים בלבד. סימני הפיסוק שבאותו טווח - מקף (05BE), פסק (05C0), סוף פסוק (05C3)
+# ונון הפוכה (05C6) - הם חלק מהטקסט: לא מוסרים מהשלד ולא נבלעים בהחלפה
+NIKUD_CLASS = r'\u0591-\u05BD\u05BF\u05C1\u05C2\u05C4\u05C5\u05C7'
+NIKUD_RE = re.compile(f'[{NIKUD_CLASS}]+')
+HEBREW_PUNCTUATION = frozenset('\u05BE\u05C0\u05C3\u05C6')
+
+
+def is_nikud(ch):
+    return '\u0591' <= ch <= '\u05C7' and ch not in HEBREW_PUNCTUATION
+
+
+def strip_nikud(text):
+    return NIKUD_RE.sub("", text)
+
+
+class SkeletonIndex:
+    """
+    "שלד" של טקסט מנוקד: אותיות הבסיס בלבד, ומיפוי חזרה למיקומים בטקסט המקורי.
+    הניקוד מוסר פעם אחת (ברמת C), וההתאמות רצות על השלד בלי לדלג על תווים.
+    המיפוי נשמר לפי רצפי ניקוד ולא לפי תו, כך שטקסט לא מנוקד כמעט לא עולה זיכרון.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self._run_starts = [0]   # מיקום בשלד שממנו מתחיל כל מקטע
+        self._shifts = [0]       # כמה תווי ניקוד הוסרו לפני המקטע
+        parts = []
+        last = 0
+        removed = 0
+        for m in NIKUD_RE.finditer(text):
+            parts.append(text[last:m.start()])
+            removed += m.end() - m.start()
+            last = m.end()
+            self._run_starts.append(last - removed)
+            self._shifts.append(removed)
+        parts.append(text[last:])
+        self.skeleton = "".join(parts) if removed else text
+
+    def to_source(self, pos):
+        """מיקום בשלד -> מיקום של אותה אות בטקסט המקורי"""
+        if len(self._shifts) == 1:
+            return pos
+        return pos + self._shifts[bisect.bisect_right(self._run_starts, pos) - 1]
+
+    def source_span(self, start, end):
+        """
+        טווח בשלד -> טווח בטקסט המקורי.
+        הסוף כולל את הניקוד שאחרי האות האחרונה (הוא חלק מהמילה).
+        """
+        if start >= end:
+            src = self.to_source(start)
+            return src, src
+        src_end = self.to_source(end - 1) + 1
+        m = NIKUD_RE.match(self.text, src_end)
+        if m:
+            src_end = m.end()
+        return self.to_source(start), src_end
@@ -0,0 +1,191 @@
+import bisect
+import threading
+from src.utils.skeleton import strip_nikud
+
+# תווי גבול: כל תו (גם במילה של אות אחת או שתיים) מופיע לפחות בטריגרם אחד
+PAD_START = "\x02"
+PAD_END = "\x03"
+SEP = "\x00"
+
+
+def entry_text(key, value):
+    """הטקסט שמאונדקס למילה: המפתח והערך בלי ניקוד (הערך רק אם הוא שונה מהמפתח)"""
+    value = strip_nikud(value or "")
+    key = strip_nikud(key)
+    return key if value == key else key + SEP + value
+
+
+def trigrams(text):
+    padded = PAD_START + PAD_START + text + PAD_END + PAD_END
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def short_grams(text):
+    """כל תת-המחרוזות באורך 1 ו-2 (בלי ריפוד), לשאילתות קצרות מטריגרם.
+    הן נשמרות באותו מילון עם הטריגרמים - האורך שונה, אז אין התנגשות"""
+    grams = set(text)
+    grams.update(text[i:i + 2] for i in range(len(text) - 1))
+    return {g for g in grams if SEP not in g}
+
+
+def index_grams(text):
+    """כל המפתחות של הטקסט באינדקס: טריגרמים עם ריפוד, ותת-מחרוזות קצרות"""
+    return trigrams(text) | short_grams(text)
+
+
+def trigrams_of_query(query):
+    """הטריגרמים של השאילתה עצמה (בלי ריפוד - היא יכולה להופיע באמצע מילה)"""
+    return {query[i:i + 3] for i in range(len(query) - 2)}
+
+
+class TrigramIndex:
+    """
+    אינדקס חיפוש-תוך-כדי-הקלדה למילון: מפתח -> ערך, עם רשימות טריגרמים (postings)
+    על הטקסט בלי ניקוד (המפתח והערך), ורשימה ממוינת של המפתחות למיפוי מפתח -> שורה.
+    לשאילתות של תו או שניים יש באותן רשימות גם את תת-המחרוזות הקצרות, כך שגם הן
+    חיפוש אחד במילון ולא מעבר על כל הטריגרמים.
+    הוספה, עדכון ומחיקה של מילה מעדכנים רק את הטריגרמים שלה.
+    הטקסטים והטריגרמים נבנים בפעם הראשונה שמחפשים (או ברקע, דרך warm_up),
+    כך שטעינת המילון עצמה לא מתעכבת.
+    """
+
+    def __init__(self, items=None):
+        self._values = {}     # מפתח -> ערך (מנוקד)
+        self._keys = []       # כל המפתחות, ממוינים
+        self._text = None     # מפתח -> "מפתח\0ערך" בלי ניקוד (נבנה בחיפוש הראשון)
+        self._postings = None # טריגרם / תו / זוג תווים -> קבוצת מפתחות (נבנה בחיפוש הראשון)
+        self._lock = threading.RLock()
+        if items:
+            self.build(items)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return key in self._values
+
+    def keys(self):
+        """כל המפתחות, ממוינים (לא להעתיק - לקריאה בלבד)"""
+        return self._keys
+
+    def build(self, items):
+        with self._lock:
+            self._values = {k: v or "" for k, v in items}
+            self._keys = sorted(self._values)
+            self._text = None
+            self._postings = None
+
+    def warm_up(self):
+        """בונה את הטריגרמים בתהליכון רקע, כדי שגם החיפוש הראשון יהיה מיידי"""
+        if self._postings is not None: return
+        threading.Thread(target=self._ensure_postings, name="trigram-index", daemon=True).start()
+
+    def position(self, key):
+        """מיקום המפתח ברשימה הממוינת (השורה שלו כשאין סינון), או -1"""
+        pos = bisect.bisect_left(self._keys, key)
+        return pos if pos < len(self._keys) and self._keys[pos] == key else -1
+
+    # --- עדכונים נקודתיים ---
+    def add(self, key, value):
+        """הוספה או עדכון של מילה. מחזיר True אם המפתח חדש"""
+        with self._lock:
+            return self._add(key, value)
+
+    def _add(self, key, value):
+        is_new = key not in self._values
+        if is_new:
+            bisect.insort(self._keys, key)
+        self._values[key] = value or ""
+        if self._postings is not None:
+            old = self._text.get(key)
+            text = entry_text(key, value)
+            if old == text: return is_new
+            self._text[key] = text
+            old_grams = index_grams(old) if old is not None else set()
+            new_grams = index_grams(text)
+            for gram in old_grams - new_grams:
+                self._discard(gram, key)
+            for gram in new_grams - old_grams:
+                self._postings.setdefault(gram, set()).add(key)
+        return is_new
+
+    def remove(self, key):
+        with self._lock:
+            return self._remove(key)
+
+    def _remove(self, key):
+        if self._values.pop(key, None) is None: return False
+        pos = self.position(key)
+        if pos >= 0: del self._keys[pos]
+        if self._postings is not None:
+            for gram in index_grams(self._text.pop(key)):
+                self._discard(gram, key)
+        return True
+
+    def _discard(self, gram, key):
+        keys = self._postings.get(gram)
+        if keys is not None:
+            keys.discard(key)
+            if not keys: del self._postings[gram]
+
+    # --- חיפוש ---
+    def _ensure_postings(self):
+        with self._lock:
+            if self._postings is None:
+                self._build_postings()
+
+    def _build_postings(self):
+        # הסרת הניקוד מכל הערכים בקריאה אחת (ולא מחרוזת אחרי מחרוזת)
+        keys = list(self._values)
+        stripped_keys = strip_nikud("\x01".join(keys)).split("\x01")
+        stripped_values = strip_nikud("\x01".join(self._values.values())).split("\x01")
+        self._text = {k: (sk if sv == sk else sk + SEP + sv)
+                      for k, sk, sv in zip(keys, stripped_keys, stripped_values)}
+        postings = {}
+        for key, text in self._text.items():
+            for gram in index_grams(text):
+                bucket = postings.get(gram)
+                if bucket is None:
+                    postings[gram] = {key}
+                else:
+                    bucket.add(key)
+        self._postings = postings
+
+    def matches(self, key, query):
+        query = strip_nikud(query.strip())
+        return not query or (key in self._values and query in entry_text(key, self._values[key]))
+
+    def search(self, query):
+        """כל המפתחות שהשאילתה (בלי ניקוד) מופיעה במפתח או בערך שלהם, ממוינים"""
+        query = strip_nikud(query.strip())
+        if not query:
+            return list(self._keys)
+        with self._lock:
+            if self._postings is None:
+                self._build_postings()
+            return self._search(query)
+
+    def _search(self, query):
+        if len(query) < 3:
+            # שאילתה קצרה: הרשימה שלה מדויקת, אין צורך לבדוק כל מפתח
+            return self._in_order(self._postings.get(query, ()))
+
+        # חיתוך הרשימות, מהקצרה לארוכה
+        buckets = sorted((self._postings.get(g) for g in trigrams_of_query(query)), key=lambda b: len(b) if b else 0)
+        if not buckets or not buckets[0]:
+            return []
+        candidates = set(buckets[0])
+        for bucket in buckets[1:]:
+            candidates &= bucket
+            if not candidates: return []
+
+        text = self._text
+        return self._in_order(k for k in candidates if query in text[k])
+
+    def _in_order(self, found):
+        """המפתחות שנמצאו, ממוינים. כשנמצא חלק גדול מהמילון - סינון של הרשימה הממוינת
+        (מעבר אחד) זול יותר ממיון התוצאות"""
+        found = found if isinstance(found, (set, frozenset)) else set(found)
+        if len(found) * 8 > len(self._keys):
+            return [k for k in self._keys if k in found]
+        return sorted(found)
@@ -0,0 +1,172 @@
+import io
+import re
+import wave
+import zlib
+import numpy as np
+
+# פורמט ה-PCM שמנועים מקומיים מחזירים: 24kHz, מונו, 16 ביט
+PCM_FRAME_RATE = 24000
+
+
+class TTSBackend:
+    """
+    ממשק בסיס למנוע הקראה.
+    synthesize מחזיר בתים בפורמט audio_format:
+    "mp3" - קובץ MP3 מקודד, "pcm" - PCM גולמי 16 ביט מונו ב-24kHz.
+    """
+    name = "base"
+    audio_format = "mp3"
+    is_remote = True
+    supports_boundaries = False
+
+    async def synthesize(self, text, voice, rate="+0%", volume="+0%"):
+        raise NotImplementedError
+
+    async def synthesize_with_boundaries(self, text, voice, rate="+0%", volume="+0%"):
+        """
+        כמו synthesize, אבל מחזיר גם גבולות מילים: (בתים, [(התחלה_ms, סוף_ms, מילה), ...]).
+        מנוע שלא תומך בזה זורק NotImplementedError והקורא עובר לבקשה נפרדת לכל קטע.
+        """
+        raise NotImplementedError
+
+
+class EdgeTTSBackend(TTSBackend):
+    """המנוע של Microsoft Edge (ענן)"""
+    name = "edge-tts"
+    audio_format = "mp3"
+    is_remote = True
+    supports_boundaries = True
+
+    async def synthesize(self, text, voice, rate="+0%", volume="+0%"):
+        import edge_tts
+        communicate = edge_tts.Communicate(text, voice, rate=rate, volume=volume)
+        data = b""
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio": data += chunk["data"]
+        return data
+
+    async def synthesize_with_boundaries(self, text, voice, rate="+0%", volume="+0%"):
+        import edge_tts
+        try:
+            communicate = edge_tts.Communicate(text, voice, rate=rate, volume=volume, boundary="WordBoundary")
+        except TypeError:
+            # גרסאות ישנות של edge-tts שולחות WordBoundary כברירת מחדל
+            communicate = edge_tts.Communicate(text, voice, rate=rate, volume=volume)
+        data = b""
+        boundaries = []
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio":
+                data += chunk["data"]
+            elif chunk["type"] == "WordBoundary":
+                # היחידות של השירות הן 100 ננו-שניות
+                start = chunk["offset"] / 10000
+                boundaries.append((start, start + chunk["duration"] / 10000, chunk["text"]))
+        return data, boundaries
+
+
+class LocalToneBackend(TTSBackend):
+    """
+    מנוע מקומי דטרמיניסטי ללא רשת: כל אות הופכת לצליל קצר עם "פורמנטים" קבועים.
+    לא נשמע כמו דיבור, אבל האורך והקצב דומים - מתאים לבדיקות עומס של
+    התזמון, המטמון וההרכבה, וכגיבוי כשהשירות בענן לא זמין.
+    """
+    name = "local-tone"
+    audio_format = "pcm"
+    is_remote = False
+    supports_boundaries = True
+
+    LETTER_MS = 70
+    SPACE_MS = 60
+    PAUSE_MS = 180
+    MALE_VOICES = ("Avri", "Guy", "Brian")
+
+    def __init__(self):
+        self._tables = {}  # (voice, rate) -> טבלת גלים מוכנה לכל תו
+
+    @staticmethod
+    def _rate_factor(rate):
+        m = re.match(r'^([+-]?\d+)%$', (rate or "").strip())
+        return max(0.25, 1 + int(m.group(1)) / 100) if m else 1.0
+
+    def _char_wave(self, char, f0, letter_samples):
+        if char.isspace():
+            return np.zeros(letter_samples * self.SPACE_MS // self.LETTER_MS, dtype=np.int16)
+        if not char.isalnum():
+            return np.zeros(letter_samples * self.PAUSE_MS // self.LETTER_MS, dtype=np.int16)
+        code = zlib.crc32(char.encode('utf-8'))
+        f1 = 300 + code % 600
+        f2 = 900 + (code >> 10) % 1500
+        t = np.arange(letter_samples) / PCM_FRAME_RATE
+        wave_ = 0.6 * np.sin(2 * np.pi * f0 * t) + 0.3 * np.sin(2 * np.pi * f1 * t) + 0.1 * np.sin(2 * np.pi * f2 * t)
+        fade = min(len(t) // 4, PCM_FRAME_RATE // 200)
+        if fade:
+            ramp = np.linspace(0.0, 1.0, fade)
+            wave_[:fade] *= ramp
+            wave_[-fade:] *= ramp[::-1]
+        return (wave_ * 0.3 * 32767).astype(np.int16)
+
+    def _table(self, voice, rate):
+        key = (voice, rate)
+        if key not in self._tables:
+            f0 = 110 if any(v in (voice or "") for v in self.MALE_VOICES) else 200
+            letter_samples = int(PCM_FRAME_RATE * self.LETTER_MS / 1000 / self._rate_factor(rate))
+            self._tables[key] = {"f0": f0, "samples": letter_samples, "chars": {}}
+        return self._tables[key]
+
+    def render(self, text, voice, rate="+0%", boundaries=None):
+        """סינתזה סינכרונית - מחזירה מערך int16. אם הועברה רשימה, ממלא בה גבולות מילים"""
+        table = self._table(voice, rate)
+        chars = table["chars"]
+        parts = []
+        pos = 0
+        for m in re.finditer(r'\S+|\s+', text):
+            word_start = pos
+            for ch in m.group(0):
+                # ניקוד וטעמים לא מוסיפים זמן
+                if '\u0591' <= ch <= '\u05C7': continue
+                w = chars.get(ch)
+                if w is None:
+                    w = chars[ch] = self._char_wave(ch, table["f0"], table["samples"])
+                parts.append(w)
+                pos += len(w)
+            if boundaries is not None and not m.group(0).isspace():
+                boundaries.append((word_start * 1000 / PCM_FRAME_RATE, pos * 1000 / PCM_FRAME_RATE, m.group(0)))
+        if not parts:
+            return np.zeros(0, dtype=np.int16)
+        return np.concatenate(parts)
+
+    async def synthesize(self, text, voice, rate="+0%", volume="+0%"):
+        return self.render(text, voice, rate).tobytes()
+
+    async def synthesize_with_boundaries(self, text, voice, rate="+0%", volume="+0%"):
+        boundaries = []
+        data = self.render(text, voice, rate, boundaries).tobytes()
+        return data, boundaries
+
+
+BACKENDS = {
+    EdgeTTSBackend.name: EdgeTTSBackend,
+    LocalToneBackend.name: LocalToneBackend,
+}
+_instances = {}
+
+
+def get_backend(name=None):
+    """מחזיר מופע (משותף) של המנוע לפי שם. ברירת מחדל: edge-tts"""
+    name = name or EdgeTTSBackend.name
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown TTS backend: {name}")
+    if name not in _instances:
+        _instances[name] = BACKENDS[name]()
+    return _instances[name]
+
+
+def pcm_to_wav_bytes(pcm_bytes, frame_rate=PCM_FRAME_RATE):
+    """עוטף PCM גולמי בקובץ WAV (לצורך השמעה בנגן)"""
+    buf = io.BytesIO()
+    with wave.open(buf, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(frame_rate)
+        wf.writeframes(pcm_bytes)
+    return buf.getvalue()
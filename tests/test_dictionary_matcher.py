@@ -0,0 +1,72 @@
+from src.utils.dictionary_matcher import DictionaryMatcher, get_matcher, apply_dictionary, EXACT, PREFIX, PARTIAL
+from src.utils.dictionary_store import VersionedDict
+
+BAYIT = "בַּיִת"
+
+
+def replace(text, dictionary, match_types=None):
+    metadata = {k: {"match_type": t} for k, t in (match_types or {}).items()}
+    return DictionaryMatcher(dictionary, metadata).replace(text)
+
+
+def test_prefix_letters_are_walked_back():
+    assert replace("ובבית", {"בית": BAYIT}, {"בית": PREFIX}) == ("וב" + BAYIT, 1)
+    assert replace("וכשבבית גדול", {"בית": BAYIT}, {"בית": PREFIX}) == ("וכשב" + BAYIT + " גדול", 1)
+
+
+def test_prefix_rejects_non_prefix_letters():
+    assert replace("אבית", {"בית": BAYIT}, {"בית": PREFIX}) == ("אבית", 0)
+    assert replace("ביתן", {"בית": BAYIT}, {"בית": PREFIX}) == ("ביתן", 0)
+
+
+def test_longest_match_wins():
+    dictionary = {"בית": BAYIT, "בית ספר": "בֵּית סֵפֶר"}
+    assert replace("בית ספר", dictionary) == ("בֵּית סֵפֶר", 1)
+    assert replace("בית גדול", dictionary) == (BAYIT + " גדול", 1)
+
+
+def test_exact_does_not_fire_inside_longer_words():
+    dictionary = {"בית": BAYIT}
+    assert replace("ביתן", dictionary, {"בית": EXACT}) == ("ביתן", 0)
+    assert replace("הבית", dictionary, {"בית": EXACT}) == ("הבית", 0)
+    assert replace("בית.", dictionary, {"בית": EXACT}) == (BAYIT + ".", 1)
+
+
+def test_partial_fires_inside_words():
+    assert replace("ביתן", {"בית": BAYIT}, {"בית": PARTIAL}) == (BAYIT + "ן", 1)
+
+
+def test_existing_nikud_is_ignored_and_replaced():
+    assert replace("הַבַּיִת", {"בית": BAYIT}) == ("הַ" + BAYIT, 1)
+
+
+def test_maqaf_survives_replacement():
+    assert replace("בית־ספר גדול", {"בית": BAYIT}) == (BAYIT + "־ספר גדול", 1)
+    assert replace("בית־ספר", {"בית": BAYIT}, {"בית": EXACT}) == (BAYIT + "־ספר", 1)
+
+
+def test_geresh_and_sof_pasuq_survive_replacement():
+    assert replace("בית׳ ג׳", {"בית": BAYIT}) == (BAYIT + "׳ ג׳", 1)
+    assert replace("ובית׃", {"בית": BAYIT}, {"בית": PREFIX}) == ("ו" + BAYIT + "׃", 1)
+
+
+def test_shared_matcher_is_reused_until_the_dictionary_changes():
+    dictionary = VersionedDict({"בית": BAYIT})
+    metadata = VersionedDict()
+    first = get_matcher(dictionary, metadata)
+    assert get_matcher(dictionary, metadata) is first
+    dictionary["ספר"] = "סֵפֶר"
+    assert get_matcher(dictionary, metadata) is not first
+    assert apply_dictionary("בית ספר", dictionary, metadata) == (BAYIT + " סֵפֶר", 2)
+    metadata["בית"] = {"match_type": EXACT}
+    assert apply_dictionary("ביתן", dictionary, metadata) == ("ביתן", 0)
+
+
+def test_plain_dict_mutation_is_detected():
+    dictionary = {"בית": BAYIT}
+    metadata = {"בית": {"match_type": PARTIAL}}
+    assert apply_dictionary("ביתן", dictionary, metadata) == (BAYIT + "ן", 1)
+    metadata["בית"]["match_type"] = EXACT
+    assert apply_dictionary("ביתן", dictionary, metadata) == ("ביתן", 0)
+    dictionary["בית"] = "בֵּית"
+    assert apply_dictionary("בית", dictionary, metadata) == ("בֵּית", 1)
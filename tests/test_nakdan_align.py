@@ -0,0 +1,109 @@
+import pytest
+
+from src.utils.nakdan_align import align_tokens, apply_spans, project_nikud, token_text
+from src.utils.skeleton import strip_nikud
+
+
+def word(text, *options):
+    """טוקן מילה כמו בתשובה של דיקטה: אפשרויות הניקוד, הראשונה היא המועדפת"""
+    return {"word": text, "sep": False, "options": [[o, 0] for o in options]}
+
+
+def sep(text):
+    return {"word": text, "sep": True}
+
+
+# (טקסט שנשלח, תשובת הנקדן, טקסט מנוקד צפוי)
+ALIGN_CASES = [
+    # תשובה רגילה: מילים ומפרידים
+    ("שלום עולם.",
+     [word("שלום", "שָׁלוֹם"), sep(" "), word("עולם", "עוֹלָם"), sep(".")],
+     "שָׁלוֹם עוֹלָם."),
+    # סימני הגבול של התחיליות (|) יורדים
+    ("והבית גדול",
+     [word("והבית", "וְ|הַ|בַּיִת"), sep(" "), word("גדול", "גָּדוֹל")],
+     "וְהַבַּיִת גָּדוֹל"),
+    # השרת מחזיר מילה עם מקף כטוקן אחד
+    ("בית־ספר חדש",
+     [word("בית־ספר", "בֵּית־סֵפֶר"), sep(" "), word("חדש", "חָדָשׁ")],
+     "בֵּית־סֵפֶר חָדָשׁ"),
+    # השרת מפצל מילה לשני טוקנים
+    ("ביתספר חדש",
+     [word("בית", "בֵּית"), word("ספר", "סֵפֶר"), sep(" "), word("חדש", "חָדָשׁ")],
+     "בֵּיתסֵפֶר חָדָשׁ"),
+    # טוקן שהשרת השמיט: המילה נשארת כמו שהיא, והבאות עדיין מתיישרות
+    ("אחת שתיים שלוש",
+     [word("אחת", "אַחַת"), sep(" "), sep(" "), word("שלוש", "שָׁלוֹשׁ")],
+     "אַחַת שתיים שָׁלוֹשׁ"),
+    # טוקן בלי אפשרויות ניקוד לא מכסה את המילה שלו
+    ("מה קורה",
+     [word("מה", "מָה"), sep(" "), {"word": "קורה", "sep": False, "options": []}],
+     "מָה קורה"),
+    # מפרידים אחרים בתשובה (ירידות שורה, רווחים כפולים) מאשר בטקסט
+    ("ראשון.\nשני",
+     [word("ראשון", "רִאשׁוֹן"), sep(". "), word("שני", "שֵׁנִי")],
+     "רִאשׁוֹן.\nשֵׁנִי"),
+    # טקסט לועזי ומספרים עוברים כמו שהם
+    ("עלה 3.5 GB היום",
+     [word("עלה", "עָלָה"), sep(" "), sep("3.5"), sep(" "), sep("GB"), sep(" "), word("היום", "הַיּוֹם")],
+     "עָלָה 3.5 GB הַיּוֹם"),
+    # גרשיים במקור נשמרים, הניקוד מולבש על האותיות
+    ('צה"ל יצא',
+     [word('צה"ל', 'צַהַ"ל'), sep(" "), word("יצא", "יָצָא")],
+     'צַהַ"ל יָצָא'),
+    # דיקטה שינתה כתיב (הוסיפה אם קריאה): מקבלים את הניקוד שלה כמו שהוא
+    ("שמרה עליו",
+     [word("שמרה", "שׁוֹמְרָה"), sep(" "), word("עליו", "עָלָיו")],
+     "שׁוֹמְרָה עָלָיו"),
+]
+
+
+@pytest.mark.parametrize("source, tokens, expected", ALIGN_CASES)
+def test_align_tokens(source, tokens, expected):
+    spans = align_tokens(source, tokens)
+    assert apply_spans(source, spans) == expected
+    # טווחים ממוינים, בלי חפיפות, בתוך המקור
+    assert all(0 <= s < e <= len(source) for s, e, _ in spans)
+    assert all(a[1] <= b[0] for a, b in zip(spans, spans[1:]))
+
+
+def test_align_tokens_spans_cover_their_source_words():
+    source = "ראשון.\nשני ושלישי"
+    tokens = [word("ראשון", "רִאשׁוֹן"), sep(".\n"), word("שני", "שֵׁנִי"), sep(" "), word("ושלישי", "וּ|שְׁלִישִׁי")]
+    spans = align_tokens(source, tokens)
+    assert [source[s:e] for s, e, _ in spans] == ["ראשון", "שני", "ושלישי"]
+    assert all(strip_nikud(v) == source[s:e] for s, e, v in spans)
+
+
+def test_align_tokens_applies_clean():
+    spans = align_tokens("שלום", [word("שלום", "שָׁלוֹם")], clean=strip_nikud)
+    assert spans == [(0, 4, "שלום")]
+
+
+PROJECT_CASES = [
+    ("שלום", "שָׁלוֹם", "שָׁלוֹם"),
+    # תווי המקור (גרש) נשמרים, גם כשבתשובה יש תו אחר במקומם
+    ("צ׳יפס", "צִ'יפְּס", "צִ׳יפְּס"),
+    # ניקוד חלקי במקור מוחלף בניקוד של התשובה
+    ("שָלום", "שָׁלוֹם", "שָׁלוֹם"),
+    # אותיות שונות - הניקוד של דיקטה כמו שהוא
+    ("שמרה", "שׁוֹמְרָה", "שׁוֹמְרָה"),
+    # בלי אותיות עבריות במקור
+    ("123", "123", "123"),
+]
+
+
+@pytest.mark.parametrize("source, vocalized, expected", PROJECT_CASES)
+def test_project_nikud(source, vocalized, expected):
+    assert project_nikud(source, vocalized) == expected
+
+
+@pytest.mark.parametrize("token, expected", [
+    (word("שלום", "שָׁלוֹם", "שְׁלוֹם"), "שָׁלוֹם"),
+    ({"word": "שלום", "options": ["שָׁלוֹם"]}, "שָׁלוֹם"),
+    ({"word": "שלום", "options": [[]]}, ""),
+    ({"word": "שלום"}, ""),
+    ("שלום", ""),
+])
+def test_token_text(token, expected):
+    assert token_text(token) == expected
@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+from src.services.nakdan_client import NakdanClient
+
+
+class ScriptedClient(NakdanClient):
+    """במקום השרת: מחזיר את הסטטוסים לפי הסדר (ואחריהם 200)"""
+
+    def __init__(self, statuses, **kwargs):
+        kwargs.setdefault("rate", 1000.0)
+        kwargs.setdefault("retry_base_delay", 0.001)
+        kwargs.setdefault("retry_max_delay", 0.002)
+        super().__init__(**kwargs)
+        self.statuses = list(statuses)
+        self.sent = 0
+
+    async def send(self, payload, timeout):
+        self.sent += 1
+        status = self.statuses.pop(0) if self.statuses else 200
+        if status == "timeout":
+            raise asyncio.TimeoutError()
+        return status, ([] if status == 200 else None), None
+
+
+def post(client, retries=None):
+    async def run():
+        async with client:
+            return await client.post("שלום", {}, timeout=1, retries=retries)
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("statuses, retries, expected, sent", [
+    # 429 לא נספר בתקציב הניסיונות
+    ([429] * 8, 3, 200, 9),
+    ([429, 503, 429, 503, 429], 3, 200, 6),
+    # תקלות נספרות: ניסיון ראשון ועוד retries
+    ([503] * 10, 3, 503, 4),
+    ([500, 502, 504], 1, 502, 2),
+    ([400], 3, 400, 1),
+])
+def test_retry_budget(statuses, retries, expected, sent):
+    client = ScriptedClient(statuses)
+    status, _ = post(client, retries)
+    assert (status, client.sent) == (expected, sent)
+
+
+def test_timeouts_use_the_retry_budget():
+    client = ScriptedClient(["timeout"] * 5)
+    with pytest.raises(asyncio.TimeoutError):
+        post(client, retries=2)
+    assert client.sent == 3
+
+
+def test_throttling_gives_up_at_the_deadline():
+    client = ScriptedClient([429] * 10000, give_up_after=0.05)
+    status, data = post(client)
+    assert (status, data) == (429, None)
+    assert 3 < client.sent < 10000
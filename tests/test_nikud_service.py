@@ -0,0 +1,44 @@
+import random
+
+import pytest
+
+from src.services.nikud_service import NikudService
+
+pack_batches = NikudService.pack_batches
+
+# (משפטים, תקציב, באצ'ים צפויים)
+PACKING_CASES = [
+    ([], 20, []),
+    (["אבג דהו", "זחט"], 20, [[(0, 0, "אבג דהו"), (1, 0, "זחט")]]),
+    # כל משפט תופס את האורך שלו ועוד תו הפרדה: 10 + 9 + 1 = 20 עדיין נכנס
+    (["א" * 9, "ב" * 9], 20, [[(0, 0, "א" * 9), (1, 0, "ב" * 9)]]),
+    (["א" * 10, "ב" * 10], 20, [[(0, 0, "א" * 10)], [(1, 0, "ב" * 10)]]),
+    # משפט ארוך נחתך ברווח האחרון לפני הגבול; הרווח נשאר בתחילת החתיכה הבאה
+    (["אאאא בבבב גגגג"], 10, [[(0, 0, "אאאא בבבב")], [(0, 9, " גגגג")]]),
+    # בלי רווח - חיתוך קשיח בגבול
+    (["א" * 25], 10, [[(0, 0, "א" * 10)], [(0, 10, "א" * 10)], [(0, 20, "א" * 5)]]),
+    # משפט קצר אחרי חתיכה אחרונה של משפט ארוך נארז איתה
+    (["אאאא בבבב גג", "דד"], 10, [[(0, 0, "אאאא בבבב")], [(0, 9, " גג"), (1, 0, "דד")]]),
+]
+
+
+@pytest.mark.parametrize("sentences, budget, expected", PACKING_CASES)
+def test_pack_batches(sentences, budget, expected):
+    assert pack_batches(sentences, budget) == expected
+
+
+def test_pack_batches_respects_budget_and_offsets():
+    rnd = random.Random(42)
+    words = ["שלום", "עולם", "מה", "נשמע", "בְּרֵאשִׁית", "x" * 30]
+    for _ in range(300):
+        budget = rnd.randint(8, 60)
+        sentences = [" ".join(rnd.choice(words) for _ in range(rnd.randint(1, 15))) + "." for _ in range(rnd.randint(1, 8))]
+        batches = pack_batches(sentences, budget)
+        for batch in batches:
+            # הטקסט שנשלח: החתיכות מופרדות בירידת שורה
+            assert len("\n".join(piece for _, _, piece in batch)) <= budget
+        pieces = [item for batch in batches for item in batch]
+        for idx, sentence in enumerate(sentences):
+            own = [(offset, piece) for i, offset, piece in pieces if i == idx]
+            assert "".join(piece for _, piece in own) == sentence
+            assert all(sentence[offset:offset + len(piece)] == piece for offset, piece in own)
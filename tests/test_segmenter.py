@@ -0,0 +1,81 @@
+import random
+
+import pytest
+
+from benchmarks.segmenter_bench import legacy_split
+from src.utils.segmenter import segment_text, split_sentences, TEXT, PAGE, IMG
+
+TAGGED_CASES = [
+    "ראשון.\n[PAGE:2] \n\n\nשני.",
+    "ראשון. [PAGE:2]\nשני.",
+    "א. \n[PAGE:1]\n[PAGE:2]\n ב.",
+    "א.\n \n[IMG:images/a.png]ב",
+    "[PAGE:1]\n \n[PAGE:2]\nא.",
+    " \n[PAGE:1]א",
+    "א.\n \n[PAGE:1]",
+    "[PAGE:1]\nא.\n\nב.\n[PAGE:2]\nג.",
+    "ראשון.\n\n[IMG:a.png]\n\nשני.\n",
+]
+
+
+def without_tags(sentences):
+    return "".join(s for s in sentences if not s.startswith("["))
+
+
+def assert_same_layout(text):
+    """אותם משפטים ותגיות, ואותו טקסט (כולל רווחים וירידות שורה) כמו בחלוקה הקודמת"""
+    legacy = legacy_split(text)
+    new = split_sentences(text)
+    assert [s for s in new if s.startswith("[")] == [s for s in legacy if s.startswith("[")]
+    assert [s.strip() for s in new if s.strip() and not s.startswith("[")] == \
+           [s.strip() for s in legacy if s.strip() and not s.startswith("[")]
+    assert without_tags(new) == without_tags(legacy)
+
+
+def random_tagged_text(rnd):
+    parts = []
+    for _ in range(rnd.randint(1, 12)):
+        r = rnd.random()
+        if r < 0.2:
+            parts.append(f"[PAGE:{rnd.randint(1, 9)}]")
+        elif r < 0.3:
+            parts.append("[IMG:images/x.png]")
+        elif r < 0.6:
+            parts.append(rnd.choice([" ", "\n", "\n\n", " \n", "\n "]))
+        else:
+            words = " ".join(rnd.choice(["שלום", "עולם", "ספר", "בְּרֵאשִׁית", "3.5"]) for _ in range(rnd.randint(1, 4)))
+            parts.append(" " + words + rnd.choice(["", ".", "?", "!", "..."]))
+    return "".join(parts)
+
+
+@pytest.mark.parametrize("text", TAGGED_CASES)
+def test_tagged_input_matches_legacy_splitter(text):
+    assert_same_layout(text)
+
+
+def test_random_tagged_input_matches_legacy_splitter():
+    rnd = random.Random(1234)
+    for _ in range(2000):
+        assert_same_layout(random_tagged_text(rnd))
+
+
+def test_whitespace_before_tag_is_kept():
+    assert split_sentences("ראשון. [PAGE:2]\nשני.") == ["ראשון. ", "[PAGE:2]", "\nשני."]
+    assert split_sentences("[PAGE:1]\n \n[PAGE:2]\nא.") == ["[PAGE:1]", " \n", "[PAGE:2]", "\nא."]
+
+
+@pytest.mark.parametrize("text", TAGGED_CASES)
+def test_offsets_point_into_the_source(text):
+    segments = segment_text(text)
+    assert all(text[s.start:s.end] == s.text for s in segments)
+    assert all(a.end <= b.start for a, b in zip(segments, segments[1:]))
+
+
+def test_segment_kinds():
+    kinds = [s.kind for s in segment_text("א. [PAGE:1][IMG:a.png]ב.")]
+    assert kinds == [TEXT, PAGE, IMG, TEXT]
+
+
+def test_decimal_point_and_abbreviation_do_not_split():
+    assert split_sentences("עלה ב-3.5 אחוז. ד\"ר כהן אמר מס. 4 ושם נגמר.") == \
+           ["עלה ב-3.5 אחוז.", " ד\"ר כהן אמר מס. 4 ושם נגמר."]
@@ -0,0 +1,53 @@
+import random
+
+import pytest
+
+from src.utils.trigram_index import TrigramIndex, entry_text
+
+LETTERS = "אבגדהוזחטיכלמנסעפצקרשת"
+
+
+def brute_force(values, query):
+    return sorted(k for k, v in values.items() if query in entry_text(k, v))
+
+
+@pytest.fixture
+def values():
+    rnd = random.Random(99)
+    words = {}
+    for _ in range(500):
+        word = "".join(rnd.choice(LETTERS) for _ in range(rnd.randint(1, 6)))
+        words[word] = "".join(c + "ַ" for c in word) if rnd.random() < 0.5 else rnd.choice(LETTERS) + word
+    return words
+
+
+QUERIES = ["א", "ש", "אב", "שת", "גדה", "אבג", "ת", "זז"]
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_search_matches_brute_force(values, query):
+    assert TrigramIndex(values.items()).search(query) == brute_force(values, query)
+
+
+def test_short_queries_follow_add_and_remove(values):
+    index = TrigramIndex(values.items())
+    index.search("א")  # בונה את הרשימות, כדי שהעדכונים יהיו נקודתיים
+    rnd = random.Random(5)
+    for _ in range(200):
+        key = rnd.choice(list(values))
+        if rnd.random() < 0.4:
+            index.remove(key)
+            del values[key]
+        else:
+            values[key] = rnd.choice(LETTERS) + rnd.choice(LETTERS)
+            index.add(key, values[key])
+        if not values: break
+    for query in QUERIES:
+        assert index.search(query) == brute_force(values, query)
+
+
+def test_separator_is_not_searchable():
+    index = TrigramIndex([("אב", "גד")])
+    assert index.search("בג") == []
+    assert index.search("ב") == ["אב"]
+    assert index.search("ג") == ["אב"]
@@ -3,8 +3,8 @@ import os
 import io
 import asyncio
 import re
+import copy
 import json
-import edge_tts
 import tempfile
 import PyPDF2
 import difflib # חובה בשביל לתקן את הבאג של המילים הלא תואמות
@@ -18,6 +18,7 @@ import hashlib
 import time  # וודא שביצעת import time למעלה בקובץ
 import asyncio
 import random
+import bisect
 from pdf2image import convert_from_path  # <--- התיקון לשגיאה שלך
 from PIL import Image as PILImage
 import concurrent.futures
@@ -34,11 +35,20 @@ from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QH
                              QProgressBar, QLineEdit, QMessageBox, QFrame, QCheckBox, QGroupBox, 
                              QTabWidget, QSpinBox, QTableWidget, QTableWidgetItem, QHeaderView, 
                              QDialog, QInputDialog, QSlider, QListWidget, QListWidgetItem, QColorDialog,
-                             QStyleOptionSlider, QStyle, QShortcut, QTreeWidget, QTreeWidgetItem) # <-- הוספנו את השניים האלו בסוף
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QUrl, QBuffer, QIODevice, QByteArray, QTime, QTimer, QEvent, QObject
+                             QStyleOptionSlider, QStyle, QShortcut, QTreeWidget, QTreeWidgetItem,
+                             QTableView, QStyledItemDelegate) # <-- הוספנו את השניים האלו בסוף
+from PyQt5.QtCore import Qt, QThread, pyqtSignal, QUrl, QBuffer, QIODevice, QByteArray, QTime, QTimer, QEvent, QObject, QAbstractTableModel, QModelIndex
 from PyQt5.QtGui import QFont, QTextCursor, QTextCharFormat, QIcon, QTextBlockFormat
 from src.workers.tts_worker import TTSWorker
 from src.workers.nikud_worker import NikudWorker
+from src.utils.tts_backends import get_backend, pcm_to_wav_bytes
+from src.utils.segmenter import split_chapters
+from src.utils.pdf_text import extract_pdf_text
+from src.utils.dictionary_matcher import apply_dictionary, MATCH_TYPES
+from src.utils.trigram_index import TrigramIndex
+from src.utils.dictionary_io import sanitization_reason, clean_key, import_file, write_entries
+from src.utils.dictionary_store import DictionaryStore, PersistentList, STORE_KEYS
+from src.utils.settings_writer import SettingsWriter
 
 class ProcessingWorker(QObject):
     finished = pyqtSignal()
@@ -59,6 +69,7 @@ class ProcessingWorker(QObject):
 # --- קובץ הגדרות ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 CONFIG_FILE = os.path.join(BASE_DIR, "config.json")
+DICTIONARY_DB_FILE = os.path.join(BASE_DIR, "dictionary.db")
 
 
 # --- ברירת מחדל ---
@@ -68,6 +79,10 @@ DEFAULT_SETTINGS = {
     "pause_comma": 250,
     "pause_sentence": 600,
     "max_concurrent": 50,
+    "tts_backend": "edge-tts",
+    "tts_fallback_backend": "",
+    "audio_cache_enabled": True,
+    "audio_cache_max_mb": 2048,
     "custom_symbols": {"***": 1000},
     "nikud_dictionary": {}
 }
@@ -239,65 +254,15 @@ def crop_illustration_only(image_path):
         print(f"Crop Error: {e}")
         return False
     
-def merge_nikud_preserving_spaces(original_text, nikud_tokens):
-    """
-    ממזג את רשימת המילים המנוקדות (nikud_tokens) לתוך הטקסט המקורי,
-    תוך שמירה קפדנית על רווחים, ירידות שורה וסימני פיסוק מהמקור.
-    """
-    # יצירת תור של מילים מנוקדות
-    tokens_queue = list(nikud_tokens)
-    tokens_index = 0
-    
-    # פיצול הטקסט המקורי לפי מילים עבריות, תוך שמירה על המפרידים (רווחים וכו')
-    # הביטוי הרגולרי תופס רצף של אותיות עבריות או רצף של תווים שאינם עברית
-    parts = re.split(r'([\u0590-\u05FF]+)', original_text)
-    
-    final_output = []
-    
-    for part in parts:
-        if not part: continue
-        
-        # אם החלק הוא מילה בעברית (לפי טווח יוניקוד)
-        if re.match(r'[\u0590-\u05FF]+', part):
-            # אנחנו צריכים למצוא את המילים המנוקדות שמרכיבות את המילה הזו
-            # (לפעמים דיקטה מפצל מילה כמו "וכשבבית" ל-"ו", "כש", "ב", "בית")
-            
-            built_word = ""
-            base_letters_count = 0
-            target_length = len(part) # אורך המילה המקורית (ללא ניקוד כי היא מהמקור)
-            
-            while base_letters_count < target_length and tokens_index < len(tokens_queue):
-                next_token = tokens_queue[tokens_index]
-                tokens_index += 1
-                
-                built_word += next_token
-                
-                # בדיקה כמה אותיות בסיס יש בטוקן הזה כדי לדעת מתי עברנו את המילה המקורית
-                clean_token = "".join([c for c in next_token if 'א' <= c <= 'ת'])
-                base_letters_count += len(clean_token)
-            
-            final_output.append(built_word)
-        else:
-            # אם זה רווח, ירידת שורה, פסיק או אנגלית - שומרים כמו שהוא
-            final_output.append(part)
-            
-    return "".join(final_output)
+# --- סוגי התאמה במילון (לפי הסדר בתיבות הבחירה) ---
+# "prefix" מטופל במנוע ההתאמה: מילה שלמה עם או בלי תחיליות משה וכלב (גם מצטברות)
+MATCH_TYPE_LABELS = ["חלקי (חכם)", "מדויק בלבד", "עם תחיליות (ו/ה/ב/ל/כ/ש/מ)"]
 
+def match_type_from_index(index):
+    return MATCH_TYPES[index] if 0 <= index < len(MATCH_TYPES) else "partial"
 
-# --- לוגיקה חכמה לטיפול בתחיליות (משה וכלב) ---
-def apply_smart_replacement(text, base_word, target_vocalization):
-    """
-    מחליפה את base_word ב-target_vocalization בתוך הטקסט,
-    תוך התעלמות (ושימור) של תחיליות כמו ו', ה', ב', ל' וכו'.
-    """
-    word_pattern = ""
-    for char in base_word:
-        word_pattern += re.escape(char) + r'[\u0591-\u05C7]*'
-
-    prefix_pattern = r'([משוהכלב][\u0591-\u05C7]*)*'
-    full_regex = r'(?<![\w\u0590-\u05FF])(' + prefix_pattern + ')' + word_pattern + r'(?![\w\u0590-\u05FF])'
-
-    return re.sub(full_regex, r'\1' + target_vocalization, text)
+def match_type_index(match_type):
+    return MATCH_TYPES.index(match_type) if match_type in MATCH_TYPES else 0
 
 def remove_nikud(text):
     normalized = unicodedata.normalize('NFD', text)
@@ -515,7 +480,7 @@ class NikudTextEdit(QTextEdit):
         print(f"[DEBUG-EDITOR] add_to_dictionary_direct called for '{original}'")
         if not self.parent_window: return
         
-        match_type = "exact" if match_index == 1 else "partial"
+        match_type = match_type_from_index(match_index)
         
         if hasattr(self.parent_window, 'add_or_update_word'):
             # העורך שולח את המילה המקורית (מהטקסט) ואת התיקון
@@ -821,15 +786,6 @@ class AnalysisDialog(QDialog):
         normalized = unicodedata.normalize('NFD', text)
         return "".join([c for c in normalized if not unicodedata.combining(c)])
 
-    def get_regex_pattern(self, word):
-        pattern = ""
-        for char in word:
-            if 'א' <= char <= 'ת':
-                pattern += re.escape(char) + r'[\u0591-\u05C7]*'
-            else:
-                pattern += re.escape(char)
-        return pattern
-
     def open_editor_dialog(self, row, column):
         if column == 4:
             item = self.table.item(row, column)
@@ -879,7 +835,7 @@ class AnalysisDialog(QDialog):
             
             self.add_play_button(i, 5, vocalized)
 
-            cmb = QComboBox(); cmb.addItems(["חלקי (חכם)", "מדויק בלבד"]); cmb.setStyleSheet("QComboBox { font-size: 12px; padding: 2px; }"); cmb.setCurrentIndex(0)
+            cmb = QComboBox(); cmb.addItems(MATCH_TYPE_LABELS); cmb.setStyleSheet("QComboBox { font-size: 12px; padding: 2px; }"); cmb.setCurrentIndex(0)
             container = QWidget(); layout = QHBoxLayout(container); layout.setContentsMargins(2,0,2,0); layout.setAlignment(Qt.AlignCenter); layout.addWidget(cmb)
             self.table.setCellWidget(i, 6, container)
             
@@ -919,12 +875,13 @@ class AnalysisDialog(QDialog):
             voice_name = self.parent_window.combo_he.currentText()
             voice_id = self.parent_window.he_voices.get(voice_name, "he-IL-AvriNeural")
             speed = self.parent_window.combo_speed.currentText()
-            unique_str = f"{text}_{voice_id}_{speed}"
+            backends = self.parent_window.preview_backend_options()
+            unique_str = f"{text}_{voice_id}_{speed}_{backends['backend_name']}"
             cache_key = hashlib.md5(unique_str.encode('utf-8')).hexdigest()
             if hasattr(self.parent_window, 'table_nikud') and cache_key in self.parent_window.table_nikud.memory_cache:
                 self.play_bytes(self.parent_window.table_nikud.memory_cache[cache_key])
                 return
-            worker = AudioPreviewWorker(cache_key, text, voice_id, speed)
+            worker = AudioPreviewWorker(cache_key, text, voice_id, speed, **backends)
             self.current_worker = worker 
             worker.finished_data.connect(self.on_audio_ready)
             worker.start()
@@ -955,8 +912,8 @@ class AnalysisDialog(QDialog):
                     cell_widget = self.table.cellWidget(row, 6)
                     if cell_widget:
                         combo = cell_widget.findChild(QComboBox)
-                        if combo and combo.currentIndex() == 1:
-                            match_type = "exact"
+                        if combo:
+                            match_type = match_type_from_index(combo.currentIndex())
                     
                     self.parent_window.settings["nikud_dictionary"][key] = new_val
                     if "nikud_metadata" not in self.parent_window.settings:
@@ -995,42 +952,15 @@ class AnalysisDialog(QDialog):
                 cell_widget = self.table.cellWidget(row, 6)
                 if cell_widget:
                     combo = cell_widget.findChild(QComboBox)
-                    if combo.currentIndex() == 1: match_type = "exact"
+                    if combo: match_type = match_type_from_index(combo.currentIndex())
                 
                 all_replacements[key] = (val, match_type)
 
-            # מיון מפתחות
-            sorted_keys = sorted(all_replacements.keys(), key=len, reverse=True)
-            
-            token_map = {}
-            token_counter = 0
-            
-            # החלפה לטוקנים
-            for base_word in sorted_keys:
-                target, match_type = all_replacements[base_word]
-                pattern_str = self.get_regex_pattern(base_word)
-                
-                token = f"__TOK_{token_counter}__"
-                token_map[token] = target
-                token_counter += 1
-                
-                try:
-                    if match_type == "exact":
-                        regex = r'(?<![\w\u0590-\u05FF])' + pattern_str + r'(?![\w\u0590-\u05FF])'
-                        new_text, count = re.subn(regex, token, current_text)
-                    else:
-                        new_text, count = re.subn(pattern_str, token, current_text)
-                    
-                    if count > 0:
-                        current_text = new_text
-                except Exception as ex:
-                    print(f"[DEBUG] Regex Error: {ex}")
-
-            # שחזור טוקנים
-            print("[DEBUG] Restoring tokens to final text...")
-            for token, final_val in token_map.items():
-                if token in current_text:
-                    current_text = current_text.replace(token, final_val)
+            # החלפה במעבר יחיד - מה שכבר הוחלף לא נסרק שוב
+            replacements = {k: v for k, (v, _) in all_replacements.items()}
+            replacement_meta = {k: {"match_type": m_type} for k, (_, m_type) in all_replacements.items()}
+            current_text, count = apply_dictionary(current_text, replacements, replacement_meta)
+            print(f"[DEBUG] Applied {count} replacements")
             
             # === התיקון הקריטי: שימוש ב-set_text_safe במקום setPlainText ===
             if self.parent_window:
@@ -1076,12 +1006,14 @@ class AudioPreviewWorker(QThread):
     # האות מחזיר כעת שני דברים: את המפתח הייחודי ואת המידע עצמו
     finished_data = pyqtSignal(str, bytes) 
 
-    def __init__(self, cache_key, text, voice, speed):
+    def __init__(self, cache_key, text, voice, speed, backend_name=None, fallback_name=None):
         super().__init__()
         self.cache_key = cache_key
         self.text = text
         self.voice = voice
         self.speed = speed
+        self.backend = get_backend(backend_name)
+        self.fallback_backend = get_backend(fallback_name) if fallback_name else None
 
     def run(self):
         loop = asyncio.new_event_loop()
@@ -1089,14 +1021,24 @@ class AudioPreviewWorker(QThread):
         loop.run_until_complete(self.generate())
         loop.close()
 
+    async def synthesize_playable(self, backend):
+        """מסנתז ומחזיר בתים שהנגן יודע לנגן (MP3, או WAV עבור מנועי PCM)"""
+        data = await backend.synthesize(self.text, self.voice, self.speed)
+        if data and backend.audio_format == "pcm":
+            data = pcm_to_wav_bytes(data)
+        return data
+
     async def generate(self):
         try:
-            data = b""
-            communicate = edge_tts.Communicate(self.text, self.voice, rate=self.speed)
-            
-            async for chunk in communicate.stream():
-                if chunk["type"] == "audio":
-                    data += chunk["data"]
+            try:
+                data = await self.synthesize_playable(self.backend)
+            except OSError as e:
+                # אין חיבור לשירות - השמעה דרך המנוע המקומי
+                if not self.fallback_backend: raise
+                print(f"[DEBUG] Preview falling back to {self.fallback_backend.name}: {e}")
+                data = await self.synthesize_playable(self.fallback_backend)
+                # מפתח נפרד, כדי שהשמעה חוזרת לא תיקח מהמטמון בזיכרון את אודיו הגיבוי במקום הקול האמיתי
+                self.cache_key = f"{self.cache_key}:{self.fallback_backend.name}"
             
             # החזרת המפתח והמידע
             self.finished_data.emit(self.cache_key, data)
@@ -2211,7 +2153,7 @@ class ErrorsTableWidget(QTableWidget):
                 item = self.item(r, 2)
                 if item and item.text().strip() and item.text() != "טוען...":
                     new_errors.append(item.text().strip())
-            main.settings["nikud_errors"] = new_errors
+            main.set_errors_list(new_errors)
             main.save_settings()
 
     def load_data(self, errors_list):
@@ -2351,22 +2293,218 @@ class ErrorsTableWidget(QTableWidget):
         if not text: return ""
         normalized = unicodedata.normalize('NFD', text)
         return "".join([c for c in normalized if not unicodedata.combining(c)])
-class PasteableTableWidget(QTableWidget):
-    """טבלה משודרגת עם תיקון שמירה אוטומטית"""
+class DictionaryTableModel(QAbstractTableModel):
+    """
+    מודל לטבלת המילון: מחזיק רק רשימה ממוינת של מפתחות, והתאים נקראים ישירות מ-settings
+    בזמן הציור. אין פריט או ווידג'ט לכל שורה, כך שגם מילון של 100 אלף מילים נטען מיד
+    והזיכרון לא גדל. Qt מבקש רק את השורות שנראות על המסך.
+    הסינון עובר דרך TrigramIndex (חיפוש תת-מחרוזת בלי ניקוד), שמתעדכן מילה-מילה.
+    """
+    COL_WORD, COL_PLAY_WORD, COL_VOCALIZED, COL_PLAY_VOCALIZED, COL_MATCH, COL_DATE = range(6)
+    HEADERS = ["מילה בטקסט", "🔊", "תיקון (מנוקד)", "🔊", "סוג התאמה", "תאריך"]
+
+    # שינוי שהמשתמש ביצע בטבלה: (מפתח, ניקוד, סוג התאמה)
+    word_edited = pyqtSignal(str, str, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._settings = {}
+        self._index = TrigramIndex()
+        self._rows = []       # המפתחות שמוצגים (אחרי סינון), ממוינים
+        self._query = ""
+
+    # --- גישה לנתונים ---
+    def dictionary(self):
+        return self._settings.get("nikud_dictionary", {})
+
+    def metadata(self):
+        return self._settings.get("nikud_metadata", {})
+
+    def load(self, settings):
+        self.beginResetModel()
+        self._settings = settings
+        self._index.build(self.dictionary().items())
+        self._index.warm_up()
+        self._rows = self._index.search(self._query)
+        self.endResetModel()
+
+    def key_at(self, row):
+        return self._rows[row] if 0 <= row < len(self._rows) else None
+
+    def row_of(self, key):
+        """מיקום השורה של המפתח (חיפוש בינארי ברשימה הממוינת), או -1"""
+        if not self._query:
+            return self._index.position(key)
+        pos = bisect.bisect_left(self._rows, key)
+        return pos if pos < len(self._rows) and self._rows[pos] == key else -1
+
+    # --- סינון ---
+    def set_filter(self, query):
+        query = query.strip()
+        if query == self._query: return
+        self.beginResetModel()
+        self._query = query
+        self._rows = self._index.search(query)
+        self.endResetModel()
+
+    # --- עדכונים נקודתיים (בלי לבנות את הטבלה מחדש) ---
+    def upsert(self, key):
+        """מפתח נוסף או השתנה במילון: מוסיף שורה במקום הממוין או מרענן את הקיימת. מחזיר את השורה"""
+        row = self.row_of(key)
+        self._index.add(key, self.dictionary().get(key, ""))
+        if row >= 0:
+            self.dataChanged.emit(self.index(row, 0), self.index(row, self.columnCount() - 1))
+        elif self._index.matches(key, self._query):
+            row = bisect.bisect_left(self._rows, key)
+            self.beginInsertRows(QModelIndex(), row, row)
+            self._rows.insert(row, key)
+            self.endInsertRows()
+        return row
+
+    def remove_keys(self, keys):
+        for key in keys:
+            row = self.row_of(key)
+            if row >= 0:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self._rows[row]
+                self._index.remove(key)
+                self.endRemoveRows()
+            else:
+                self._index.remove(key)
+
+    # --- ממשק QAbstractTableModel ---
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid(): return None
+        key = self._rows[index.row()]
+        col = index.column()
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            if col == self.COL_WORD: return key
+            if col == self.COL_VOCALIZED: return self.dictionary().get(key, "")
+            if col == self.COL_MATCH:
+                match_type = (self.metadata().get(key) or {}).get("match_type", "partial")
+                return match_type if role == Qt.EditRole else MATCH_TYPE_LABELS[match_type_index(match_type)]
+            if col == self.COL_DATE: return (self.metadata().get(key) or {}).get("date", "-")
+        elif role == Qt.TextAlignmentRole and col in (self.COL_MATCH, self.COL_DATE):
+            return Qt.AlignCenter
+        return None
+
+    def flags(self, index):
+        if not index.isValid(): return Qt.NoItemFlags
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        if index.column() in (self.COL_VOCALIZED, self.COL_MATCH):
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or role != Qt.EditRole: return False
+        key = self._rows[index.row()]
+        vocalized = self.dictionary().get(key, "")
+        match_type = (self.metadata().get(key) or {}).get("match_type", "partial")
+        if index.column() == self.COL_VOCALIZED:
+            vocalized = str(value).strip()
+            # אם מחקת את הניקוד לגמרי, לא נשמור מילה ריקה
+            if not vocalized: return False
+        elif index.column() == self.COL_MATCH:
+            match_type = value
+        else:
+            return False
+        print(f"[DEBUG-TABLE] Saving update for '{key}' -> '{vocalized}' ({match_type})")
+        self.word_edited.emit(key, vocalized, match_type)
+        self.upsert(key)
+        return True
+
+
+class PlayButtonDelegate(QStyledItemDelegate):
+    """מצייר כפתור השמעה בתא (בלי ווידג'ט אמיתי) ומדווח על לחיצה"""
+    clicked = pyqtSignal(QModelIndex)
+
+    def paint(self, painter, option, index):
+        painter.save()
+        if option.state & QStyle.State_Selected:
+            painter.fillRect(option.rect, option.palette.highlight())
+        font = painter.font(); font.setPointSize(12); painter.setFont(font)
+        if option.state & QStyle.State_MouseOver:
+            painter.setPen(QColor("#27AE60"))
+        painter.drawText(option.rect, Qt.AlignCenter, "🔊")
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            self.clicked.emit(index)
+            return True
+        return False
+
+
+class MatchTypeDelegate(QStyledItemDelegate):
+    """עורך סוג ההתאמה: קומבו בוקס שנוצר רק בזמן העריכה, ושומר מיד עם הבחירה"""
+
+    def createEditor(self, parent, option, index):
+        combo = QComboBox(parent)
+        combo.addItems(MATCH_TYPE_LABELS)
+        combo.setStyleSheet("QComboBox { font-size: 13px; padding: 4px; margin: 2px; }")
+        combo.activated.connect(lambda _: self.commit_and_close(combo))
+        return combo
+
+    def commit_and_close(self, combo):
+        self.commitData.emit(combo)
+        self.closeEditor.emit(combo)
+
+    def setEditorData(self, editor, index):
+        editor.setCurrentIndex(match_type_index(index.data(Qt.EditRole)))
+        QTimer.singleShot(0, editor.showPopup)
+
+    def setModelData(self, editor, model, index):
+        match_type = match_type_from_index(editor.currentIndex())
+        if match_type != index.data(Qt.EditRole):
+            model.setData(index, match_type, Qt.EditRole)
+
+    def updateEditorGeometry(self, editor, option, index):
+        editor.setGeometry(option.rect)
+
+
+class DictionaryTableView(QTableView):
+    """טבלת המילון האישי (מודל/תצוגה) עם שמירה אוטומטית של עריכות"""
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setLayoutDirection(Qt.RightToLeft)
         self.memory_cache = {}
         self.active_workers = [] 
         self.player = QMediaPlayer()
-        
+
+        self.dict_model = DictionaryTableModel(self)
+        self.setModel(self.dict_model)
+        self.dict_model.word_edited.connect(self.on_word_edited)
+
+        # כפתורי השמעה מצוירים ועורך קומבו לפי דרישה
+        self.play_delegate = PlayButtonDelegate(self)
+        self.play_delegate.clicked.connect(self.on_play_clicked)
+        self.setItemDelegateForColumn(DictionaryTableModel.COL_PLAY_WORD, self.play_delegate)
+        self.setItemDelegateForColumn(DictionaryTableModel.COL_PLAY_VOCALIZED, self.play_delegate)
+        self.match_delegate = MatchTypeDelegate(self)
+        self.setItemDelegateForColumn(DictionaryTableModel.COL_MATCH, self.match_delegate)
+        self.setMouseTracking(True)
+
         # הגדרות בחירה
-        self.setSelectionBehavior(QTableWidget.SelectRows)
-        self.setSelectionMode(QTableWidget.ExtendedSelection)
-        
-        # חיבור לאירוע שינוי
-        self.itemChanged.connect(self.on_item_changed)
-        self.cellDoubleClicked.connect(self.open_big_editor)
+        self.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.setEditTriggers(QAbstractItemView.EditKeyPressed | QAbstractItemView.AnyKeyPressed)
+        # שורות בגובה אחיד: אין מדידה של כל שורה בטעינה
+        self.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.verticalHeader().setDefaultSectionSize(36)
+
+        self.clicked.connect(self.on_cell_clicked)
+        self.doubleClicked.connect(self.open_big_editor)
 
     def find_main_window(self):
         """פונקציית עזר למציאת החלון הראשי"""
@@ -2377,175 +2515,72 @@ class PasteableTableWidget(QTableWidget):
             parent = parent.parent()
         return None
 
-    def on_item_changed(self, item):
-        # אם אנחנו באמצע עדכון תוכנתי - מתעלמים כדי לא ליצור לולאה
-        if self.signalsBlocked(): return
+    def load(self, settings):
+        self.dict_model.load(settings)
 
-        row = item.row()
-        col = item.column()
-        
-        print(f"[DEBUG-TABLE] Change detected at Row {row}, Col {col}. Text: '{item.text()}'")
+    def upsert_key(self, key):
+        return self.dict_model.upsert(key)
 
-        base_item = self.item(row, 0)
-        voc_item = self.item(row, 2)
-        
-        if not base_item: return
-        base_word = base_item.text().strip()
-        
-        # 1. זיהוי מילה חדשה (עמודה 0) -> ניקוד אוטומטי
-        if col == 0 and base_word:
-            if not voc_item or not voc_item.text().strip():
-                print(f"[DEBUG-TABLE] New word detected. Sending to Auto-Nikud...")
-                self.auto_nikud_single_word(base_word, row)
-                return
+    def select_key(self, key):
+        """מסמן את השורה של המפתח וגולל אליה. מחזיר את השורה או -1"""
+        row = self.dict_model.row_of(key)
+        if row >= 0:
+            index = self.dict_model.index(row, 0)
+            self.setCurrentIndex(index)
+            self.scrollTo(index, QAbstractItemView.PositionAtCenter)
+        return row
+
+    def on_word_edited(self, key, vocalized_word, match_type):
+        main_window = self.find_main_window()
+        if main_window:
+            # חשוב מאוד: update_table_ui=False - המודל כבר מציג את השינוי
+            main_window.add_or_update_word(key, vocalized_word, match_type, update_table_ui=False)
+        else:
+            print("[ERROR] Could not find Main Window to save settings!")
 
-        # 2. זיהוי עריכת ניקוד (עמודה 2) -> שמירה
-        if col == 2:
-            vocalized_word = item.text().strip() # לוקחים את הטקסט העדכני מהתא שערכת
-            
-            # אם מחקת את הניקוד לגמרי, לא נשמור מילה ריקה
-            if not vocalized_word: return
-
-            print(f"[DEBUG-TABLE] Saving update for '{base_word}' -> '{vocalized_word}'")
-            
-            # בדיקת סוג ההתאמה
-            match_type = "partial"
-            cell_widget = self.cellWidget(row, 4)
-            if cell_widget:
-                combo = cell_widget.findChild(QComboBox)
-                if combo: match_type = "exact" if combo.currentIndex() == 1 else "partial"
-            
-            # קריאה לחלון הראשי
-            main_window = self.find_main_window()
-            if main_window:
-                # חשוב מאוד: update_table_ui=False
-                # כי אנחנו כבר רואים את השינוי בטבלה (אנחנו כתבנו אותו!)
-                main_window.add_or_update_word(base_word, vocalized_word, match_type, update_table_ui=False)
-            else:
-                print("[ERROR] Could not find Main Window to save settings!")
+    def on_cell_clicked(self, index):
+        # קליק אחד על סוג ההתאמה פותח מיד את הקומבו
+        if index.column() == DictionaryTableModel.COL_MATCH:
+            self.edit(index)
 
-    def open_big_editor(self, row, column):
-        if column == 2: # עריכת המילה המנוקדת
-            item = self.item(row, column)
-            current_text = item.text() if item else ""
-            
-            # הנחה: הדיאלוג מוגדר בקובץ
-            # אנחנו צריכים להעביר את החלון הראשי כהורה או למצוא אותו בתוך הדיאלוג
-            main_win = self.find_main_window()
-            dialog = NikudEditorDialog(current_text, self) 
-            
-            # "הזרקת" החלון הראשי לדיאלוג כדי שהשמע יעבוד
-            dialog.parent_window = main_win 
-            
-            if dialog.exec_() == QDialog.Accepted:
-                new_text = dialog.get_text()
-                self.blockSignals(True) # חוסמים כדי ש-on_item_changed לא יקפוץ כפול
-                self.setItem(row, column, QTableWidgetItem(new_text))
-                self.blockSignals(False)
-                
-                # עכשיו קוראים ידנית לשמירה
-                # אנחנו מדמים כאילו ItemChanged קרה
-                self.on_item_changed(self.item(row, column))
+    def open_big_editor(self, index):
+        if index.column() != DictionaryTableModel.COL_VOCALIZED: return
+        current_text = index.data(Qt.EditRole) or ""
 
-    def auto_nikud_single_word(self, word, row):
-        # מניח ש-NikudWorker קיים בקובץ
-        worker = NikudWorker(word)
-        self.active_workers.append(worker)
-        worker.finished.connect(lambda res: self.fill_nikud_result(res, row))
-        worker.finished.connect(lambda: self.cleanup_worker(worker))
-        worker.start()
+        main_win = self.find_main_window()
+        dialog = NikudEditorDialog(current_text, self) 
+        # "הזרקת" החלון הראשי לדיאלוג כדי שהשמע יעבוד
+        dialog.parent_window = main_win 
+
+        if dialog.exec_() == QDialog.Accepted:
+            self.dict_model.setData(index, dialog.get_text(), Qt.EditRole)
 
     def cleanup_worker(self, worker):
         if worker in self.active_workers:
             self.active_workers.remove(worker)
 
-    def fill_nikud_result(self, result_text, row):
-        # ממלא את התא ושומר
-        self.blockSignals(True)
-        self.setItem(row, 2, QTableWidgetItem(result_text))
-        
-        # וידוא כפתורים
-        if self.cellWidget(row, 1) is None: self.set_play_button(row, 1)
-        if self.cellWidget(row, 3) is None: self.set_play_button(row, 3)
-        
-        self.blockSignals(False)
-        
-        # שמירה אוטומטית אחרי שהניקוד הגיע
-        self.on_item_changed(self.item(row, 2))
-
-    # --- פונקציות עזר קיימות (ללא שינוי, רק מוודא שהן כאן) ---
     def delete_selected_rows(self):
-        rows = sorted(set(index.row() for index in self.selectedIndexes()), reverse=True)
+        rows = sorted(set(index.row() for index in self.selectionModel().selectedRows()))
         if not rows: return
-        
-        # מחיקה מהזיכרון ומהקובץ
+        keys = [self.dict_model.key_at(r) for r in rows]
+
+        # מחיקה מהזיכרון ומהמסד
         main_win = self.find_main_window()
         if main_win:
             current_dict = main_win.settings.get("nikud_dictionary", {})
-            for r in rows:
-                item = self.item(r, 0)
-                if item:
-                    key = main_win.clean_nikud_from_string(item.text())
-                    if key in current_dict:
-                        del current_dict[key]
-            
+            metadata = main_win.settings.get("nikud_metadata", {})
+            for key in keys:
+                if key in current_dict: del current_dict[key]
+                if key in metadata: del metadata[key]
             main_win.save_settings() # שמירה אחרי המחיקה
-            
-        for r in rows:
-            self.removeRow(r)
 
-    def add_row_with_data(self, base_word, vocalized_word, date_str=None, match_type="partial"):
-        self.blockSignals(True)
-        row = self.rowCount()
-        self.insertRow(row)
-        
-        self.setItem(row, 0, QTableWidgetItem(base_word))
-        self.set_play_button(row, 1)
-        self.setItem(row, 2, QTableWidgetItem(vocalized_word))
-        self.set_play_button(row, 3)
-
-        cmb_match = QComboBox()
-        cmb_match.addItems(["חלקי (חכם)", "מדויק בלבד"])
-        cmb_match.setCurrentIndex(1 if match_type == "exact" else 0)
-        cmb_match.setStyleSheet("QComboBox { font-size: 13px; padding: 4px; margin: 2px; }")
-        # חיבור לאירוע שינוי בקומבו בוקס לשמירה מיידית
-        cmb_match.currentIndexChanged.connect(lambda: self.on_combo_changed(row))
-        
-        container = QWidget(); layout = QHBoxLayout(container); layout.setContentsMargins(5, 0, 5, 0); layout.setAlignment(Qt.AlignCenter)
-        layout.addWidget(cmb_match)
-        self.setCellWidget(row, 4, container)
-
-        if not date_str: date_str = datetime.now().strftime("%d/%m/%Y")
-        item_date = QTableWidgetItem(date_str)
-        item_date.setFlags(Qt.ItemIsEnabled | Qt.ItemIsSelectable)
-        self.setItem(row, 5, item_date)
-        
-        self.blockSignals(False)
-
-    def on_combo_changed(self, row):
-        """שמירה כשמשנים את סוג ההתאמה בקומבו בוקס"""
-        # מדמים שינוי בטבלה כדי להפעיל את מנגנון השמירה
-        item = self.item(row, 2)
-        if item: self.on_item_changed(item)
-
-    def set_play_button(self, row, col):
-        container = QWidget(); layout = QHBoxLayout(container); layout.setContentsMargins(0,0,0,0); layout.setAlignment(Qt.AlignCenter)
-        btn = QPushButton("🔊"); btn.setFixedSize(30, 30); btn.setCursor(Qt.PointingHandCursor)
-        btn.setStyleSheet("QPushButton { background-color: transparent; border: none; font-size: 16px; } QPushButton:hover { color: #27AE60; }")
-        btn.clicked.connect(self.on_play_clicked)
-        layout.addWidget(btn)
-        self.setCellWidget(row, col, container)
+        self.clearSelection()
+        self.dict_model.remove_keys(keys)
 
-    def on_play_clicked(self):
-        btn = self.sender()
-        if not btn: return
-        index = self.indexAt(btn.parent().pos())
-        if not index.isValid(): return
-        
+    def on_play_clicked(self, index):
         # מנגן את הטקסט בעמודה המתאימה (0 או 2)
-        text_col = 0 if index.column() == 1 else 2
-        item = self.item(index.row(), text_col)
-        if item: self.play_preview(item.text())
+        text_col = DictionaryTableModel.COL_WORD if index.column() == DictionaryTableModel.COL_PLAY_WORD else DictionaryTableModel.COL_VOCALIZED
+        self.play_preview(self.dict_model.index(index.row(), text_col).data())
 
     def play_preview(self, text):
         if not text: return
@@ -2556,15 +2591,16 @@ class PasteableTableWidget(QTableWidget):
             voice_name = main_win.combo_he.currentText()
             voice_id = main_win.he_voices.get(voice_name, "he-IL-AvriNeural")
             speed = main_win.combo_speed.currentText()
+            backends = main_win.preview_backend_options()
             
-            unique_str = f"{text}_{voice_id}_{speed}"
+            unique_str = f"{text}_{voice_id}_{speed}_{backends['backend_name']}"
             cache_key = hashlib.md5(unique_str.encode('utf-8')).hexdigest()
             
             if cache_key in self.memory_cache:
                 self.play_bytes(self.memory_cache[cache_key])
                 return
             
-            worker = AudioPreviewWorker(cache_key, text, voice_id, speed)
+            worker = AudioPreviewWorker(cache_key, text, voice_id, speed, **backends)
             self.active_workers.append(worker)
             worker.finished_data.connect(self.on_download_complete)
             worker.finished_data.connect(lambda: self.cleanup_worker(worker))
@@ -2585,14 +2621,7 @@ class PasteableTableWidget(QTableWidget):
         except: pass
 
     def filter_rows(self, query):
-        query = query.strip()
-        for row in range(self.rowCount()):
-            if not query:
-                self.setRowHidden(row, False); continue
-            
-            t1 = self.item(row, 0).text() if self.item(row, 0) else ""
-            t2 = self.item(row, 2).text() if self.item(row, 2) else ""
-            self.setRowHidden(row, not (query in t1 or query in t2))
+        self.dict_model.set_filter(query)
 
 
 class NikudKeyboard(QDialog):
@@ -2702,7 +2731,7 @@ class NikudEditorDialog(QDialog):
         self.chk_add_to_dict.setStyleSheet("font-size: 14px; font-weight: bold; color: #2C3E50;")
         
         self.combo_match_type = QComboBox()
-        self.combo_match_type.addItems(["התאמה חלקית (חכם)", "התאמה מדויקת בלבד"])
+        self.combo_match_type.addItems(["התאמה חלקית (חכם)", "התאמה מדויקת בלבד", "התאמה עם תחיליות (ו/ה/ב/ל/כ/ש/מ)"])
         self.combo_match_type.setStyleSheet("font-size: 13px;")
         
         dict_layout.addWidget(self.chk_add_to_dict)
@@ -2818,11 +2847,12 @@ class NikudEditorDialog(QDialog):
                 voice_name = main_win.combo_he.currentText()
                 voice_id = main_win.he_voices.get(voice_name, "he-IL-AvriNeural")
                 speed = main_win.combo_speed.currentText()
+                backends = main_win.preview_backend_options()
                 
-                unique_str = f"{text}_{voice_id}_{speed}"
+                unique_str = f"{text}_{voice_id}_{speed}_{backends['backend_name']}"
                 cache_key = hashlib.md5(unique_str.encode('utf-8')).hexdigest()
                 
-                self.worker = AudioPreviewWorker(cache_key, text, voice_id, speed)
+                self.worker = AudioPreviewWorker(cache_key, text, voice_id, speed, **backends)
                 self.worker.finished_data.connect(self.play_audio_bytes)
                 self.worker.start()
         except Exception as e:
@@ -2924,89 +2954,9 @@ class HebrewTTSStudio(QMainWindow):
             QMessageBox.warning(self, "שגיאה", "לא הוזנה מילה לפיצול.")
             return
 
-        # 1. לוגיקת החיתוך (Regex)
-        if use_number:
-            # מחפש: מילה + רווחים + ספרות (לדוגמה: "הרצאה 5")
-            pattern = rf'(?={re.escape(split_word)}\s+\d+)'
-        else:
-            # מחפש רק את המילה
-            pattern = rf'(?={re.escape(split_word)})'
-            
-        segments = re.split(pattern, full_text)
-        segments = [s.strip() for s in segments if s.strip()]
-        
-        if len(segments) < 2:
-            QMessageBox.warning(self, "שים לב", f"לא נמצאה המילה '{split_word}' (או שלא בוצע פיצול).")
-            return
-
-        # 2. בניית התור (Queue)
-        self.batch_queue = []
-        
-        # קביעת תיקיית יעד
-        out_dir = ""
-        if hasattr(self, 'file_paths') and self.file_paths:
-            out_dir = os.path.dirname(self.file_paths[0])
-        elif hasattr(self, 'file_path') and self.file_path:
-            out_dir = os.path.dirname(self.file_path)
-        if not out_dir: out_dir = os.path.expanduser("~/Documents")
-
-        print(f"[DEBUG] Splitting into {len(segments)} parts based on '{split_word}'")
-
-        for idx, segment_text in enumerate(segments):
-            clean_first_line = segment_text.split('\n')[0].strip()
-            safe_name_start = re.sub(r'[\\/*?:"<>|]', "", clean_first_line)
-            
-            # לוקחים רק את ה-3-4 מילים הראשונות לשם הקובץ
-            name_words = safe_name_start.split()[:4]
-            short_name = " ".join(name_words)
-            
-            if idx == 0 and not clean_first_line.startswith(split_word):
-                final_name = f"{base_filename}_Start"
-            else:
-                final_name = f"{base_filename}_{short_name}"
-            
-            # מוודאים שאין רווחים מיותרים בשם הקובץ
-            final_name = final_name.replace(" ", "_")
-            full_path = os.path.join(out_dir, f"{final_name}.mp3")
-            
-            self.batch_queue.append({
-                "text": segment_text,
-                "path": full_path,
-                "index": idx + 1,
-                "total": len(segments)
-            })
-
-        self.total_batch_size = len(self.batch_queue)
-        self.run_next_batch_task()
-
-
-    def start_split_export_process(self, data):
-        """מתחיל תהליך של פיצול הטקסט וייצוא סדרתי (מקבל נתונים מהדיאלוג)"""
-        full_text = self.editor.toPlainText()
-        
-        # חילוץ הנתונים שהתקבלו מהדיאלוג
-        split_word = data["split_word"]
-        base_filename = data["filename"] or "Audio"
-        use_number = data["use_number"]
-        
-        if not full_text.strip():
-            QMessageBox.warning(self, "שגיאה", "העורך ריק.")
-            return
-            
-        if not split_word:
-            QMessageBox.warning(self, "שגיאה", "לא הוזנה מילה לפיצול.")
-            return
-
-        # 1. לוגיקת החיתוך (Regex)
-        if use_number:
-            # מחפש: מילה + רווחים + ספרות (לדוגמה: "הרצאה 5")
-            pattern = rf'(?={re.escape(split_word)}\s+\d+)'
-        else:
-            # מחפש רק את המילה
-            pattern = rf'(?={re.escape(split_word)})'
-            
-        segments = re.split(pattern, full_text)
-        segments = [s.strip() for s in segments if s.strip()]
+        # 1. לוגיקת החיתוך - לפי אותם קטעים שהייצוא משתמש בהם, כך שפרק תמיד מתחיל בתחילת משפט
+        # עם use_number מחפשים מילה + רווחים + ספרות (לדוגמה: "הרצאה 5")
+        segments = [full_text[a:b].strip() for a, b in split_chapters(full_text, split_word, require_number=use_number)]
         
         if len(segments) < 2:
             QMessageBox.warning(self, "שים לב", f"לא נמצאה המילה '{split_word}' (או שלא בוצע פיצול).")
@@ -3074,19 +3024,17 @@ class HebrewTTSStudio(QMainWindow):
         self.btn_split_export.setEnabled(False)
 
         # הרצת ה-Worker (כמו בייצוא רגיל)
-        voice_key = "he-IL-HilaNeural"
-        if hasattr(self, 'combo_he'): voice_key = self.combo_he.currentText()
         rate = self.combo_speed.currentText()
         current_dict = self.settings.get("nikud_dictionary", {})
 
         self.tts_worker = TTSWorker(
             text=task['text'],
             output_file=task['path'],
-            voice=voice_key,
             rate=rate,
             volume="+0%",
             dicta_dict=current_dict,
-            parent=self
+            parent=self,
+            **self.get_voice_options()
         )
 
         # שים לב: אנחנו מחברים לפונקציה מיוחדת שיודעת להמשיך את התור
@@ -3163,43 +3111,10 @@ class HebrewTTSStudio(QMainWindow):
         # 2. שליפת הטקסט הבטוח (שומר על תגיות תמונה)
         text = self.get_text_safe()
         
-        # 3. מיון המילון לפי אורך מילה (מהארוך לקצר)
-        # זה קריטי כדי שלא נחליף בטעות חלק ממילה (למשל 'בצל' בתוך 'בצלם')
-        sorted_keys = sorted(current_dict.keys(), key=len, reverse=True)
-        
-        processed_text = text
-        count = 0
+        # 3. החלפה במעבר יחיד (התאמה ארוכה גוברת, כך ש'בצל' לא יוחלף בתוך 'בצלם')
+        processed_text, count = apply_dictionary(text, current_dict, metadata)
 
-        # 4. ביצוע ההחלפות
-        for base_word in sorted_keys:
-            target_word = current_dict[base_word]
-            
-            # בדיקה אם צריך התאמה מדויקת או חלקית
-            is_exact = False
-            if base_word in metadata:
-                 if metadata[base_word].get('match_type') == 'exact':
-                     is_exact = True
-            
-            # אם הערך במילון זהה למילה בטקסט (בלי ניקוד), אין טעם להחליף סתם
-            # אבל אנחנו מניחים שהערך במילון מנוקד.
-
-            if is_exact:
-                # החלפה רק אם זו מילה שלמה (גבולות מילה)
-                # (?<!...) מוודא שאין אות עברית/אנגלית לפני
-                # (?!...) מוודא שאין אות עברית/אנגלית אחרי
-                pattern = r'(?<![\w\u0590-\u05FF])' + re.escape(base_word) + r'(?![\w\u0590-\u05FF])'
-                processed_text, n = re.subn(pattern, target_word, processed_text)
-                count += n
-            else:
-                # החלפה חלקית (פשוטה)
-                if base_word in processed_text:
-                    # שימוש ב-replace רגיל במקום regex לביצועים, אבל regex בטוח יותר למניעת לולאות
-                    # נשתמש ב-regex פשוט להחלפה גלובלית
-                    pattern = re.escape(base_word)
-                    processed_text, n = re.subn(pattern, target_word, processed_text)
-                    count += n
-
-        # 5. החזרת הטקסט לעורך
+        # 4. החזרת הטקסט לעורך
         if count > 0:
             self.set_text_safe(processed_text)
             self.lbl_status.setText(f"בוצע! הוחלפו {count} מופעים מתוך המילון.")
@@ -3304,9 +3219,6 @@ class HebrewTTSStudio(QMainWindow):
         print(f"[DEBUG] Exporting to: {save_path}")
 
         # הגדרות לקריאה
-        voice_key = "he-IL-HilaNeural"
-        if hasattr(self, 'combo_he'): voice_key = self.combo_he.currentText()
-        
         rate = self.combo_speed.currentText()
         current_dict = self.settings.get("nikud_dictionary", {})
 
@@ -3314,17 +3226,18 @@ class HebrewTTSStudio(QMainWindow):
         self.tts_worker = TTSWorker(
             text=text,
             output_file=save_path,
-            voice=voice_key,
             rate=rate,
             volume="+0%",
             dicta_dict=current_dict,
-            parent=self
+            parent=self,
+            **self.get_voice_options()
         )
 
         self.tts_worker.finished_success.connect(self.on_tts_finished)
         self.tts_worker.progress_update.connect(self.progress_bar.setValue)
         self.tts_worker.log_update.connect(self.lbl_status.setText)
         self.tts_worker.error.connect(self.on_tts_error)
+        self.tts_worker.finished_error.connect(self.on_tts_error)
 
         self.tts_worker.start()
 
@@ -3400,8 +3313,8 @@ class HebrewTTSStudio(QMainWindow):
         else:
             self.on_telegram_upload_complete()
 
-        if skipped:
-            QMessageBox.warning(self, "הושלם עם דילוגים", f"דולגו {len(skipped)} משפטים.")
+        if skipped and is_batch:
+            print(f"[DEBUG] Batch part finished with {len(skipped)} failed sentences: {mp3_path}")
 
         if is_batch:
             print(f"[DEBUG] Batch part finished. Checking queue...")
@@ -3414,10 +3327,79 @@ class HebrewTTSStudio(QMainWindow):
         self.btn_convert.setText("🚀 צור קובץ MP3")
         
         if skipped:
-            QMessageBox.warning(self, "הושלם עם דילוגים", f"דולגו {len(skipped)} משפטים.")
+            self.show_skipped_report(mp3_path, skipped)
+
+    def show_skipped_report(self, mp3_path, skipped, offer_player=False):
+        """
+        מציג דו"ח של משפטים שנכשלו אחרי כל הניסיונות החוזרים,
+        ומציע לסנתז מחדש רק אותם ולשלב אותם בקובץ הקיים.
+        """
+        details = ""
+        for idx, text in skipped:
+            display_text = text[:100] + "..." if len(text) > 100 else text
+            details += f"• משפט {idx}:\n{display_text}\n\n"
+
+        mbox = QMessageBox(self)
+        mbox.setWindowTitle("דו\"ח משפטים חסרים")
+        mbox.setText(f"התהליך הסתיים עם {len(skipped)} שגיאות.\nבמקום המשפטים החסרים הוכנס שקט.")
+        mbox.setDetailedText(details)
+        mbox.setIcon(QMessageBox.Warning)
+
+        mbox.addButton("אישור", QMessageBox.AcceptRole)
+        btn_retry = mbox.addButton("🔁 סנתז מחדש רק משפטים שנכשלו", QMessageBox.ActionRole)
+        btn_player = mbox.addButton("🎵 פתח בנגן", QMessageBox.ActionRole) if offer_player else None
+
+        mbox.exec_()
+
+        if mbox.clickedButton() == btn_retry:
+            self.start_repair_export(mp3_path)
+        elif btn_player and mbox.clickedButton() == btn_player:
+            self.open_in_player_tab()
+
+    def preview_backend_options(self):
+        """מנוע ההקראה ומנוע הגיבוי מההגדרות, בפורמט של AudioPreviewWorker (כמו בייצוא)"""
+        return {"backend_name": self.settings.get("tts_backend") or None,
+                "fallback_name": self.settings.get("tts_fallback_backend") or None}
+
+    def get_voice_options(self):
+        """הקולות ומצב הדו-לשוני שנבחרו בממשק, בפורמט של TTSWorker (קודי קול, לא שמות תצוגה)"""
+        # לפני שנבנו תיבות הבחירה - הקולות שנשמרו בהגדרות
+        he_name = self.combo_he.currentText() if hasattr(self, 'combo_he') else self.settings.get("selected_he_voice")
+        en_name = self.combo_en.currentText() if hasattr(self, 'combo_en') else self.settings.get("selected_en_voice")
+        voice = self.he_voices.get(he_name, he_name) if he_name else "he-IL-HilaNeural"
+        en_voice = self.en_voices.get(en_name) if en_name else None
+        dual_mode = self.chk_dual.isChecked() if hasattr(self, 'chk_dual') else False
+        return {"voice": voice, "en_voice": en_voice, "dual_mode": dual_mode}
+
+    def start_repair_export(self, mp3_path):
+        """מעבר תיקון: מסנתז רק את המשפטים שנכשלו ומשלב אותם בקובץ הקיים"""
+        if not mp3_path or not os.path.exists(mp3_path):
+            QMessageBox.warning(self, "שגיאה", "קובץ ה-MP3 המקורי לא נמצא.")
+            return
+
+        rate = self.combo_speed.currentText()
+
+        self.btn_convert.setEnabled(False)
+        self.btn_convert.setText("מתקן משפטים חסרים...")
+        self.progress_bar.setValue(0)
+        self.lbl_status.setText(f"מסנתז מחדש משפטים שנכשלו: {os.path.basename(mp3_path)}...")
+
+        self.tts_worker = TTSWorker(
+            text="",
+            output_file=mp3_path,
+            rate=rate,
+            volume="+0%",
+            dicta_dict=self.settings.get("nikud_dictionary", {}),
+            parent=self,
+            repair_only=True,
+            **self.get_voice_options()
+        )
+        self.tts_worker.finished_success.connect(self.on_tts_finished)
+        self.tts_worker.finished_error.connect(self.on_tts_error)
+        self.tts_worker.progress_update.connect(self.progress_bar.setValue)
+        self.tts_worker.log_update.connect(self.lbl_status.setText)
+        self.tts_worker.start()
 
-        if is_batch: return
-        
 
 
 
@@ -3542,27 +3524,11 @@ class HebrewTTSStudio(QMainWindow):
         
         keys_to_delete = []
 
-        # רשימת תווים ספציפיים למחיקה מיידית
-        blacklist_chars = [",", ".", "-", "'", '"', ";", ":"]
-
+        # הכללים עצמם משותפים עם הייבוא מקובץ (sanitization_reason)
         for key, val in dictionary.items():
-            key_str = str(key).strip()
-            val_str = str(val).strip()
-
-            # בדיקה 1: האם המפתח הוא אחד מהתווים האסורים?
-            is_blacklisted = key_str in blacklist_chars
-            
-            # בדיקה 2: האם המפתח עצמו מכיל את המילה "שגיאה"? (זה מה שקרה בתמונה)
-            is_error_in_key = "(שגיאה)" in key_str or "(שגאולִיטֶריא)" in key_str
-
-            # בדיקה 3: האם הערך מכיל שגיאה?
-            is_error_in_val = "(שגיאה)" in val_str or "(שגאולִיטֶריא)" in val_str
-            
-            # בדיקה 4: האם המפתח הוא רק סימני פיסוק (ללא אותיות)?
-            is_garbage = not any(c.isalnum() for c in key_str)
-
-            if is_blacklisted or is_error_in_key or is_error_in_val or is_garbage:
-                print(f"[SANITIZER] Marking for deletion: '{key}' -> '{val}'")
+            reason = sanitization_reason(key, val)
+            if reason:
+                print(f"[SANITIZER] Marking for deletion: '{key}' -> '{val}' ({reason})")
                 keys_to_delete.append(key)
 
         # ביצוע המחיקה
@@ -3581,6 +3547,51 @@ class HebrewTTSStudio(QMainWindow):
         else:
             print("[SANITIZER] Dictionary looks clean.")
 
+    def import_dictionary_file(self):
+        """ייבוא מרוכז של מילון מקובץ CSV / TSV / JSONL"""
+        path, _ = QFileDialog.getOpenFileName(self, "ייבוא מילון", "", "Dictionary files (*.csv *.tsv *.jsonl *.txt)")
+        if not path: return
+
+        answer = QMessageBox.question(
+            self, "ייבוא מילון",
+            "מילים שכבר קיימות במילון עם ניקוד אחר:\n"
+            "כן - להחליף בניקוד מהקובץ\nלא - להשאיר את הניקוד הקיים\n\n"
+            "בכל מקרה ייווצר דוח קונפליקטים.",
+            QMessageBox.Yes | QMessageBox.No | QMessageBox.Cancel, QMessageBox.No)
+        if answer == QMessageBox.Cancel: return
+
+        self.lbl_status.setText("מייבא מילון...")
+        QApplication.processEvents()
+        try:
+            report = import_file(self.settings, path, store=self.dictionary_store,
+                                 on_conflict="replace" if answer == QMessageBox.Yes else "keep")
+        except Exception as e:
+            print(f"[ERROR] Dictionary import failed: {e}")
+            QMessageBox.critical(self, "שגיאה", f"הייבוא נכשל (לא נשמר דבר):\n{e}")
+            return
+
+        self.save_settings()
+        self.refresh_dictionary_table()
+
+        message = report.summary()
+        if report.conflicts:
+            report_path = report.write_conflicts(os.path.splitext(path)[0] + ".conflicts.csv")
+            message += f"\n\nדוח קונפליקטים נשמר ב:\n{report_path}"
+        if report.invalid:
+            message += "\n\nשורות שנפסלו (ראשונות):\n" + "\n".join(
+                f"שורה {line_no}: {key} - {reason}" for line_no, key, reason in report.invalid[:10])
+        self.lbl_status.setText(f"✅ ייבוא הושלם: {report.summary()}")
+        QMessageBox.information(self, "ייבוא מילון", message)
+
+    def export_dictionary_file(self):
+        path, _ = QFileDialog.getSaveFileName(self, "ייצוא מילון", "nikud_dictionary.csv", "CSV (*.csv);;TSV (*.tsv);;JSONL (*.jsonl)")
+        if not path: return
+        try:
+            count = write_entries(path, self.settings.get("nikud_dictionary", {}), self.settings.get("nikud_metadata", {}))
+            self.lbl_status.setText(f"✅ יוצאו {count} מילים אל {os.path.basename(path)}")
+        except Exception as e:
+            QMessageBox.critical(self, "שגיאה", f"הייצוא נכשל:\n{e}")
+
     def open_nikud_keyboard(self):
         if not hasattr(self, 'nikud_kb_window'):
             self.nikud_kb_window = NikudKeyboard(self)
@@ -3767,11 +3778,12 @@ class HebrewTTSStudio(QMainWindow):
             voice_name = self.combo_he.currentText()
             voice_id = self.he_voices.get(voice_name, "he-IL-AvriNeural")
             speed = self.combo_speed.currentText()
+            backends = self.preview_backend_options()
             
-            unique_str = f"{text}_{voice_id}_{speed}"
+            unique_str = f"{text}_{voice_id}_{speed}_{backends['backend_name']}"
             cache_key = hashlib.md5(unique_str.encode('utf-8')).hexdigest()
             
-            self.general_audio_worker = AudioPreviewWorker(cache_key, text, voice_id, speed)
+            self.general_audio_worker = AudioPreviewWorker(cache_key, text, voice_id, speed, **backends)
             self.general_audio_worker.finished_data.connect(self.on_general_audio_ready)
             self.general_audio_worker.start()
         except Exception as e:
@@ -3792,13 +3804,8 @@ class HebrewTTSStudio(QMainWindow):
 
     def clean_nikud_from_string(self, text):
         """מנקה ניקוד ופיסוק ליצירת מפתח נקי"""
-        if not text: return ""
-        normalized = unicodedata.normalize('NFD', text)
-        # משאיר רק אותיות ומספרים (בלי ניקוד ובלי פיסוק)
-        clean_chars = [c for c in normalized if not unicodedata.combining(c) and (c.isalnum() or c.isspace())]
-        clean = unicodedata.normalize('NFC', "".join(clean_chars)).strip()
-        # print(f"[DEBUG-CLEAN] Input: '{text}' -> Output: '{clean}'") # דיבאג אופציונלי
-        return clean
+        # משאיר רק אותיות ומספרים (בלי ניקוד ובלי פיסוק) - אותו כלל כמו בייבוא מקובץ
+        return clean_key(text)
 
     def open_fix_dialog(self, original_word_with_nikud):
         """
@@ -3856,7 +3863,7 @@ class HebrewTTSStudio(QMainWindow):
         print(f"[DEBUG] >>> add_word_to_dictionary_logic STARTED")
         print(f"[DEBUG] Key: '{key}' | Value: '{value}'")
         
-        match_type = "exact" if match_index == 1 else "partial"
+        match_type = match_type_from_index(match_index)
         
         # 1. עדכון בזיכרון
         self.settings["nikud_dictionary"][key] = value.strip()
@@ -4002,13 +4009,9 @@ class HebrewTTSStudio(QMainWindow):
 
     def highlight_word_in_table(self, key):
         """מוצא את המילה בטבלה, מסמן אותה וגולל אליה"""
-        # מחפשים בעמודה 0 (המילה בטקסט/המפתח)
-        items = self.table_nikud.findItems(key, Qt.MatchExactly)
-        if items:
-            item = items[0]
-            row = item.row()
-            self.table_nikud.selectRow(row)
-            self.table_nikud.scrollToItem(item, QAbstractItemView.PositionAtCenter)
+        # מחפשים לפי המפתח (עמודה 0)
+        row = self.table_nikud.select_key(key)
+        if row >= 0:
             print(f"[DEBUG] Scrolled to row {row} for key '{key}'")
         else:
             print(f"[DEBUG] Could not find key '{key}' in table visual items.")
@@ -4017,7 +4020,7 @@ class HebrewTTSStudio(QMainWindow):
         """לוגיקה פנימית להוספה למילון"""
         normalized = unicodedata.normalize('NFD', original)
         key = "".join([c for c in normalized if not unicodedata.combining(c)])
-        match_type = "exact" if match_index == 1 else "partial"
+        match_type = match_type_from_index(match_index)
         
         self.settings["nikud_dictionary"][key] = new_val.strip()
         if "nikud_metadata" not in self.settings:
@@ -4030,7 +4033,7 @@ class HebrewTTSStudio(QMainWindow):
 
     def clear_errors_list(self):
         if QMessageBox.question(self, "אישור", "האם לנקות את כל רשימת הטעויות?") == QMessageBox.Yes:
-            self.settings["nikud_errors"] = []
+            self.set_errors_list([])
             self.save_settings()
             self.refresh_errors_table()
             
@@ -4078,6 +4081,7 @@ class HebrewTTSStudio(QMainWindow):
         self.setWindowTitle("Hebrew PDF Studio - Ultimate Edition")
         self.setGeometry(100, 100, 1300, 950)
         self.settings = self.load_settings()
+        self.settings_writer = SettingsWriter(CONFIG_FILE)
 
         self.he_voices = {"Hila (אישה - עברית)": "he-IL-HilaNeural", "Avri (גבר - עברית)": "he-IL-AvriNeural"}
         self.en_voices = {
@@ -4122,11 +4126,32 @@ class HebrewTTSStudio(QMainWindow):
 
 
     def load_settings(self):
+        settings = DEFAULT_SETTINGS.copy()
         if os.path.exists(CONFIG_FILE):
             try:
-                with open(CONFIG_FILE, 'r', encoding='utf-8') as f: return json.load(f)
+                with open(CONFIG_FILE, 'r', encoding='utf-8') as f: settings = json.load(f)
             except: pass
-        return DEFAULT_SETTINGS.copy()
+
+        # המילון, המטא-דאטה והטעויות נשמרים ב-SQLite (הגירה חד-פעמית מה-JSON הישן)
+        self.dictionary_store = None
+        try:
+            self.dictionary_store = DictionaryStore(DICTIONARY_DB_FILE)
+            self.dictionary_store.migrate_from_settings(settings)
+            self.dictionary_store.attach(settings)
+        except Exception as e:
+            print(f"[ERROR] Could not open dictionary store: {e}")
+            settings.setdefault("nikud_dictionary", {})
+            settings.setdefault("nikud_metadata", {})
+            settings.setdefault("nikud_errors", [])
+        return settings
+
+    def set_errors_list(self, words):
+        """מחליף את כל רשימת הטעויות (נכתב למסד בטרנזקציה אחת)"""
+        errors = self.settings.get("nikud_errors")
+        if isinstance(errors, PersistentList):
+            errors.replace(words)
+        else:
+            self.settings["nikud_errors"] = list(words)
     
     def handle_dictionary_update(self, base_word, vocalized_word):
         """מעדכן את הטבלה הוויזואלית ואת הזיכרון, אך לא שומר לקובץ"""
@@ -4153,17 +4178,8 @@ class HebrewTTSStudio(QMainWindow):
         self.settings["nikud_dictionary"][base_word] = vocalized_word
         
         # 4. === עדכון הטבלה הוויזואלית ישירות ===
-        # אנחנו מחפשים אם השורה קיימת ומעדכנים, או מוסיפים חדשה
-        table = self.table_nikud
-        found = False
-        for r in range(table.rowCount()):
-            if table.item(r, 0).text() == base_word:
-                table.setItem(r, 2, QTableWidgetItem(vocalized_word))
-                found = True
-                break
-        
-        if not found:
-            table.add_row_with_buttons(base_word, vocalized_word)
+        # המודל מעדכן את השורה אם קיימת, או מוסיף חדשה במקום הממוין
+        self.table_nikud.upsert_key(base_word)
             
         return True
 
@@ -4183,23 +4199,34 @@ class HebrewTTSStudio(QMainWindow):
             self.settings["pause_sentence"] = self.spin_sentence.value()
             self.settings["max_concurrent"] = self.spin_concurrent.value()
 
-            # בדיקת גודל המילון לפני השמירה
-            dict_size = len(self.settings.get("nikud_dictionary", {}))
-            print(f"[DEBUG] Saving dictionary with {dict_size} entries to disk...")
-
-            # שמירה פיזית
-            with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
-                json.dump(self.settings, f, indent=4, ensure_ascii=False)
+            # שמירה פיזית ברקע: בקשות צמודות מתאחדות לכתיבה אטומית אחת
+            self.settings_writer.schedule(self.settings_snapshot())
             
             timestamp = datetime.now().strftime("%H:%M:%S")
             self.lbl_status.setText(f"✅ נשמר בהצלחה! ({timestamp})")
-            print(f"[DEBUG] >>> Settings saved successfully to {CONFIG_FILE}")
             
         except Exception as e:
             print(f"[ERROR SAVE] {e}")
             self.lbl_status.setText(f"❌ שגיאה בשמירה: {str(e)}")
 
 
+    def settings_snapshot(self):
+        """
+        עותק עמוק של מה שנכתב ל-config.json. נלקח בתהליכון הממשק, כך שתהליכון הכתיבה
+        מסריאל אובייקט שאף אחד לא משנה (ההגדרות המקוננות ממשיכות להשתנות בזמן הכתיבה).
+        """
+        # המילון, המטא-דאטה והטעויות כבר נשמרו במסד (שורה אחת לכל עריכה)
+        if self.dictionary_store:
+            return copy.deepcopy({k: v for k, v in self.settings.items() if k not in STORE_KEYS})
+        return copy.deepcopy(self.settings)
+
+    def flush_settings(self):
+        """נקרא ביציאה מהתוכנה: כותב מיד כל שמירה שעדיין ממתינה וסוגר את המסד"""
+        self.settings_writer.flush()
+        if self.dictionary_store:
+            # תהליכונים שעוד רצים ומעדכנים את המילון אחרי הסגירה - הכתיבה שלהם מתעלמת (ראה DictionaryStore.close)
+            self.dictionary_store.close()
+
     def add_or_update_word(self, base_word, vocalized_word, match_type="partial", update_table_ui=True):
         """
         פונקציה מרכזית להוספה/עדכון מילה.
@@ -4239,68 +4266,14 @@ class HebrewTTSStudio(QMainWindow):
     def update_table_visuals_only(self, key, vocalized, match_type):
         """מעדכן שורה בטבלה אם קיימת, או מוסיף חדשה (ויזואלי בלבד)"""
         print(f"[DEBUG] Updating table visual for key: '{key}'")
-        
-        found_row = -1
-        # חיפוש השורה בטבלה
-        for row in range(self.table_nikud.rowCount()):
-            item = self.table_nikud.item(row, 0)
-            if item and self.clean_nikud_from_string(item.text()) == key:
-                found_row = row
-                break
-        
-        date_str = datetime.now().strftime("%d/%m/%Y")
-        
-        self.table_nikud.blockSignals(True) # מניעת לולאה חוזרת
-        
-        if found_row >= 0:
-            print(f"[DEBUG] Found existing row {found_row}. Updating...")
-            self.table_nikud.setItem(found_row, 2, QTableWidgetItem(vocalized))
-            self.table_nikud.setItem(found_row, 5, QTableWidgetItem(date_str))
-            
-            # עדכון קומבו בוקס
-            cell_widget = self.table_nikud.cellWidget(found_row, 4)
-            if cell_widget:
-                combo = cell_widget.findChild(QComboBox)
-                if combo:
-                    combo.setCurrentIndex(1 if match_type == "exact" else 0)
-        else:
-            print(f"[DEBUG] Row not found. Adding new row for '{key}'")
-            self.table_nikud.add_row_with_data(key, vocalized, date_str, match_type)
-            self.table_nikud.scrollToBottom()
-            
-        self.table_nikud.blockSignals(False)
+        # הערכים עצמם כבר ב-settings; המודל רק צריך לדעת איזו שורה לצייר מחדש
+        row = self.table_nikud.upsert_key(key)
+        if row >= 0:
+            self.table_nikud.scrollTo(self.table_nikud.model().index(row, 0))
 
     def update_table_row_visuals(self, key, vocalized, match_type):
         """עדכון שורה בודדת בטבלה או הוספה אם לא קיימת"""
-        # חיפוש אם השורה קיימת
-        found_row = -1
-        for row in range(self.table_nikud.rowCount()):
-            item = self.table_nikud.item(row, 0)
-            if item and item.text() == key:
-                found_row = row
-                break
-        
-        date_str = datetime.now().strftime("%d/%m/%Y")
-        
-        if found_row >= 0:
-            # עדכון שורה קיימת (רק את עמודת הניקוד, התאריך והסוג)
-            self.table_nikud.blockSignals(True)
-            self.table_nikud.setItem(found_row, 2, QTableWidgetItem(vocalized))
-            self.table_nikud.setItem(found_row, 5, QTableWidgetItem(date_str))
-            
-            # עדכון הקומבו בוקס של סוג ההתאמה
-            cell_widget = self.table_nikud.cellWidget(found_row, 4)
-            if cell_widget:
-                combo = cell_widget.findChild(QComboBox)
-                if combo:
-                    idx = 1 if match_type == "exact" else 0
-                    combo.setCurrentIndex(idx)
-            self.table_nikud.blockSignals(False)
-        else:
-            # הוספת שורה חדשה
-            self.table_nikud.add_row_with_data(key, vocalized, date_str, match_type)
-            # גלילה למילה החדשה
-            self.table_nikud.scrollToBottom()
+        self.update_table_visuals_only(key, vocalized, match_type)
 
 
     def init_ui(self):
@@ -4641,9 +4614,7 @@ class HebrewTTSStudio(QMainWindow):
 
         dict_layout.addLayout(search_layout)
 
-        self.table_nikud = PasteableTableWidget()
-        self.table_nikud.setColumnCount(6)
-        self.table_nikud.setHorizontalHeaderLabels(["מילה בטקסט", "🔊", "תיקון (מנוקד)", "🔊", "סוג התאמה", "תאריך"])
+        self.table_nikud = DictionaryTableView()
         self.input_search_dict.textChanged.connect(self.table_nikud.filter_rows)
 
         header = self.table_nikud.horizontalHeader()
@@ -4666,8 +4637,13 @@ class HebrewTTSStudio(QMainWindow):
 
         actions_layout.addWidget(btn_select_all)
         actions_layout.addWidget(btn_clear_sel)
+        btn_import_dict = QPushButton("📥 ייבוא מקובץ"); btn_import_dict.clicked.connect(self.import_dictionary_file)
+        btn_export_dict = QPushButton("📤 ייצוא לקובץ"); btn_export_dict.clicked.connect(self.export_dictionary_file)
+
         actions_layout.addWidget(btn_delete_multi)
         actions_layout.addStretch()
+        actions_layout.addWidget(btn_import_dict)
+        actions_layout.addWidget(btn_export_dict)
         dict_layout.addLayout(actions_layout)
 
         tab2_layout.addWidget(group_dict)
@@ -4809,31 +4785,13 @@ class HebrewTTSStudio(QMainWindow):
     def refresh_dictionary_table(self):
         """טעינת המילון לטבלה"""
         print("[DEBUG] Refreshing dictionary table...")
-        self.table_nikud.setRowCount(0)
-        self.table_nikud.clearContents() # ניקוי יסודי
-        
-        dictionary = self.settings.get("nikud_dictionary", {})
-        metadata = self.settings.get("nikud_metadata", {}) 
-        
-        # מיון כדי שיהיה קל למצוא
-        sorted_keys = sorted(dictionary.keys())
-        
-        for base in sorted_keys:
-            vocalized = dictionary[base]
-            data = metadata.get(base, {})
-            date_added = data.get("date", "-")
-            match_type = data.get("match_type", "partial")
-            
-            self.table_nikud.add_row_with_data(base, vocalized, date_added, match_type)
-            
-        print(f"[DEBUG] Table refreshed. Total words: {len(dictionary)}")
+        # המודל קורא את המילון ישירות מ-settings (ממוין לפי מפתח)
+        self.table_nikud.load(self.settings)
+        print(f"[DEBUG] Table refreshed. Total words: {len(self.settings.get('nikud_dictionary', {}))}")
 
     def add_word_to_dict_externally(self, base_word, vocalized_word):
         self.settings["nikud_dictionary"][base_word] = vocalized_word
-        row = self.table_nikud.rowCount()
-        self.table_nikud.insertRow(row)
-        self.table_nikud.setItem(row, 0, QTableWidgetItem(base_word))
-        self.table_nikud.setItem(row, 1, QTableWidgetItem(vocalized_word))
+        self.table_nikud.upsert_key(base_word)
         self.save_settings()
 
     def start_auto_nikud(self):
@@ -4969,11 +4927,7 @@ class HebrewTTSStudio(QMainWindow):
         self.progress_bar.setValue(0)
         self.save_settings()
         
-        # ... (שאר איסוף הנתונים ללא שינוי) ...
-        he_voice = self.he_voices[self.combo_he.currentText()]
-        en_voice = self.en_voices[self.combo_en.currentText()]
         speed = self.combo_speed.currentText()
-        is_dual = self.chk_dual.isChecked()
         
         # יצירת נתיב שמירה...
         timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M")
@@ -4993,7 +4947,15 @@ class HebrewTTSStudio(QMainWindow):
         final_path = os.path.join(out_dir, f"{original_name}_{timestamp}.mp3")
         
         # יצירת ה-Worker החדש
-        self.worker = TTSWorker(text, he_voice, en_voice, speed, final_path, self.settings, dual_mode=is_dual)
+        self.worker = TTSWorker(
+            text=text,
+            output_file=final_path,
+            rate=speed,
+            volume="+0%",
+            dicta_dict=self.settings.get("nikud_dictionary", {}),
+            parent=self,
+            **self.get_voice_options()
+        )
         
         self.worker.progress_update.connect(self.progress_bar.setValue)
         self.worker.finished_success.connect(self.on_success)
@@ -5065,26 +5027,8 @@ class HebrewTTSStudio(QMainWindow):
         
         # --- בדיקה אם היו שגיאות (משפטים שדולגו) ---
         if hasattr(self, 'last_skipped_list') and self.last_skipped_list:
-            skipped_count = len(self.last_skipped_list)
-            details = ""
-            for idx, text in self.last_skipped_list:
-                display_text = text[:100] + "..." if len(text) > 100 else text
-                details += f"• משפט {idx}:\n{display_text}\n\n"
-            
-            mbox = QMessageBox(self)
-            mbox.setWindowTitle("דו\"ח משפטים חסרים")
-            mbox.setText(f"התהליך הסתיים עם {skipped_count} שגיאות.")
-            mbox.setDetailedText(details)
-            mbox.setIcon(QMessageBox.Warning)
-            
-            # כפתורים
-            btn_ok = mbox.addButton("אישור", QMessageBox.AcceptRole)
-            btn_player = mbox.addButton("🎵 פתח בנגן", QMessageBox.ActionRole)
-            
-            mbox.exec_()
-            
-            if mbox.clickedButton() == btn_player:
-                self.open_in_player_tab()
+            mp3_path = getattr(getattr(self, 'worker', None), 'output_path', "")
+            self.show_skipped_report(mp3_path, self.last_skipped_list, offer_player=True)
         
         else:
             # --- הצלחה מלאה ---
@@ -5182,60 +5126,13 @@ class HebrewTTSStudio(QMainWindow):
         if hasattr(self, 'pdf_viewer'):
             self.pdf_viewer.load_pdf(self.file_paths[0])
 
-        full_text_accumulator = ""
-        total_files = len(self.file_paths)
-
         try:
-            for idx, f_path in enumerate(self.file_paths):
-                try:
-                    pdf_reader = PyPDF2.PdfReader(f_path)
-                    total_pages = len(pdf_reader.pages)
-                except Exception as e:
-                    print(f"Error reading PDF {f_path}: {e}")
-                    continue
-                
-                txt_start = self.input_start.text().strip() or "1"
-                txt_end = self.input_end.text().strip() or str(total_pages)
-                start_p = max(1, int(txt_start))
-                end_p = min(total_pages, int(txt_end))
-
-                for i in range(start_p - 1, end_p):
-                    page_num = i + 1
-                    # תגית עמוד לסנכרון
-                    full_text_accumulator += f"\n\n[PAGE:{page_num}]\n"
-                    
-                    page_text = pdf_reader.pages[i].extract_text()
-                    
-                    if page_text:
-                        # === שלב 1: ניקוי שורות זבל ===
-                        lines = page_text.split('\n')
-                        cleaned_lines = []
-                        for line in lines:
-                            stripped = line.strip()
-                            # מסנן שורות שהן רק מספרים (כמו מספרי עמוד)
-                            if re.match(r'^\s*\d+\s*$', stripped):
-                                continue
-                            if len(stripped) < 2 and stripped not in ['.', '!', '?']:
-                                continue
-                            cleaned_lines.append(stripped)
-
-                        # === שלב 2: איחוד פסקאות חכם ===
-                        # אם שורה לא נגמרת בנקודה/סימן שאלה/קריאה, נחבר אותה לשורה הבאה
-                        smart_text = ""
-                        for j, line in enumerate(cleaned_lines):
-                            smart_text += line
-                            # רשימת סיומות המעידות על סוף פסקה באמת
-                            if line.endswith(('.', '!', '?', ':', ';', '"')):
-                                smart_text += "\n" 
-                            else:
-                                smart_text += " " 
-
-                        full_text_accumulator += smart_text
-
-                self.progress_bar.setValue(int(((idx + 1) / total_files) * 100))
-
-            # === שלב 3: פוליש סופי (Regex) - התיקון הגדול ===
-            final_text = self.advanced_cleanup(full_text_accumulator)
+            # החילוץ והניקוי עצמם ב-src/utils/pdf_text (משותף עם שורת הפקודה)
+            final_text = extract_pdf_text(
+                self.file_paths,
+                start=self.input_start.text().strip() or 1,
+                end=self.input_end.text().strip() or None,
+                progress=self.progress_bar.setValue)
 
             self.editor.setPlainText(final_text.strip())
             self.lbl_status.setText("הייבוא הושלם! (טקסט עבר סידור וניקוי)")
@@ -5248,39 +5145,6 @@ class HebrewTTSStudio(QMainWindow):
             import traceback
             traceback.print_exc()
 
-    def advanced_cleanup(self, text):
-        """
-        פונקציית עזר לתיקון בעיות נפוצות בייבוא PDF בעברית
-        """
-        # 1. איחוד רווחים כפולים
-        text = re.sub(r'\s+', ' ', text)
-        
-        # 2. תיקון רווח לפני נקודה/פסיק (לדוגמה: "מילה ." -> "מילה.")
-        text = re.sub(r'\s+([.,?!:;])', r'\1', text)
-
-        # 3. החזרת ירידות שורה אחרי נקודות (כדי שלא הכל יהיה גוש אחד)
-        # מחפש נקודה שאחריה רווח ואות, והופך לירידת שורה כפולה
-        text = re.sub(r'\. ([א-ת])', r'.\n\n\1', text)
-
-        # 4. תיקון סוגריים באנגלית שהתבלגנו (הבעיה הספציפית שהייתה לך)
-        # דוגמה: הופך את "Absorption ,(" ל- "(Absorption),"
-        # מזהה מילה באנגלית, אחריה רווח אופציונלי, פסיק וסוגר פותח
-        text = re.sub(r'([a-zA-Z\-\s]+)\s*,?\(', r'(\1), ', text)
-        
-        # תיקון נוסף: "Word (" -> "(Word)"
-        # במקרים שאין פסיק
-        text = re.sub(r'([a-zA-Z]+)\s+\(', r'(\1) ', text)
-
-        # 5. תיקון ספציפי לבעיות צירים (מהדוגמה שלך)
-        text = text.replace("בציר ה־ אנו", "בציר ה־X אנו")
-        text = text.replace("ובציר ה־ את", "ובציר ה־Y את")
-        
-        # 6. החזרת תגיות PAGE להיות בשורה נפרדת (כי הניקוי אולי חיבר אותן)
-        text = re.sub(r'(\[PAGE:\d+\])', r'\n\n\1\n', text)
-
-        return text
-            
-
     def apply_styles(self):
         self.setStyleSheet("""
             QMainWindow { background-color: #102A43; }
@@ -5355,5 +5219,6 @@ class HebrewTTSStudio(QMainWindow):
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     window = HebrewTTSStudio()
+    app.aboutToQuit.connect(window.flush_settings)
     window.show()
     sys.exit(app.exec_())
\ No newline at end of file